@@ -1,14 +1,21 @@
 # path/to/file: scripts/build_pipeline.py
 
 import argparse
+import sys
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
 import json
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.jinja_env import criar_ambiente
+
 
 def renderizar_template(template_path: Path, dados: dict, destino: Path):
-    env = Environment(
-        loader=FileSystemLoader(str(template_path.parent)),
+    # Ambiente compartilhado por todos os JSONs (antes era recriado, e o template recompilado, a cada arquivo)
+    env = criar_ambiente(
+        template_path.parent,
+        cache_dir=template_path.parent.parent / "cache" / "jinja",
+        precompilar=(".fodt.j2",),
         autoescape=False,
     )
     template = env.get_template(template_path.name)
@@ -1,11 +1,20 @@
 # scripts/build_pipeline.py
 import argparse
+import os
 import subprocess
 from pathlib import Path
 import json
 import hashlib
 from datetime import datetime
 import shutil
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.conversor_pandoc import VARIAVEL_SERVIDOR, iniciar_servidor_pandoc
+from utils.conversor_libreoffice import (
+    VARIAVEL_SERVIDOR_LIBREOFFICE, encerrar_servidor_libreoffice, iniciar_servidor_libreoffice
+)
 
 def hash_do_arquivo(path: Path) -> str:
     return hashlib.md5(path.read_bytes()).hexdigest()
@@ -84,8 +93,22 @@ def main():
     parser = argparse.ArgumentParser(description="Executar pipeline completa de publicação")
     parser.add_argument("--projeto", default="liderando_transformacao", help="Nome do projeto")
     parser.add_argument("--idioma", default="pt-BR", help="Idioma do conteúdo")
+    parser.add_argument("--source-date-epoch", type=int, default=None,
+                        help="Build reprodutível: fixa datas e timestamps das saídas (segundos desde 1970, UTC)")
+    parser.add_argument("--release", action="store_true",
+                        help="Build de release: inclui a validação completa do EPUB com epubcheck")
+    parser.add_argument("--libreoffice-server", action="store_true",
+                        help="Mantém um soffice headless (UNO) ativo durante o build para todas as conversões do LibreOffice")
+    parser.add_argument("--otimizar-pdf", action="store_true",
+                        help="Lineariza e recomprime os PDFs para distribuição web (sempre ativo com --release)")
+    parser.add_argument("--pandoc-server", action="store_true",
+                        help="Mantém um 'pandoc server' ativo durante o build em vez de um processo pandoc por documento")
     args = parser.parse_args()
 
+    # As etapas herdam o ambiente; SOURCE_DATE_EPOCH ativa o modo reprodutível em todas elas
+    if args.source_date_epoch is not None:
+        os.environ["SOURCE_DATE_EPOCH"] = str(args.source_date_epoch)
+
     raiz = Path(__file__).resolve().parents[1] / "projetos" / args.projeto
     cache_dir = raiz / "cache"
     log_dir = raiz / "logs"
@@ -105,6 +128,7 @@ def main():
 
     etapas = [
         ("Gerar Manifesto", "scripts/gerar_manifesto.py"),
+        ("Processar Assets", "scripts/processar_assets.py"),
         ("Converter ODT → MD", "scripts/converter_odt_para_md.py"),
         ("Converter MD → JSON", "scripts/parse_para_json.py"),
         ("Gerar Tags e Referências", "scripts/gerar_tags_e_referencia.py"),
@@ -119,15 +143,53 @@ def main():
         ("Exportar FODT → ODT/PDF", "scripts/consolidar_e_exportar_odt_pdf.py"),
         ("Validar ePub", "scripts/validar_epub.py")
     ]
+    if args.otimizar_pdf or args.release:
+        # Pós-processamento dos PDFs finais (LaTeX e LibreOffice) para download via CDN
+        etapas.append(("Otimizar PDFs", "scripts/otimizar_pdf.py"))
 
     args_comuns = ["--projeto", args.projeto, "--idioma", args.idioma]
+    # Fora de release, 'Validar ePub' faz só a checagem estrutural (sem JVM)
+    args_extras = {"scripts/validar_epub.py": ["--completo"]} if args.release else {}
     sucesso = True
 
-    for nome, script in etapas:
-        ok = executar_etapa(nome, script, args_comuns, log_path)
-        if not ok:
-            sucesso = False
-            break
+    # As etapas encontram o servidor pela variável de ambiente herdada
+    servidor_pandoc = iniciar_servidor_pandoc() if args.pandoc_server else None
+    if servidor_pandoc:
+        os.environ[VARIAVEL_SERVIDOR] = servidor_pandoc[1]
+        log(f"🔌 pandoc server ativo em {servidor_pandoc[1]}", log_path)
+    elif args.pandoc_server:
+        log("⚠️ Não foi possível iniciar o pandoc server; cada conversão iniciará um processo pandoc.", log_path)
+
+    servidor_libreoffice = iniciar_servidor_libreoffice() if args.libreoffice_server else None
+    if servidor_libreoffice:
+        os.environ[VARIAVEL_SERVIDOR_LIBREOFFICE] = servidor_libreoffice[1]
+        log(f"🔌 soffice (UNO) ativo em {servidor_libreoffice[1]}", log_path)
+    elif args.libreoffice_server:
+        log("⚠️ Não foi possível iniciar o soffice via UNO; cada conversão usará o CLI do LibreOffice.", log_path)
+
+    try:
+        for nome, script in etapas:
+            ok = executar_etapa(nome, script, args_comuns + args_extras.get(script, []), log_path)
+            if not ok:
+                sucesso = False
+                break
+    finally:
+        if servidor_pandoc:
+            servidor_pandoc[0].terminate()
+            servidor_pandoc[0].wait()
+            os.environ.pop(VARIAVEL_SERVIDOR, None)
+        if servidor_libreoffice:
+            encerrar_servidor_libreoffice(servidor_libreoffice)
+            os.environ.pop(VARIAVEL_SERVIDOR_LIBREOFFICE, None)
+
+    if sucesso and "SOURCE_DATE_EPOCH" in os.environ:
+        # Em modo reprodutível os hashes identificam as saídas (cache, deduplicação, uploads)
+        hashes = {
+            str(arquivo.relative_to(raiz)): hash_do_arquivo(arquivo)
+            for arquivo in sorted((raiz / "output").rglob("*")) if arquivo.is_file()
+        }
+        salvar_cache(cache_dir / "hashes_saidas.json", hashes)
+        log(f"🔒 Build reprodutível (SOURCE_DATE_EPOCH={os.environ['SOURCE_DATE_EPOCH']}): {len(hashes)} hashes em {cache_dir / 'hashes_saidas.json'}", log_path)
 
     if sucesso:
         log("\n🏁 Pipeline finalizada com sucesso.", log_path)
@@ -1,9 +1,80 @@
 import json
-import subprocess
+import os
+import re
+import sys
 from pathlib import Path
 import argparse
 import xml.etree.ElementTree as ET
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.conversor_libreoffice import exportar_documento
+from utils.empacotador_odt import fodt_para_odt
+from utils.xml_odf import OFFICE_NS, TEXT_NS, mapa_prefixos, serializar_elemento
+
+
+def _filhos_do_texto(arquivo: Path):
+    """
+    Gera os filhos diretos de office:body/office:text do arquivo via iterparse; cada filho é
+    descartado da árvore depois de consumido.
+    """
+    tag_texto, tag_corpo = f"{{{OFFICE_NS}}}text", f"{{{OFFICE_NS}}}body"
+    pilha = []
+    texto = None
+    for evento, elemento in ET.iterparse(arquivo, events=("start", "end")):
+        if evento == "start":
+            if elemento.tag == tag_texto and pilha and pilha[-1].tag == tag_corpo:
+                texto = elemento
+            pilha.append(elemento)
+            continue
+        pilha.pop()
+        if texto is not None and pilha and pilha[-1] is texto:
+            yield elemento
+            texto.remove(elemento)
+        elif elemento is texto:
+            texto = None
+
+
+def escrever_fodt_consolidado(arquivos: list, destino: Path) -> bool:
+    """
+    Escreve o FODT consolidado sem montar a árvore do livro inteiro: prólogo e estilos do
+    primeiro arquivo, os filhos de office:text de cada arquivo (com quebra de página entre
+    arquivos) e o fechamento do primeiro documento.
+    """
+    prefixos = mapa_prefixos(arquivos[0])
+    if OFFICE_NS not in prefixos:
+        print(f"❌ Namespace office ausente em {arquivos[0].name}")
+        return False
+    prefixos.setdefault(TEXT_NS, "text")
+    # O primeiro arquivo tem o tamanho de um capítulo: basta texto para separar prólogo e fechamento
+    base = arquivos[0].read_text(encoding="utf-8")
+    office = prefixos[OFFICE_NS]
+    abertura = re.search(rf"<{office}:body\b[^>]*>\s*<{office}:text\b([^>]*?)(/?)>", base)
+    if abertura is None:
+        print("❌ Não foi possível encontrar o body do documento")
+        return False
+    if abertura.group(2):
+        prologo = base[:abertura.end() - 2] + ">"
+        fechamento = f"</{office}:text>" + base[abertura.end():]
+    else:
+        prologo = base[:abertura.end()]
+        fechamento = base[base.index(f"</{office}:text>", abertura.end()):]
+    quebra_pagina = f'<{prefixos[TEXT_NS]}:p {prefixos[TEXT_NS]}:style-name="page-break"/>'
+
+    temporario = destino.with_name(f".{destino.name}.tmp")
+    with open(temporario, "w", encoding="utf-8") as saida:
+        saida.write(prologo)
+        for posicao, arquivo in enumerate(arquivos):
+            print(f"📄 Adicionando: {arquivo.name}")
+            if posicao > 0:
+                saida.write(f"\n      {quebra_pagina}")
+            for elemento in _filhos_do_texto(arquivo):
+                saida.write("\n      ")
+                serializar_elemento(elemento, prefixos, saida)
+        saida.write("\n    " + fechamento)
+    os.replace(temporario, destino)
+    return True
+
 
 def consolidar_fodt(raiz_projeto: Path, idioma: str):
     """Consolida arquivos FODT em um único arquivo seguindo a ordem do manifesto"""
@@ -64,77 +135,31 @@ def consolidar_fodt(raiz_projeto: Path, idioma: str):
     
     # Consolidar arquivos
     try:
-        # Ler o primeiro arquivo como base
-        with open(arquivos_ordenados[0], 'r', encoding='utf-8') as f:
-            conteudo_base = f.read()
-        
-        # Parse XML
-        root = ET.fromstring(conteudo_base)
-        
-        # Encontrar o body
-        namespaces = {
-            'office': 'urn:oasis:names:tc:opendocument:xmlns:office:1.0',
-            'text': 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
-        }
-        
-        body = root.find('.//office:body/office:text', namespaces)
-        if body is None:
-            print("❌ Não foi possível encontrar o body do documento")
-            return False
-        
-        # Adicionar conteúdo dos outros arquivos
-        for arquivo in arquivos_ordenados[1:]:
-            print(f"📄 Adicionando: {arquivo.name}")
-            
-            with open(arquivo, 'r', encoding='utf-8') as f:
-                conteudo = f.read()
-            
-            # Parse do arquivo atual
-            arquivo_root = ET.fromstring(conteudo)
-            arquivo_body = arquivo_root.find('.//office:body/office:text', namespaces)
-            
-            if arquivo_body is not None:
-                # Adicionar quebra de página
-                page_break = ET.Element('{urn:oasis:names:tc:opendocument:xmlns:text:1.0}p')
-                page_break.set('{urn:oasis:names:tc:opendocument:xmlns:text:1.0}style-name', 'page-break')
-                body.append(page_break)
-                
-                # Adicionar conteúdo
-                for elemento in arquivo_body:
-                    body.append(elemento)
-        
-        # Salvar arquivo consolidado
         output_dir = raiz_projeto / "output"
         output_dir.mkdir(exist_ok=True)
         
         arquivo_consolidado = output_dir / "livro_completo.fodt"
         
-        # Escrever XML
-        tree = ET.ElementTree(root)
-        ET.indent(tree, space="  ", level=0)
-        tree.write(arquivo_consolidado, encoding='utf-8', xml_declaration=True)
+        # Escrita em streaming: memória limitada a um capítulo por vez
+        if not escrever_fodt_consolidado(arquivos_ordenados, arquivo_consolidado):
+            return False
         
         print(f"✅ Arquivo consolidado criado: {arquivo_consolidado}")
         
-        # Converter para ODT
+        # ODT: empacotamento direto do FODT (sem LibreOffice, zip reprodutível)
+        arquivo_odt = output_dir / "livro_completo.odt"
         try:
-            subprocess.run([
-                'libreoffice', '--headless', '--convert-to', 'odt', '--outdir', str(output_dir),
-                str(arquivo_consolidado)
-            ], check=True, capture_output=True)
-            print(f"✅ Convertido para ODT: {output_dir / 'livro_completo.odt'}")
-        except subprocess.CalledProcessError as e:
+            fodt_para_odt(arquivo_consolidado, arquivo_odt)
+            print(f"✅ Convertido para ODT: {arquivo_odt}")
+        except (ValueError, ET.ParseError) as e:
             print(f"⚠️ Erro na conversão para ODT: {e}")
         
-        # Converter para PDF
-        try:
-            subprocess.run([
-                'libreoffice', '--headless', '--convert-to', 'pdf', '--outdir', str(output_dir),
-                str(arquivo_consolidado)
-            ], check=True, capture_output=True)
+        # PDF: único passo que ainda precisa do LibreOffice (UNO, com fallback para o CLI)
+        erros = exportar_documento(arquivo_consolidado, {"pdf": output_dir / "livro_completo.pdf"})
+        if erros["pdf"] is None:
             print(f"✅ Convertido para PDF: {output_dir / 'livro_completo.pdf'}")
-        except subprocess.CalledProcessError as e:
-            print(f"⚠️ Erro na conversão para PDF: {e}")
+        else:
+            print(f"⚠️ Erro na conversão para PDF: {erros['pdf']}")
         
         return True
         
@@ -1,8 +1,12 @@
 # scripts/converter_odt_para_md.py
-import pypandoc
 import argparse
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.conversor_pandoc import converter
+
 
 def ajustar_titulo_md(caminho_md: Path) -> None:
     conteudo = caminho_md.read_text(encoding="utf-8")
@@ -26,22 +30,19 @@ def ajustar_titulo_md(caminho_md: Path) -> None:
 
 
 
-def converter_odt_para_md(arquivo_odt: Path, destino_md: Path) -> None:
+def converter_odt_para_md(arquivo_odt: Path, destino_md: Path, cache_dir: Path = None) -> None:
     print(f"🟡 Convertendo: {arquivo_odt.name} → {destino_md.relative_to(Path.cwd())}")
-    pypandoc.convert_file(
-        str(arquivo_odt),
-        to="markdown",
-        outputfile=str(destino_md),
-        extra_args=["--wrap=none"],
-    )
+    # ODTs sem alteração desde o último build são lidos do cache, sem iniciar o pandoc
+    markdown = converter(arquivo_odt, "odt", "markdown", ["--wrap=none"], cache_dir)
+    destino_md.write_text(markdown, encoding="utf-8")
     ajustar_titulo_md(destino_md)
 
 
-def processar_diretorio(origem: Path, destino: Path) -> None:
+def processar_diretorio(origem: Path, destino: Path, cache_dir: Path = None) -> None:
     for arquivo in origem.glob("*.odt"):
         nome_md = arquivo.stem + ".md"
         destino_md = destino / nome_md
-        converter_odt_para_md(arquivo, destino_md)
+        converter_odt_para_md(arquivo, destino_md, cache_dir)
 
 
 def main() -> None:
@@ -82,8 +83,9 @@ def main() -> None:
 
     print()
     print(f"🟢 Iniciando conversão no projeto '{args.projeto}' ({args.idioma})")
-    processar_diretorio(capitulos_dir, md_capitulos)
-    processar_diretorio(partes_dir, md_partes)
+    cache_pandoc = base_dir / "projetos" / args.projeto / "cache" / "pandoc"
+    processar_diretorio(capitulos_dir, md_capitulos, cache_pandoc)
+    processar_diretorio(partes_dir, md_partes, cache_pandoc)
     print("✅ Conversão concluída com sucesso.")
 
 
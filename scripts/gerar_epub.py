@@ -1,24 +1,30 @@
 #  scripts/gerar_epub.py
 import argparse
 import json
-import zipfile
 from pathlib import Path
 from typing import Dict, Any, List
-from datetime import date
 import sys
 import re
 
-from jinja2 import Environment, FileSystemLoader
 
 script_dir = Path(__file__).resolve().parent
 project_root = script_dir.parent
 sys.path.insert(0, str(project_root))
 
 from utils.cleaner import clean_title_for_output, clean_content_text
-from utils.gerenciador_de_estilos import GerenciadorEstilos
-
-
-def gerar_epub(projeto: str, idioma_arg: str):
+from utils.modelo_estilos import carregar_modelo_estilos
+from utils.build_reprodutivel import data_de_build, escrever_zip_reprodutivel
+from utils.validador_epub import validar_estrutura_epub
+from utils.divisor_xhtml import dividir_xhtml, reescrever_ancoras_locais
+from utils.otimizador_epub import otimizar_css, minificar_xhtml
+from utils.assets import carregar_assets, media_type, resolver_imagem
+from utils.indice_html import carregar_indice, chave_titulo, indice_por_titulo
+from utils.fontes_epub import gerar_encryption_xml, media_type_fonte, preparar_fontes_embutidas
+from utils.jinja_env import criar_ambiente
+
+
+def gerar_epub(projeto: str, idioma_arg: str, dividir_em: str = None, limite_bytes: int = None,
+               otimizar: bool = None, embutir_fontes: bool = None):
     base_dir = Path("projetos") / projeto
     config_path = base_dir / "config.json"
     estilos_config_path = base_dir / "estilos" / "estilo_livro.json" 
@@ -49,17 +55,35 @@ def gerar_epub(projeto: str, idioma_arg: str):
         print(f"❌ Diretório de templates não encontrado: {templates_dir}")
         return
     
-    env = Environment(loader=FileSystemLoader(templates_dir), autoescape=True)
+    env = criar_ambiente(templates_dir, cache_dir=base_dir / "cache" / "jinja", precompilar=(".j2",), autoescape=True)
 
     config = json.loads(config_path.read_text(encoding="utf-8"))
     titulo_livro = config.get("titulo", "Livro Digital")
     autor_livro = config.get("autor", "Autor Desconhecido")
-    data_pub = config.get("data_publicacao", str(date.today()))
+    data_pub = config.get("data_publicacao", data_de_build().isoformat())
+
+    # Divisão de capítulos longos (leitura mais fluida em e-readers); argumentos da CLI têm prioridade
+    config_epub = config.get("epub", {})
+    dividir_em = dividir_em or config_epub.get("dividir_capitulos_em")
+    limite_bytes = limite_bytes or config_epub.get("limite_bytes_capitulo")
+    if otimizar is None:
+        otimizar = config_epub.get("otimizar", True)
+    if embutir_fontes is None:
+        embutir_fontes = config_epub.get("embutir_fontes", False)
+    # A chave da ofuscação de fontes é derivada deste identificador: ele precisa ser o mesmo do OPF
+    identificador = config.get("identificador", "urn:uuid:12345678-1234-1234-1234-123456789012")
 
     css_content = ""
+    metadata_estilos = {}
     if estilos_config_path.exists():
-        gerenciador_estilos = GerenciadorEstilos(estilos_config_path)
-        css_content = gerenciador_estilos.gerar_css_completo()
+        # Modelo compilado uma vez por build (cache/estilos), compartilhado com LaTeX e FODT
+        try:
+            modelo_estilos = carregar_modelo_estilos(base_dir)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        css_content = modelo_estilos.css
+        metadata_estilos = modelo_estilos.metadata
     else:
         print(f"⚠️ Arquivo de estilos não encontrado em: {estilos_config_path}. Usando CSS fallback.")
         css_content = "body { font-family: sans-serif; line-height: 1.6; margin: 5%; }"
@@ -82,19 +106,44 @@ def gerar_epub(projeto: str, idioma_arg: str):
         print(f"❌ Nenhuma pasta HTML de capítulos ou partes encontrada em: {html_base_dir}")
         return
 
-    all_html_files_map = {}
-
-    for html_file_path in html_partes_dir.glob("*.html"):
-        content = html_file_path.read_text(encoding="utf-8")
-        match = re.search(r'<h1[^>]*>(.*?)<\/h1>', content, re.IGNORECASE)
-        title_from_html = clean_title_for_output(match.group(1).strip()) if match else html_file_path.stem
-        all_html_files_map[("parte", title_from_html)] = (html_file_path, content)
-
-    for html_file_path in html_capitulos_dir.glob("*.html"):
-        content = html_file_path.read_text(encoding="utf-8")
-        match = re.search(r'<h1[^>]*>(.*?)<\/h1>', content, re.IGNORECASE)
-        title_from_html = clean_title_for_output(match.group(1).strip()) if match else html_file_path.stem
-        all_html_files_map[("capitulo", title_from_html)] = (html_file_path, content)
+    # Imagens registradas pelo estágio de assets (processar_assets.py), se ele rodou
+    assets = carregar_assets(base_dir / "gerado_automaticamente" / idioma_normalizado_para_path / "manifesto.json") or {}
+    imagens_assets = assets.get("imagens", {})
+    imagens_usadas = {}  # sha256 → nome do arquivo dentro de OEBPS
+
+    def reescrever_imagens(content: str, chave_origem: str) -> str:
+        """Troca os caminhos internos do ODT (ex: Pictures/x.png) pela variante EPUB empacotada."""
+        def _substituir(match):
+            resolvida = resolver_imagem(assets, chave_origem, match.group(2), "epub")
+            if resolvida is None:
+                return match.group(0)
+            sha, variante = resolvida
+            imagens_usadas[sha] = f"images/{sha[:16]}{variante.suffix}"
+            return f'{match.group(1)}"{imagens_usadas[sha]}"'
+
+        return re.sub(r'(<img\b[^>]*?\ssrc=)"([^"]+)"', _substituir, content)
+
+    # Índices gerados pelo md_para_html: a busca não abre nenhum HTML; só os empacotados são lidos
+    indices_html = {"parte": carregar_indice(html_partes_dir), "capitulo": carregar_indice(html_capitulos_dir)}
+    titulos_html = {tipo: indice_por_titulo(indice) for tipo, indice in indices_html.items()}
+    pastas_origem = {"parte": "partes", "capitulo": "capitulos"}
+
+    def buscar_html(tipo: str, titulo: str, origem: str = None):
+        # Pelo arquivo de origem (identidade estável); pelo título normalizado em JSONs antigos
+        entrada = indices_html[tipo].get(origem) if origem else None
+        entrada = entrada or titulos_html[tipo].get(chave_titulo(titulo))
+        if entrada is None:
+            return None
+        content = entrada["caminho"].read_text(encoding="utf-8")
+        return entrada["caminho"], reescrever_imagens(content, f"{pastas_origem[tipo]}/{entrada['id']}")
+
+    def nome_e_id(item: dict, tipo: str, contador: int):
+        """Nome do XHTML e id no manifest derivados do id estável do item (inserir um capítulo não renomeia os demais)."""
+        prefixo_arquivo, prefixo_id = ("parte", "part") if tipo == "parte" else ("capitulo", "cap")
+        if item.get("id"):
+            return f"{prefixo_arquivo}-{item['id']}.xhtml", f"{prefixo_id}-{item['id']}"
+        # livro_estruturado.json gerado antes dos ids: mantém a numeração sequencial
+        return f"{prefixo_arquivo}_{contador:02d}.xhtml", f"{prefixo_id}{contador:02d}"
 
 
     partes_para_toc = []
@@ -104,178 +153,261 @@ def gerar_epub(projeto: str, idioma_arg: str):
     parte_counter = 0
     capitulo_counter = 0
 
-    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as epub:
-        epub.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
-        container_tpl = env.get_template("container.xml.j2")
-        epub.writestr("META-INF/container.xml", container_tpl.render())
-        
-        epub.writestr(f"OEBPS/{css_filename_in_epub}", css_content.encode("utf-8")) 
-        
-        manifest_items.append({"id": "css", "href": css_filename_in_epub, "media_type": "text/css"})
-
-
-        for item in livro_data.get("conteudo", []):
-            if item["tipo"] == "parte":
-                parte_counter += 1
-                canonical_epub_filename = f"parte_{parte_counter:02d}.xhtml"
-                
-                item_title_cleaned = clean_title_for_output(item.get("titulo_parte", f"Parte {parte_counter}"))
-                html_info = all_html_files_map.get(("parte", item_title_cleaned))
+    arquivos_epub = {}
+    arquivos_epub["mimetype"] = "application/epub+zip"
+
+    container_tpl = env.get_template("container.xml.j2")
+    arquivos_epub["META-INF/container.xml"] = container_tpl.render()
+    arquivos_epub[f"OEBPS/{css_filename_in_epub}"] = css_content.encode("utf-8")
+    manifest_items.append({"id": "css", "href": css_filename_in_epub, "media_type": "text/css"})
+
+    def adicionar_capitulo(nome_arquivo: str, id_manifest: str, conteudo: str):
+        """Adiciona um capítulo ao pacote; se configurado, dividido em vários itens da spine."""
+        documentos = dividir_xhtml(conteudo, dividir_em, limite_bytes)
+        nomes = [nome_arquivo] + [f"{Path(nome_arquivo).stem}_{i:02d}.xhtml" for i in range(2, len(documentos) + 1)]
+        ids = [id_manifest] + [f"{id_manifest}_{i:02d}" for i in range(2, len(documentos) + 1)]
+        if len(documentos) > 1:
+            documentos = reescrever_ancoras_locais(documentos, nomes)
+            print(f"✂️ {nome_arquivo} dividido em {len(documentos)} itens da spine.")
+        # O sumário (nav/índice) continua apontando para o primeiro pedaço
+        for documento, nome, id_item in zip(documentos, nomes, ids):
+            arquivos_epub[f"OEBPS/{nome}"] = documento.encode("utf-8")
+            manifest_items.append({"id": id_item, "href": nome, "media_type": "application/xhtml+xml"})
+            spine_items.append({"idref": id_item})
+
+    for item in livro_data.get("conteudo", []):
+        if item["tipo"] == "parte":
+            parte_counter += 1
+            canonical_epub_filename, id_manifest = nome_e_id(item, "parte", parte_counter)
+            
+            item_title_cleaned = clean_title_for_output(item.get("titulo_parte", f"Parte {parte_counter}"))
+            html_info = buscar_html("parte", item_title_cleaned, item.get("arquivo_origem"))
+
+            current_part_toc_entry = {
+                "titulo": item_title_cleaned,
+                "arquivo": canonical_epub_filename,
+                "capitulos": []
+            }
+
+            if html_info:
+                original_html_path, html_content = html_info
+                arquivos_epub[f"OEBPS/{canonical_epub_filename}"] = html_content.encode("utf-8")
+                manifest_items.append({"id": id_manifest, "href": canonical_epub_filename, "media_type": "application/xhtml+xml"})
+                spine_items.append({"idref": id_manifest})
+            else:
+                print(f"⚠️ Aviso: HTML para parte '{item_title_cleaned}' não encontrado no disco. Criando placeholder.")
+                placeholder_content = f"""<?xml version="1.0" encoding="UTF-8"?>
+                <html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" xml:lang="{idioma_final_para_xml}" lang="{idioma_final_para_xml}">
+                <head><title>{item_title_cleaned}</title><link rel="stylesheet" href="{css_filename_in_epub}" type="text/css"/></head>
+                <body><section epub:type="part"><h1>{item_title_cleaned}</h1><p>Conteúdo da parte não encontrado.</p></section></body></html>"""
+                arquivos_epub[f"OEBPS/{canonical_epub_filename}"] = placeholder_content.encode("utf-8")
+                manifest_items.append({"id": id_manifest, "href": canonical_epub_filename, "media_type": "application/xhtml+xml"})
+                spine_items.append({"idref": id_manifest})
+            
+            partes_para_toc.append(current_part_toc_entry)
 
-                current_part_toc_entry = {
-                    "titulo": item_title_cleaned,
-                    "arquivo": canonical_epub_filename,
-                    "capitulos": []
-                }
-
-                if html_info:
-                    original_html_path, html_content = html_info
-                    epub.writestr(f"OEBPS/{canonical_epub_filename}", html_content.encode("utf-8"))
-                    manifest_items.append({"id": f"part{parte_counter:02d}", "href": canonical_epub_filename, "media_type": "application/xhtml+xml"})
-                    spine_items.append({"idref": f"part{parte_counter:02d}"})
-                else:
-                    print(f"⚠️ Aviso: HTML para parte '{item_title_cleaned}' não encontrado no disco. Criando placeholder.")
-                    placeholder_content = f"""<?xml version="1.0" encoding="UTF-8"?>
-                    <html xmlns="http://www.w3.org/1999/xhtml" xml:lang="{idioma_final_para_xml}" lang="{idioma_final_para_xml}">
-                    <head><title>{item_title_cleaned}</title><link rel="stylesheet" href="{css_filename_in_epub}" type="text/css"/></head>
-                    <body><section epub:type="part"><h1>{item_title_cleaned}</h1><p>Conteúdo da parte não encontrado.</p></section></body></html>"""
-                    epub.writestr(f"OEBPS/{canonical_epub_filename}", placeholder_content.encode("utf-8"))
-                    manifest_items.append({"id": f"part{parte_counter:02d}", "href": canonical_epub_filename, "media_type": "application/xhtml+xml"})
-                    spine_items.append({"idref": f"part{parte_counter:02d}"})
-                
-                partes_para_toc.append(current_part_toc_entry)
+            for nested_chapter_item in item.get("capitulos", []):
+                if nested_chapter_item["tipo"] == "capitulo":
+                    capitulo_counter += 1
+                    canonical_epub_filename_chap, id_manifest_chap = nome_e_id(nested_chapter_item, "capitulo", capitulo_counter)
+                    
+                    chap_title_cleaned = clean_title_for_output(nested_chapter_item.get("titulo1", f"Capítulo {capitulo_counter}"))
+                    html_info_chap = buscar_html("capitulo", chap_title_cleaned, nested_chapter_item.get("arquivo_origem"))
 
-                for nested_chapter_item in item.get("capitulos", []):
-                    if nested_chapter_item["tipo"] == "capitulo":
-                        capitulo_counter += 1
-                        canonical_epub_filename_chap = f"capitulo_{capitulo_counter:02d}.xhtml"
+                    if html_info_chap:
+                        original_html_path_chap, html_content_chap = html_info_chap
+                        adicionar_capitulo(canonical_epub_filename_chap, id_manifest_chap, html_content_chap)
                         
-                        chap_title_cleaned = clean_title_for_output(nested_chapter_item.get("titulo1", f"Capítulo {capitulo_counter}"))
-                        html_info_chap = all_html_files_map.get(("capitulo", chap_title_cleaned))
-
-                        if html_info_chap:
-                            original_html_path_chap, html_content_chap = html_info_chap
-                            epub.writestr(f"OEBPS/{canonical_epub_filename_chap}", html_content_chap.encode("utf-8"))
-
-                            manifest_items.append({"id": f"cap{capitulo_counter:02d}", "href": canonical_epub_filename_chap, "media_type": "application/xhtml+xml"})
-                            spine_items.append({"idref": f"cap{capitulo_counter:02d}"})
-                            
-                            current_part_toc_entry["capitulos"].append({
-                                "titulo": chap_title_cleaned,
-                                "arquivo": canonical_epub_filename_chap
-                            })
-                        else:
-                            print(f"⚠️ Aviso: HTML para capítulo '{chap_title_cleaned}' (aninhado) não encontrado no disco. Criando placeholder.")
-                            placeholder_content_chap = f"""<?xml version="1.0" encoding="UTF-8"?>
-                            <html xmlns="http://www.w3.org/1999/xhtml" xml:lang="{idioma_final_para_xml}" lang="{idioma_final_para_xml}">
-                            <head><title>{chap_title_cleaned}</title><link rel="stylesheet" href="{css_filename_in_epub}" type="text/css"/></head>
-                            <body><section epub:type="chapter"><h1>{chap_title_cleaned}</h1><p>Conteúdo do capítulo aninhado não encontrado.</p></section></body></html>"""
-                            epub.writestr(f"OEBPS/{canonical_epub_filename_chap}", placeholder_content_chap.encode("utf-8"))
-                            manifest_items.append({"id": f"cap{capitulo_counter:02d}", "href": canonical_epub_filename_chap, "media_type": "application/xhtml+xml"})
-                            spine_items.append({"idref": f"cap{capitulo_counter:02d}"})
-                            current_part_toc_entry["capitulos"].append({
-                                "titulo": chap_title_cleaned,
-                                "arquivo": canonical_epub_filename_chap
-                            })
+                        current_part_toc_entry["capitulos"].append({
+                            "titulo": chap_title_cleaned,
+                            "arquivo": canonical_epub_filename_chap
+                        })
+                    else:
+                        print(f"⚠️ Aviso: HTML para capítulo '{chap_title_cleaned}' (aninhado) não encontrado no disco. Criando placeholder.")
+                        placeholder_content_chap = f"""<?xml version="1.0" encoding="UTF-8"?>
+                        <html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" xml:lang="{idioma_final_para_xml}" lang="{idioma_final_para_xml}">
+                        <head><title>{chap_title_cleaned}</title><link rel="stylesheet" href="{css_filename_in_epub}" type="text/css"/></head>
+                        <body><section epub:type="chapter"><h1>{chap_title_cleaned}</h1><p>Conteúdo do capítulo aninhado não encontrado.</p></section></body></html>"""
+                        adicionar_capitulo(canonical_epub_filename_chap, id_manifest_chap, placeholder_content_chap)
+                        current_part_toc_entry["capitulos"].append({
+                            "titulo": chap_title_cleaned,
+                            "arquivo": canonical_epub_filename_chap
+                        })
+        
+        elif item["tipo"] == "capitulo":
+            capitulo_counter += 1
+            canonical_epub_filename, id_manifest = nome_e_id(item, "capitulo", capitulo_counter)
             
-            elif item["tipo"] == "capitulo":
-                capitulo_counter += 1
-                canonical_epub_filename = f"capitulo_{capitulo_counter:02d}.xhtml"
-                
-                item_title_cleaned = clean_title_for_output(item.get("titulo1", f"Capítulo {capitulo_counter}"))
-                html_info = all_html_files_map.get(("capitulo", item_title_cleaned))
+            item_title_cleaned = clean_title_for_output(item.get("titulo1", f"Capítulo {capitulo_counter}"))
+            html_info = buscar_html("capitulo", item_title_cleaned, item.get("arquivo_origem"))
 
-                if html_info:
-                    original_html_path, html_content = html_info
-                    epub.writestr(f"OEBPS/{canonical_epub_filename}", html_content.encode("utf-8"))
-
-                    manifest_items.append({"id": f"cap{capitulo_counter:02d}", "href": canonical_epub_filename, "media_type": "application/xhtml+xml"})
-                    spine_items.append({"idref": f"cap{capitulo_counter:02d}"})
-                    
-                    if not partes_para_toc or partes_para_toc[-1]["titulo"] != "Capítulos Avulsos":
-                        partes_para_toc.append({
-                            "titulo": "Capítulos Avulsos", 
-                            "arquivo": "",
-                            "capitulos": []
-                        })
-                    partes_para_toc[-1]["capitulos"].append({
-                        "titulo": item_title_cleaned,
-                        "arquivo": canonical_epub_filename
+            if html_info:
+                original_html_path, html_content = html_info
+                adicionar_capitulo(canonical_epub_filename, id_manifest, html_content)
+                
+                if not partes_para_toc or partes_para_toc[-1]["titulo"] != "Capítulos Avulsos":
+                    partes_para_toc.append({
+                        "titulo": "Capítulos Avulsos", 
+                        "arquivo": "",
+                        "capitulos": []
                     })
-                else:
-                    print(f"⚠️ Aviso: HTML para capítulo '{item_title_cleaned}' (avulso) não encontrado no disco. Criando placeholder.")
-                    placeholder_content = f"""<?xml version="1.0" encoding="UTF-8"?>
-                    <html xmlns="http://www.w3.org/1999/xhtml" xml:lang="{idioma_final_para_xml}" lang="{idioma_final_para_xml}">
-                    <head><title>{item_title_cleaned}</title><link rel="stylesheet" href="{css_filename_in_epub}" type="text/css"/></head>
-                    <body><section epub:type="chapter"><h1>{item_title_cleaned}</h1><p>Conteúdo do capítulo avulso não encontrado.</p></section></body></html>"""
-                    epub.writestr(f"OEBPS/{canonical_epub_filename}", placeholder_content.encode("utf-8"))
-                    manifest_items.append({"id": f"cap{capitulo_counter:02d}", "href": canonical_epub_filename, "media_type": "application/xhtml+xml"})
-                    spine_items.append({"idref": f"cap{capitulo_counter:02d}"})
-                    
-                    if not partes_para_toc or partes_para_toc[-1]["titulo"] != "Capítulos Avulsos":
-                        partes_para_toc.append({
-                            "titulo": "Capítulos Avulsos",
-                            "arquivo": "",
-                            "capitulos": []
-                        })
-                    partes_para_toc[-1]["capitulos"].append({
-                        "titulo": item_title_cleaned,
-                        "arquivo": canonical_epub_filename
+                partes_para_toc[-1]["capitulos"].append({
+                    "titulo": item_title_cleaned,
+                    "arquivo": canonical_epub_filename
+                })
+            else:
+                print(f"⚠️ Aviso: HTML para capítulo '{item_title_cleaned}' (avulso) não encontrado no disco. Criando placeholder.")
+                placeholder_content = f"""<?xml version="1.0" encoding="UTF-8"?>
+                <html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" xml:lang="{idioma_final_para_xml}" lang="{idioma_final_para_xml}">
+                <head><title>{item_title_cleaned}</title><link rel="stylesheet" href="{css_filename_in_epub}" type="text/css"/></head>
+                <body><section epub:type="chapter"><h1>{item_title_cleaned}</h1><p>Conteúdo do capítulo avulso não encontrado.</p></section></body></html>"""
+                adicionar_capitulo(canonical_epub_filename, id_manifest, placeholder_content)
+                
+                if not partes_para_toc or partes_para_toc[-1]["titulo"] != "Capítulos Avulsos":
+                    partes_para_toc.append({
+                        "titulo": "Capítulos Avulsos",
+                        "arquivo": "",
+                        "capitulos": []
                     })
-
-
-        indice_tpl = env.get_template("indice.xhtml.j2")
-        indice_content = indice_tpl.render(
-            titulo=titulo_livro,
-            lang=idioma_final_para_xml, 
-            partes=partes_para_toc, 
-            caminho_css=css_filename_in_epub 
-        )
-        epub.writestr("OEBPS/indice.xhtml", indice_content.encode("utf-8"))
-        manifest_items.append({
-            "id": "indice",
-            "href": "indice.xhtml",
-            "media_type": "application/xhtml+xml"
-        })
-        spine_items.insert(0, {"idref": "indice"}) 
-
-
-        nav_tpl = env.get_template("nav.xhtml.j2")
-        nav_content = nav_tpl.render(
+                partes_para_toc[-1]["capitulos"].append({
+                    "titulo": item_title_cleaned,
+                    "arquivo": canonical_epub_filename
+                })
+
+
+    for sha, nome_imagem in sorted(imagens_usadas.items()):
+        arquivos_epub[f"OEBPS/{nome_imagem}"] = (base_dir / imagens_assets[sha]["variantes"]["epub"]).read_bytes()
+        manifest_items.append({"id": f"img_{sha[:12]}", "href": nome_imagem, "media_type": media_type(Path(nome_imagem))})
+
+    # Capa: item 'cover-image' no manifest e página de capa no início da spine
+    capa_id = None
+    capa_sha = assets.get("capa")
+    if capa_sha and capa_sha in imagens_assets:
+        capa_variante = base_dir / imagens_assets[capa_sha]["variantes"]["epub"]
+        capa_href = f"images/capa{capa_variante.suffix}"
+        capa_id = "capa"
+        arquivos_epub[f"OEBPS/{capa_href}"] = capa_variante.read_bytes()
+        manifest_items.append({"id": capa_id, "href": capa_href, "media_type": media_type(capa_variante), "properties": "cover-image"})
+        capa_tpl = env.get_template("capa.xhtml.j2")
+        arquivos_epub["OEBPS/capa.xhtml"] = capa_tpl.render(
             titulo=titulo_livro,
-            partes=partes_para_toc, 
-            lang=idioma_final_para_xml, 
-            caminho_css=css_filename_in_epub 
+            lang=idioma_final_para_xml,
+            caminho_css=css_filename_in_epub,
+            caminho_imagem=capa_href,
+        ).encode("utf-8")
+        manifest_items.append({"id": "pagina_capa", "href": "capa.xhtml", "media_type": "application/xhtml+xml"})
+
+    indice_tpl = env.get_template("indice.xhtml.j2")
+    indice_content = indice_tpl.render(
+        titulo=titulo_livro,
+        lang=idioma_final_para_xml, 
+        partes=partes_para_toc, 
+        caminho_css=css_filename_in_epub 
+    )
+    arquivos_epub["OEBPS/indice.xhtml"] = indice_content.encode("utf-8")
+    manifest_items.append({
+        "id": "indice",
+        "href": "indice.xhtml",
+        "media_type": "application/xhtml+xml"
+    })
+    spine_items.insert(0, {"idref": "indice"}) 
+    if capa_id:
+        spine_items.insert(0, {"idref": "pagina_capa"})
+
+
+    nav_tpl = env.get_template("nav.xhtml.j2")
+    nav_content = nav_tpl.render(
+        titulo=titulo_livro,
+        partes=partes_para_toc, 
+        lang=idioma_final_para_xml, 
+        caminho_css=css_filename_in_epub 
+    )
+    arquivos_epub["OEBPS/nav.xhtml"] = nav_content.encode("utf-8")
+    manifest_items.append({
+        "id": "nav",
+        "href": "nav.xhtml",
+        "media_type": "application/xhtml+xml",
+        "properties": "nav"
+    })
+    spine_items.append({"idref": "nav", "linear": "no"})
+
+    if otimizar:
+        # Poda do CSS pelas classes/tags realmente usadas e minificação de CSS/XHTML
+        tamanho_antes = sum(len(dados) for dados in arquivos_epub.values())
+        documentos_xhtml = [nome for nome in arquivos_epub if nome.endswith(".xhtml")]
+        arquivos_epub[f"OEBPS/{css_filename_in_epub}"] = otimizar_css(
+            css_content, (arquivos_epub[nome].decode("utf-8") for nome in documentos_xhtml)
+        ).encode("utf-8")
+        for nome in documentos_xhtml:
+            arquivos_epub[nome] = minificar_xhtml(arquivos_epub[nome].decode("utf-8")).encode("utf-8")
+        tamanho_depois = sum(len(dados) for dados in arquivos_epub.values())
+        print(f"🗜️ CSS/XHTML otimizados: {tamanho_antes} → {tamanho_depois} bytes (sem compressão).")
+
+    if embutir_fontes:
+        # Subconjunto (só os glifos do livro) das fontes declaradas, ofuscado conforme a especificação EPUB
+        nome_css = f"OEBPS/{css_filename_in_epub}"
+        css_atual = arquivos_epub[nome_css]
+        css_atual = css_atual.decode("utf-8") if isinstance(css_atual, bytes) else css_atual
+        regras_font_face, fontes = preparar_fontes_embutidas(
+            css_atual,
+            [arquivos_epub[nome].decode("utf-8") for nome in arquivos_epub if nome.endswith(".xhtml")],
+            metadata_estilos,
+            identificador,
+            base_dir / "cache" / "fontes",
         )
-        epub.writestr("OEBPS/nav.xhtml", nav_content.encode("utf-8"))
-        manifest_items.append({
-            "id": "nav",
-            "href": "nav.xhtml",
-            "media_type": "application/xhtml+xml",
-            "properties": "nav"
-        })
-        spine_items.append({"idref": "nav", "linear": "no"})
-
-        opf_tpl = env.get_template("content.opf.j2")
-        epub.writestr("OEBPS/content.opf", opf_tpl.render(
-            titulo=titulo_livro,
-            autor=autor_livro,
-            data=data_pub,
-            idioma=idioma_final_para_xml,
-            manifest_items=manifest_items,
-            spine_items=spine_items,
-        ))
+        if fontes:
+            if otimizar:
+                regras_font_face = otimizar_css(regras_font_face, [])
+            arquivos_epub[nome_css] = (regras_font_face + "\n" + css_atual).encode("utf-8")
+            for i, (nome_fonte, dados) in enumerate(sorted(fontes.items()), start=1):
+                arquivos_epub[f"OEBPS/{nome_fonte}"] = dados
+                manifest_items.append({"id": f"fonte{i:02d}", "href": nome_fonte, "media_type": media_type_fonte(Path(nome_fonte))})
+            arquivos_epub["META-INF/encryption.xml"] = gerar_encryption_xml([f"OEBPS/{nome}" for nome in sorted(fontes)])
+            print(f"🔤 {len(fontes)} fonte(s) embutida(s) (subconjunto + ofuscação): {sum(len(d) for d in fontes.values())} bytes.")
+
+    opf_tpl = env.get_template("content.opf.j2")
+    arquivos_epub["OEBPS/content.opf"] = opf_tpl.render(
+        titulo=titulo_livro,
+        autor=autor_livro,
+        data=data_pub,
+        idioma=idioma_final_para_xml,
+        manifest_items=manifest_items,
+        spine_items=spine_items,
+        capa_id=capa_id,
+        identificador=identificador,
+    )
+
+    # Datas, permissões e ordem dos membros fixas: mesma entrada → mesmo EPUB byte a byte
+    escrever_zip_reprodutivel(output_path, arquivos_epub, primeiro="mimetype")
 
     print(f"✅ EPUB gerado com sucesso: {output_path}")
 
+    # Pré-validação estrutural em Python (milissegundos); o epubcheck completo fica para builds de release
+    erros_estrutura = validar_estrutura_epub(output_path)
+    if erros_estrutura:
+        print(f"❌ Pré-validação estrutural do EPUB falhou ({len(erros_estrutura)} erro(s)):")
+        for erro in erros_estrutura:
+            print(f"   • {erro}")
+        sys.exit(1)
+    print("✅ Pré-validação estrutural do EPUB: OK")
+
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--projeto", required=True)
     parser.add_argument("--idioma", default="pt_br")
+    parser.add_argument("--dividir-em", choices=["h2", "h3"], default=None,
+                        help="Divide capítulos em vários XHTML antes de cada h2 (ou h2/h3)")
+    parser.add_argument("--limite-bytes", type=int, default=None,
+                        help="Divide capítulos cujo XHTML ultrapasse este tamanho em bytes")
+    parser.add_argument("--sem-otimizacao", action="store_true",
+                        help="Não poda o CSS nem minifica CSS/XHTML (útil para depurar o EPUB)")
+    parser.add_argument("--embutir-fontes", action="store_true", default=None,
+                        help="Embute subconjuntos ofuscados das fontes declaradas nos estilos (requer fontTools)")
     args = parser.parse_args()
 
-    gerar_epub(args.projeto, args.idioma)
+    gerar_epub(args.projeto, args.idioma, args.dividir_em, args.limite_bytes,
+               otimizar=False if args.sem_otimizacao else None, embutir_fontes=args.embutir_fontes)
 
 
 if __name__ == "__main__":
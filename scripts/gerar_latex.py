@@ -1,14 +1,16 @@
 # scripts/gerar_latex.py
 import argparse
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 import sys
 import re
 import subprocess
 import time
-import datetime # Importar datetime para a data atual
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import select_autoescape
 
 # Adiciona o diretório raiz do projeto ao sys.path para importações
 script_dir = Path(__file__).resolve().parent
@@ -17,16 +19,14 @@ sys.path.insert(0, str(project_root))
 
 from utils.cleaner import clean_title_for_output
 from utils.filters import setup_jinja_env_with_filters # Importa a função de setup de filtros
-
-def parse_dimension(value: str, default: float) -> float:
-    """Extrai o valor numérico de uma string de dimensão (ex: '2.5cm' -> 2.5)."""
-    if isinstance(value, (int, float)):
-        return float(value)
-    if isinstance(value, str):
-        match = re.match(r"([0-9.]+)([a-zA-Z]+)", value.strip())
-        if match:
-            return float(match.group(1))
-    return default
+from utils.build_reprodutivel import data_de_build
+from utils.conversor_pandoc import converter
+from utils.markdown_latex import markdown_para_latex
+from utils.escrita_artefatos import EscritorArtefatos
+from utils.jinja_env import criar_ambiente
+from utils.modelo_estilos import carregar_modelo_estilos
+from utils.assets import carregar_assets, resolver_imagem
+from utils.fontes_latex import comando_fontspec, resolver_fontes_latex
 
 def sanitize_filename(text: str) -> str:
     """
@@ -40,18 +40,17 @@ def sanitize_filename(text: str) -> str:
     return sanitized
 
 
-def convert_markdown_to_latex(markdown_text: str) -> str:
-    """Converte um bloco de texto Markdown para LaTeX usando Pandoc."""
+def convert_markdown_to_latex(markdown_text: str, rotulo: str = "", cache_dir: Path = None) -> str:
+    """
+    Converte um bloco de texto Markdown para LaTeX usando Pandoc. `rotulo` identifica a seção nas
+    mensagens de erro; com `cache_dir`, blocos já convertidos são lidos do cache sem chamar o pandoc.
+    """
     if not markdown_text:
         return ""
     try:
-        result = subprocess.run(
-            ['pandoc', '-f', 'markdown', '-t', 'latex', '--wrap=none', '--no-highlight'],
-            input=markdown_text.encode('utf-8'),
-            capture_output=True,
-            check=True
-        )
-        latex_output = result.stdout.decode('utf-8').strip()
+        latex_output = converter(
+            markdown_text, "markdown", "latex", ["--wrap=none", "--no-highlight"], cache_dir
+        ).strip()
         latex_output = latex_output.replace('\\tightlist\n', '')
         # A remoção do emoji será feita pelo filtro escape_latex no Jinja2 agora,
         # mas mantemos aqui por segurança se esta função for usada isoladamente.
@@ -62,12 +61,40 @@ def convert_markdown_to_latex(markdown_text: str) -> str:
         print("Por favor, instale Pandoc em: https://pandoc.org/installing.html")
         sys.exit(1)
     except subprocess.CalledProcessError as e:
-        print(f"❌ Erro ao converter Markdown para LaTeX com Pandoc: {e}")
-        print(f"Stderr: {e.stderr.decode('utf-8')}")
+        secao = f" (seção '{rotulo}')" if rotulo else ""
+        print(f"❌ Erro ao converter Markdown para LaTeX com Pandoc{secao}: {e}\n"
+              f"Stderr: {e.stderr.decode('utf-8')}")
         return markdown_text
 
 
-def gerar_latex(projeto: str, idioma_arg: str):
+def converter_blocos_em_paralelo(blocos: list, rotulos: list, jobs: int, cache_dir: Path = None) -> list:
+    """
+    Converte os blocos Markdown com vários processos pandoc simultâneos (pool limitado a `jobs`).
+    O resultado segue a ordem de entrada, independentemente da ordem de término.
+    """
+    if not blocos:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(blocos)))) as executor:
+        return list(executor.map(partial(convert_markdown_to_latex, cache_dir=cache_dir), blocos, rotulos))
+
+
+def converter_blocos(blocos: list, rotulos: list, jobs: int, cache_dir: Path = None,
+                     somente_pandoc: bool = False) -> tuple:
+    """
+    Converte os blocos com o renderizador nativo (Python puro) e manda para o pandoc, em paralelo,
+    apenas os que usam construções não suportadas. Retorna (resultados em ordem, nº de blocos via pandoc).
+    """
+    resultados = [None if somente_pandoc else markdown_para_latex(bloco) for bloco in blocos]
+    pendentes = [i for i, resultado in enumerate(resultados) if resultado is None]
+    convertidos = converter_blocos_em_paralelo(
+        [blocos[i] for i in pendentes], [rotulos[i] for i in pendentes], jobs, cache_dir
+    )
+    for i, latex in zip(pendentes, convertidos):
+        resultados[i] = latex
+    return resultados, len(pendentes)
+
+
+def gerar_latex(projeto: str, idioma_arg: str, jobs: int = None, somente_pandoc: bool = False) -> bool:
     start_time = time.time()
     print(f"\n[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_time))}] ▶️ Iniciando etapa: Gerar LaTeX para o projeto '{projeto}' ({idioma_arg})...")
 
@@ -121,21 +148,23 @@ def gerar_latex(projeto: str, idioma_arg: str):
 
     if not config_path.exists():
         print(f"❌ Arquivo de configuração não encontrado: {config_path.resolve()}")
-        return
+        return False
 
     if not templates_dir.exists():
         print(f"❌ Diretório de templates LaTeX não encontrado: {templates_dir.resolve()}")
         print(f"Por favor, crie a pasta: {templates_dir.resolve()}")
-        return
-
-    # Configurar Jinja2 Environment
-    env = Environment(
-        loader=FileSystemLoader(templates_dir),
+        return False
+
+    # Configurar Jinja2 Environment (bytecode em cache; todos os templates compilados já aqui)
+    env = criar_ambiente(
+        templates_dir,
+        cache_dir=base_dir / "cache" / "jinja",
+        configurar=setup_jinja_env_with_filters, # Aplica os filtros, incluindo escape_latex
+        precompilar=(".j2",),
         autoescape=select_autoescape(['html', 'xml', 'tex']), # Certifique-se de que 'tex' está aqui
         trim_blocks=True,
         lstrip_blocks=True
     )
-    env = setup_jinja_env_with_filters(env) # Aplica os filtros, incluindo escape_latex
 
     config_data = json.loads(config_path.read_text(encoding="utf-8"))
     # Ajustado para ler do seu config.json
@@ -143,81 +172,41 @@ def gerar_latex(projeto: str, idioma_arg: str):
     autor_livro = config_data.get("autor", "Autor Desconhecido")
     data_publicacao_config = config_data.get("data_publicacao", "") # Para metadados no template
 
-    raw_styles_data = {}
     if estilos_config_path.exists():
-        try:
-            raw_styles_data = json.loads(estilos_config_path.read_text(encoding="utf-8"))
-            print(f"✅ Estilos carregados de: {estilos_config_path.resolve()}")
-        except json.JSONDecodeError as e:
-            print(f"❌ Erro ao carregar estilos de {estilos_config_path.resolve()}: {e}")
-            print("Usando estilos padrão/fallback para continuar.")
+        print(f"✅ Estilos carregados de: {estilos_config_path.resolve()}")
     else:
         print(f"⚠️ Arquivo de estilos não encontrado em: {estilos_config_path.resolve()}. Usando estilos padrão/fallback.")
 
-    processed_styles = {}
-
-    # Processar estilos de parágrafo
-    p_def = raw_styles_data.get("paragraph_default", {})
-    processed_styles["paragraph_default"] = {
-        "font-size": parse_dimension(p_def.get("font-size", "10pt"), 10.0),
-        "text-indent": parse_dimension(p_def.get("text-indent", "0.5cm"), 0.5),
-        "line-height": float(p_def.get("line-height", "1.2")),
-        "margin-bottom": parse_dimension(p_def.get("margin-bottom", "0.2cm"), 0.2),
-        "font-family": p_def.get("font-family", "Latin Modern Roman"),
-        "color": p_def.get("color", "text_gray")
-    }
-
-    # Processar estilos de heading_1
-    h1_def = raw_styles_data.get("heading_1", {})
-    processed_styles["heading_1"] = {
-        "font-size": parse_dimension(h1_def.get("font-size", "24pt"), 24.0),
-        "line-spacing": round(parse_dimension(h1_def.get("line-spacing", "28.8pt"), 28.8), 2), # Adicionado line-spacing para ser dinâmico
-        "font-family": h1_def.get("font-family", "Latin Modern Sans"),
-        "color": h1_def.get("color", "DarkBlueHeading"),
-        "margin-top": parse_dimension(h1_def.get("margin-top", "1cm"), 1.0),
-        "margin-bottom": parse_dimension(h1_def.get("margin-bottom", "0.5cm"), 0.5)
+    # Estilos resolvidos uma única vez (modelo compilado em cache/estilos, compartilhado com EPUB e FODT):
+    # dimensões já convertidas para cm/pt e cores normalizadas para \definecolor
+    try:
+        processed_styles = carregar_modelo_estilos(base_dir).latex
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+
+    # Preflight de fontes: famílias → arquivos uma vez por estado do fontconfig (cache/latex/fontes_latex.json).
+    # Fonte ausente falha aqui, e não depois de vários passos do xelatex.
+    familia_principal = (processed_styles["paragraph_default"].get("font-family") or "Latin Modern Roman").strip()
+    familia_sans = (processed_styles["heading_1"].get("font-family") or "Latin Modern Sans").strip()
+    try:
+        fontes_resolvidas = resolver_fontes_latex([familia_principal, familia_sans], base_dir / "cache" / "latex")
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+    if fontes_resolvidas is None:
+        print("⚠️ fc-match não encontrado; o fontspec resolverá as fontes pelo nome durante a compilação.")
+        fontes_resolvidas = {}
+    fontes_latex = {
+        "principal": comando_fontspec("setmainfont", familia_principal, fontes_resolvidas.get(familia_principal)),
+        "sans": comando_fontspec("setsansfont", familia_sans, fontes_resolvidas.get(familia_sans)),
     }
 
-    # Processar margens do documento
-    processed_styles["document_margins_cm"] = parse_dimension(raw_styles_data.get("document_margins", "2.5cm"), 2.5)
-    processed_styles["document_settings"] = raw_styles_data.get("document_settings", {}) # Para margens dinâmicas
-
-    # --- INÍCIO DA LÓGICA DE PROCESSAMENTO DE CORES ATUALIZADA ---
-    processed_colors = {}
-    
-    # Coleta todas as cores definidas no metadata do estilo_livro.json
-    if "metadata" in raw_styles_data and isinstance(raw_styles_data["metadata"], dict):
-        for color_group_key in ["cores_texto", "cores_fundo_destaque", "cores_borda_destaque"]:
-            if color_group_key in raw_styles_data["metadata"] and isinstance(raw_styles_data["metadata"][color_group_key], dict):
-                for name, hex_val in raw_styles_data["metadata"][color_group_key].items():
-                    if isinstance(hex_val, str) and hex_val.startswith("#"):
-                        processed_colors[name] = hex_val[1:]
-                    else:
-                        # Se não for uma string de hex com '#', armazena como está
-                        # Cuidado: isto pode causar problemas se hex_val não for um formato válido para LaTeX
-                        processed_colors[name] = hex_val 
-    
-    # Garantir que cores essenciais tenham um fallback (caso não estejam nas cores do metadata)
-    # Estas sobrescreverão qualquer cor de mesmo nome coletada do metadata, se existirem
-    processed_colors["text_gray"] = processed_colors.get("text_gray", "333333")
-    processed_colors["DarkBlueHeading"] = processed_colors.get("DarkBlueHeading", "000080")
-    
-    processed_styles["colors"] = processed_colors
-
-    # Gerar definições de cores LaTeX para injeção no template de estilos
-    custom_color_definitions = []
-    for color_name, hex_value in processed_styles["colors"].items():
-        # Assegura que hex_value seja uma string e remova '#' se presente
-        final_hex = hex_value.replace("#", "") if isinstance(hex_value, str) else str(hex_value)
-        custom_color_definitions.append(f"\\definecolor{{{color_name}}}{{HTML}}{{{final_hex}}}")
-    processed_styles["custom_color_definitions"] = "\n".join(custom_color_definitions)
-    # --- FIM DA LÓGICA DE PROCESSAMENTO DE CORES ATUALIZADA ---
-
 
     livro_path = base_dir / "gerado_automaticamente" / idioma_normalizado_para_path / "livro_estruturado.json"
     if not livro_path.exists():
         print(f"❌ Arquivo livro_estruturado.json não encontrado: {livro_path.resolve()}")
-        return
+        return False
     livro_data = json.loads(livro_path.read_text(encoding="utf-8"))
 
     # Preparar dados de conteúdo para os templates
@@ -227,12 +216,47 @@ def gerar_latex(projeto: str, idioma_arg: str):
         "sections": [] # Esta lista será populada com os dados brutos das seções
     }
 
+    # Renderizador nativo para o Markdown simples; pandoc em paralelo só para o resto (ordem preservada)
+    itens = livro_data.get("conteudo", [])
+    indices_com_corpo = [i for i, item in enumerate(itens) if isinstance(item.get("corpo_do_texto"), list)]
+    jobs = jobs or min(8, os.cpu_count() or 1)
+    convertidos, via_pandoc = converter_blocos(
+        ["\n\n".join(itens[i]["corpo_do_texto"]) for i in indices_com_corpo],
+        [itens[i].get("titulo1") or itens[i].get("titulo_parte") or itens[i].get("titulo", "") for i in indices_com_corpo],
+        jobs,
+        cache_dir=base_dir / "cache" / "pandoc",
+        somente_pandoc=somente_pandoc,
+    )
+    latex_por_item = dict(zip(indices_com_corpo, convertidos))
+    print(f"    {len(convertidos) - via_pandoc} bloco(s) convertido(s) pelo renderizador nativo, "
+          f"{via_pandoc} pelo pandoc ({jobs} em paralelo).")
+
+    # Só regrava arquivos cujo conteúdo mudou (mtime preservado para o LaTeX e caches)
+    escritor = EscritorArtefatos()
+
+    # Imagens dos ODTs: \includegraphics{Pictures/x.png} aponta para a variante 'latex' do processar_assets.py,
+    # copiada para tex/images/ (o caminho é relativo ao diretório de compilação)
+    assets = carregar_assets(base_dir / "gerado_automaticamente" / idioma_normalizado_para_path / "manifesto.json") or {}
+
+    def reescrever_imagens(latex: str, chave_origem: str) -> str:
+        def _substituir(match):
+            resolvida = resolver_imagem(assets, chave_origem, match.group(2).strip(), "latex")
+            if resolvida is None:
+                return match.group(0)
+            sha, variante = resolvida
+            nome_imagem = f"images/{sha[:16]}{variante.suffix}"
+            escritor.escrever(latex_output_root_dir / nome_imagem, (base_dir / variante).read_bytes())
+            return f"{match.group(1)}{nome_imagem}{match.group(3)}"
+
+        return re.sub(r"(\\includegraphics\s*(?:\[[^\]]*\])?\s*\{)([^}]+)(\})", _substituir, latex)
+
     # Processar o conteúdo do livro para LaTeX e preparar para templates modulares
-    for item in livro_data.get("conteudo", []):
+    for indice_item, item in enumerate(itens):
         section_content_latex = []
-        if "corpo_do_texto" in item and isinstance(item["corpo_do_texto"], list):
-            full_markdown_block = "\n\n".join(item["corpo_do_texto"])
-            latex_converted_text = convert_markdown_to_latex(full_markdown_block)
+        if indice_item in latex_por_item:
+            pasta_origem = "partes" if item["tipo"] == "parte" else "capitulos"
+            latex_converted_text = reescrever_imagens(latex_por_item[indice_item],
+                                                      f"{pasta_origem}/{item.get('arquivo_origem', '')}")
             section_content_latex.append({
                 "type": "raw_latex",
                 "text": latex_converted_text
@@ -241,12 +265,14 @@ def gerar_latex(projeto: str, idioma_arg: str):
         if item["tipo"] == "parte":
             processed_content["sections"].append({
                 "type": "heading_part",
+                "id": item.get("id"),
                 "text": clean_title_for_output(item.get("titulo_parte", f"Parte {len(processed_content['sections']) + 1}")),
                 "content": section_content_latex
             })
         elif item["tipo"] == "capitulo":
             processed_content["sections"].append({
                 "type": "heading_1",
+                "id": item.get("id"),
                 "text": clean_title_for_output(item.get("titulo1", f"Capítulo {len(processed_content['sections']) + 1}")),
                 "content": section_content_latex
             })
@@ -269,80 +295,109 @@ def gerar_latex(projeto: str, idioma_arg: str):
         'content': processed_content, # Passa o content_data completo para todos os templates
         'styles': processed_styles,
         'custom_color_definitions': processed_styles["custom_color_definitions"],
+        'fontes': fontes_latex, # \setmainfont/\setsansfont já com os arquivos resolvidos
         'metadados': metadados_for_template, # AGORA 'metadados' ESTÁ NO CONTEXTO
-        'hoje': datetime.date.today().strftime("%d de %B de %Y"), # Garante que 'hoje' está no contexto
+        'hoje': data_de_build().strftime("%d de %B de %Y"), # Fixada por SOURCE_DATE_EPOCH em builds reprodutíveis
         'config': config_data # Opcional: passa o config_data completo também
     }
 
     # 1. Renderizar setup/packages.tex
     packages_template = env.get_template('setup/packages.tex.j2')
     packages_output = packages_template.render(base_context)
-    with open(latex_output_setup_dir / 'packages.tex', 'w', encoding='utf-8') as f:
-        f.write(packages_output)
-    print(f"✅ Gerado: {latex_output_setup_dir / 'packages.tex'}")
+    if escritor.escrever(latex_output_setup_dir / 'packages.tex', packages_output):
+        print(f"✅ Gerado: {latex_output_setup_dir / 'packages.tex'}")
 
     # 2. Renderizar setup/configurations.tex
     configurations_template = env.get_template('setup/configurations.tex.j2')
     configurations_output = configurations_template.render(base_context)
-    with open(latex_output_setup_dir / 'configurations.tex', 'w', encoding='utf-8') as f:
-        f.write(configurations_output)
-    print(f"✅ Gerado: {latex_output_setup_dir / 'configurations.tex'}")
+    if escritor.escrever(latex_output_setup_dir / 'configurations.tex', configurations_output):
+        print(f"✅ Gerado: {latex_output_setup_dir / 'configurations.tex'}")
 
     # 3. Renderizar setup/styles.tex
     styles_template = env.get_template('setup/styles.tex.j2')
     styles_output = styles_template.render(base_context)
-    with open(latex_output_setup_dir / 'styles.tex', 'w', encoding='utf-8') as f:
-        f.write(styles_output)
-    print(f"✅ Gerado: {latex_output_setup_dir / 'styles.tex'}")
+    if escritor.escrever(latex_output_setup_dir / 'styles.tex', styles_output):
+        print(f"✅ Gerado: {latex_output_setup_dir / 'styles.tex'}")
 
     # 4. Renderizar arquivos de seção individuais (content/*.tex)
     section_files_generated = [] # Lista para armazenar os nomes dos arquivos de seção gerados
     section_item_template = env.get_template('content/section_item.tex.j2')
 
     for i, section_data in enumerate(processed_content['sections']):
-        # Gera um nome de arquivo sanitizado baseado no tipo e título da seção
-        # Adiciona um índice para garantir unicidade
-        section_filename_base = f"{section_data['type']}_{sanitize_filename(section_data['text'])}"
-        section_filename = f"{section_filename_base}_{i+1}.tex"
+        if section_data.get("id"):
+            # Nome estável (mesmo id do EPUB): inserir uma seção não renomeia as seguintes
+            prefixo = "parte" if section_data["type"] == "heading_part" else "capitulo"
+            section_filename = f"{prefixo}-{section_data['id']}.tex"
+        else:
+            # livro_estruturado.json sem ids: nome sanitizado pelo título + índice para unicidade
+            section_filename_base = f"{section_data['type']}_{sanitize_filename(section_data['text'])}"
+            section_filename = f"{section_filename_base}_{i+1}.tex"
 
         # Renderiza o template de item de seção com os dados da seção atual
         section_output = section_item_template.render(section=section_data)
         section_filepath = latex_output_content_dir / section_filename
 
-        with open(section_filepath, 'w', encoding='utf-8') as f:
-            f.write(section_output)
+        if escritor.escrever(section_filepath, section_output):
+            print(f"✅ Gerado: {section_filepath}")
 
         section_files_generated.append(section_filename)
-        print(f"✅ Gerado: {section_filepath}")
 
     # Adicionar a lista de nomes de arquivos de seção gerados ao contexto para main_content.tex.j2
     base_context['section_files'] = section_files_generated
+    base_context['section_names'] = [Path(nome).stem for nome in section_files_generated]
+
+    # Unidades do \include (rascunhos com \includeonly em latex_para_pdf --capitulos): cada parte
+    # abre uma unidade com os capítulos seguintes, de modo que só há quebra de página antes das partes
+    unidades = []
+    for section_data, section_name in zip(processed_content['sections'], base_context['section_names']):
+        if section_data["type"] == "heading_part" or not unidades:
+            unidades.append({"nome": f"unidade-{section_name}", "secoes": []})
+        unidades[-1]["secoes"].append(section_name)
+    base_context['unidades'] = unidades
+
+    unidade_template = env.get_template('content/unidade.tex.j2')
+    for unidade in unidades:
+        escritor.escrever(latex_output_content_dir / f"{unidade['nome']}.tex", unidade_template.render(unidade=unidade))
+    # Unidades de builds anteriores (parte removida ou renomeada) confundiriam o mapeamento do rascunho
+    nomes_unidades = {f"{unidade['nome']}.tex" for unidade in unidades}
+    for antiga in latex_output_content_dir.glob("unidade-*.tex"):
+        if antiga.name not in nomes_unidades:
+            antiga.unlink()
 
     # 5. Renderizar content/main_content.tex
     main_content_template = env.get_template('content/main_content.tex.j2')
     main_content_output = main_content_template.render(base_context)
-    with open(latex_output_content_dir / 'main_content.tex', 'w', encoding='utf-8') as f:
-        f.write(main_content_output)
-    print(f"✅ Gerado: {latex_output_content_dir / 'main_content.tex'}")
+    if escritor.escrever(latex_output_content_dir / 'main_content.tex', main_content_output):
+        print(f"✅ Gerado: {latex_output_content_dir / 'main_content.tex'}")
 
     # 6. Renderizar o arquivo principal (main.tex)
     main_template = env.get_template('main.tex.j2')
     latex_output = main_template.render(base_context)
-    with open(output_main_tex_path, "w", encoding="utf-8") as f:
-        f.write(latex_output)
+    if escritor.escrever(output_main_tex_path, latex_output):
+        print(f"✅ Arquivo LaTeX principal gerado com sucesso em: {output_main_tex_path.resolve()}")
+    else:
+        print(f"➖ Arquivo LaTeX principal inalterado: {output_main_tex_path.resolve()}")
 
     end_time = time.time()
-    print(f"✅ Arquivo LaTeX principal gerado com sucesso em: {output_main_tex_path.resolve()}")
+    print(f"    Artefatos LaTeX: {escritor.resumo()}.")
     print(f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(end_time))}] ✅ Etapa 'Gerar LaTeX' concluída em {end_time - start_time:.2f} segundos.")
+    return True
 
 
 def main():
     parser = argparse.ArgumentParser(description="Gera a versão LaTeX de um projeto de livro.")
     parser.add_argument("--projeto", required=True, help="Nome do diretório do projeto (ex: liderando_transformacao)")
     parser.add_argument("--idioma", default="pt-BR", help="Idioma do livro (ex: pt-BR, en-US).")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Conversões pandoc simultâneas (padrão: número de CPUs, até 8)")
+    parser.add_argument("--somente-pandoc", action="store_true",
+                        help="Converte todas as seções com o pandoc (ignora o renderizador nativo)")
     args = parser.parse_args()
 
-    gerar_latex(args.projeto, args.idioma)
+    # Erro (fonte ausente, config/estilos inválidos...): sai com código 1 para o build_pipeline parar
+    # antes do latex_para_pdf, que reaproveitaria o PDF do .tex anterior
+    if not gerar_latex(args.projeto, args.idioma, args.jobs, args.somente_pandoc):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
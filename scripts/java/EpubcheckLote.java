@@ -0,0 +1,26 @@
+// scripts/java/EpubcheckLote.java
+//
+// Valida vários EPUBs em uma única JVM, chamando o EPUBCheck como biblioteca.
+// Uso (launcher de arquivo-fonte do Java 11+):
+//   java -cp bin/epubcheck-5.2.1/epubcheck.jar scripts/java/EpubcheckLote.java \
+//        livro1.epub relatorio1.json livro2.epub relatorio2.json ...
+//
+// Cada EPUB gera seu próprio relatório JSON (--json) e, ao final de cada livro, uma
+// linha marcadora no stdout para que o chamador separe a saída por livro.
+import com.adobe.epubcheck.tool.EpubChecker;
+
+public class EpubcheckLote {
+    public static void main(String[] args) {
+        for (int i = 0; i + 1 < args.length; i += 2) {
+            int codigo;
+            try {
+                codigo = new EpubChecker().run(new String[] {args[i], "--json", args[i + 1]});
+            } catch (RuntimeException e) {
+                System.out.println("Erro inesperado no EPUBCheck: " + e);
+                codigo = 2;
+            }
+            System.out.println("@@EPUBCHECK_FIM\t" + codigo + "\t" + args[i]);
+            System.out.flush();
+        }
+    }
+}
@@ -8,11 +8,27 @@ import time
 import shutil
 import traceback
 
-def compile_latex_to_pdf(projeto: str, idioma_arg: str, compiler: str):
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.build_reprodutivel import ambiente_reprodutivel
+from utils.compilacao_latex import (
+    configurar_includeonly, hashes_auxiliares, impressao_digital, impressao_registrada, log_pede_rerun,
+    preparar_formato_preambulo, registrar_impressao, secoes_do_rascunho
+)
+
+def compile_latex_to_pdf(projeto: str, idioma_arg: str, compiler: str, max_passos: int = 5, forcar: bool = False,
+                         formato_preambulo: bool = False, capitulos: list = None):
     """
     Compila o arquivo LaTeX gerado para um PDF usando o compilador especificado.
     O arquivo .tex é lido de 'gerado_automaticamente/<idioma>/tex/'
     e o PDF final é salvo em 'output/<idioma>/', com arquivos auxiliares na pasta .tex.
+
+    Roda passos até os auxiliares (.aux/.toc/.out) estabilizarem e o log não pedir rerun,
+    limitado a `max_passos`. Sem `forcar`, não compila se o .tex, seus \\input e as imagens
+    não mudaram desde o último PDF gerado com sucesso. Com `formato_preambulo`, os passos
+    partem de um formato pré-compilado do preâmbulo (cache/latex). Com `capitulos` (ids),
+    gera um PDF de rascunho só com as partes que contêm essas seções (\\includeonly), usando os
+    .aux do último build completo para numeração de páginas e referências das demais.
     """
     start_time = time.time()
     print(f"\n[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_time))}] ▶️ Iniciando compilação LaTeX para PDF...")
@@ -32,7 +48,7 @@ def compile_latex_to_pdf(projeto: str, idioma_arg: str, compiler: str):
     output_pdf_dir = base_dir / "output" / idioma_normalizado_para_path 
     
     output_tex_filename = "livro_completo_para_latex.tex" 
-    output_pdf_filename_final = "livro_completo_latex.pdf" 
+    output_pdf_filename_final = "livro_completo_latex_rascunho.pdf" if capitulos else "livro_completo_latex.pdf"
     output_pdf_filename_temp = "livro_completo_para_latex.pdf" 
 
     output_tex_path = latex_source_dir / output_tex_filename
@@ -50,19 +66,47 @@ def compile_latex_to_pdf(projeto: str, idioma_arg: str, compiler: str):
     output_pdf_dir.mkdir(parents=True, exist_ok=True)
     print(f"✅ Diretórios de trabalho confirmados/criados: {latex_source_dir.resolve()} e {output_pdf_dir.resolve()}")
 
+    # Rascunho: \includeonly com as seções pedidas; build completo: sem includeonly.tex
+    secoes = None
+    if capitulos:
+        try:
+            secoes = secoes_do_rascunho(latex_source_dir, capitulos)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        if not any((latex_source_dir / "content").glob("*.aux")):
+            print("⚠️ Nenhum build completo anterior: páginas e referências das seções omitidas ficarão indefinidas.")
+        print(f"📝 Rascunho com {len(secoes)} unidade(s): {', '.join(secoes)}")
+    configurar_includeonly(latex_source_dir, secoes)
+    tipo_build = "rascunho" if capitulos else "completo"
+
+    # Nada mudou desde o último PDF bem-sucedido: reaproveita o PDF final
+    impressao = impressao_digital(output_tex_path, {"compilador": compiler})
+    if not forcar and output_pdf_path_final.exists() and impressao_registrada(latex_source_dir, tipo_build) == impressao:
+        print(f"⏭️ Fontes LaTeX inalteradas desde o último PDF; compilação pulada ({output_pdf_path_final.name}).")
+        return True
+
     print(f"\n▶️ Iniciando compilação do PDF para o projeto '{projeto}' ({idioma_arg}) usando '{compiler}'...")
 
     try:
-        # 3. Executar o compilador LaTeX múltiplas vezes
-        num_compilations = 2 
+        # 3. Executar o compilador até convergir (auxiliares estáveis e nenhum pedido de rerun)
+        log_path = output_tex_path.with_suffix(".log")
+        hashes_anteriores = hashes_auxiliares(latex_source_dir)
+        ultimo_passo_ok = False
+        formato = None
+        if formato_preambulo:
+            formato = preparar_formato_preambulo(
+                compiler, output_tex_path, base_dir / "cache" / "latex", ambiente_reprodutivel()
+            )
 
-        for i in range(1, num_compilations + 1):
+        for i in range(1, max_passos + 1):
             compilation_start_time = time.time()
-            print(f"  Executando '{compiler}' (passo {i}/{num_compilations})...")
+            print(f"  Executando '{compiler}' (passo {i}, máximo {max_passos})...")
             
             command = [
                 compiler,
                 '-interaction=nonstopmode',
+                *([f'-fmt={formato}'] if formato else []),
                 str(output_tex_path.name) 
             ]
             
@@ -70,6 +114,7 @@ def compile_latex_to_pdf(projeto: str, idioma_arg: str, compiler: str):
             result = subprocess.run(
                 command,
                 cwd=latex_source_dir, 
+                env=ambiente_reprodutivel(), # Datas e /ID do PDF fixos quando SOURCE_DATE_EPOCH está definido
                 capture_output=True,
                 text=True
             )
@@ -84,6 +129,15 @@ def compile_latex_to_pdf(projeto: str, idioma_arg: str, compiler: str):
             else:
                 compilation_end_time = time.time()
                 print(f"  Compilação (passo {i}) concluída em {compilation_end_time - compilation_start_time:.2f} segundos.")
+            ultimo_passo_ok = result.returncode == 0
+
+            hashes_atuais = hashes_auxiliares(latex_source_dir)
+            if hashes_atuais == hashes_anteriores and not log_pede_rerun(log_path):
+                print(f"  ✅ Referências estáveis após {i} passo(s).")
+                break
+            hashes_anteriores = hashes_atuais
+        else:
+            print(f"  ⚠️ Limite de {max_passos} passos atingido sem estabilizar referências (verifique o .log).")
         
         print(f"\n--- Processamento Pós-compilação: Cópia e Verificação do PDF ---")
         # 4. Copiar o PDF gerado para o diretório final
@@ -104,6 +158,8 @@ def compile_latex_to_pdf(projeto: str, idioma_arg: str, compiler: str):
                 # VERIFICAÇÃO EXTRA: Confirmar que o arquivo realmente existe após a cópia
                 if output_pdf_path_final.exists():
                     print(f"✅ VERIFICADO: O arquivo '{output_pdf_path_final.name}' existe no destino final com tamanho {output_pdf_path_final.stat().st_size} bytes.")
+                    if ultimo_passo_ok:
+                        registrar_impressao(latex_source_dir, tipo_build, impressao)
                     return True
                 else:
                     print(f"❌ ERRO GRAVE: Apesar da cópia reportar sucesso, o arquivo '{output_pdf_path_final.name}' NÃO foi encontrado no destino final.")
@@ -144,9 +200,18 @@ def main():
     parser.add_argument("--compiler", default="xelatex", 
                         choices=['pdflatex', 'xelatex', 'lualatex'],
                         help="Compilador LaTeX a ser usado (pdflatex, xelatex, lualatex). Padrão: xelatex.")
+    parser.add_argument("--max-passos", type=int, default=5,
+                        help="Limite de passos do compilador enquanto as referências não estabilizam (padrão: 5)")
+    parser.add_argument("--forcar", action="store_true",
+                        help="Compila mesmo que as fontes LaTeX não tenham mudado desde o último PDF")
+    parser.add_argument("--formato-preambulo", action="store_true",
+                        help="Pré-compila o preâmbulo (mylatexformat) em um formato reaproveitado por todos os passos")
+    parser.add_argument("--capitulos", nargs="+", metavar="ID",
+                        help="Rascunho só com estas seções (ids de capítulo/parte), salvo como livro_completo_latex_rascunho.pdf")
     args = parser.parse_args()
 
-    success = compile_latex_to_pdf(args.projeto, args.idioma, args.compiler)
+    success = compile_latex_to_pdf(args.projeto, args.idioma, args.compiler, args.max_passos, args.forcar,
+                                   args.formato_preambulo, args.capitulos)
     if not success:
         sys.exit(1)
 
@@ -1,9 +1,17 @@
 # scripts/md_para_html.py
 
 import argparse
+import sys
 from pathlib import Path
 import markdown
-from jinja2 import Environment, FileSystemLoader
+
+script_dir = Path(__file__).resolve().parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from utils.indice_html import entrada_indice, salvar_indice
+from utils.escrita_artefatos import EscritorArtefatos
+from utils.jinja_env import criar_ambiente
 
 
 def extrair_titulo_do_md(md_path: Path) -> str:
@@ -13,7 +21,8 @@ def extrair_titulo_do_md(md_path: Path) -> str:
     return md_path.stem.replace("-", " ").title()
 
 
-def converter_md_para_html(md_path: Path, html_path: Path, lang: str, template_env, template_nome: str):
+def converter_md_para_html(md_path: Path, html_path: Path, lang: str, template_env, template_nome: str,
+                           escritor: EscritorArtefatos) -> dict:
     texto_md = md_path.read_text(encoding="utf-8")
     corpo_html = markdown.markdown(
         texto_md,
@@ -30,15 +39,21 @@ def converter_md_para_html(md_path: Path, html_path: Path, lang: str, template_e
         caminho_css="styles.css"
     )
 
-    html_path.write_text(html_renderizado, encoding="utf-8")
-    print(f"✅ Gerado: {html_path.resolve().relative_to(Path.cwd())}")
+    conteudo = html_renderizado.encode("utf-8")
+    if escritor.escrever(html_path, conteudo):
+        print(f"✅ Gerado: {html_path.resolve().relative_to(Path.cwd())}")
+    return entrada_indice(html_path, titulo, conteudo)
 
 
-def processar_diretorio(md_dir: Path, html_dir: Path, lang: str, template_env, template_nome: str):
+def processar_diretorio(md_dir: Path, html_dir: Path, lang: str, template_env, template_nome: str,
+                        escritor: EscritorArtefatos):
     html_dir.mkdir(parents=True, exist_ok=True)
+    entradas = []
     for md_file in md_dir.glob("*.md"):
         html_file = html_dir / (md_file.stem + ".html")
-        converter_md_para_html(md_file, html_file, lang, template_env, template_nome)
+        entradas.append(converter_md_para_html(md_file, html_file, lang, template_env, template_nome, escritor))
+    # Índice compacto (id, título, arquivo, tamanho, hash) consumido pelo gerar_epub
+    salvar_indice(html_dir, entradas, escritor)
 
 
 def main():
@@ -52,9 +67,10 @@ def main():
     html_base = raiz / "gerado_automaticamente" / args.idioma / "html"
 
     template_dir = raiz / "templates"
-    env = Environment(loader=FileSystemLoader(str(template_dir)))
+    env = criar_ambiente(template_dir, cache_dir=raiz / "cache" / "jinja", precompilar=(".html.j2",))
 
     print(f"🟢 Convertendo arquivos Markdown para HTML: {args.projeto}/{args.idioma}")
+    escritor = EscritorArtefatos()
 
     # Capítulos
     processar_diretorio(
@@ -62,7 +78,8 @@ def main():
         html_dir=html_base / "capitulos",
         lang=args.idioma.replace("_", "-"),
         template_env=env,
-        template_nome="base_capitulo.html.j2"
+        template_nome="base_capitulo.html.j2",
+        escritor=escritor
     )
 
     # Partes
@@ -71,10 +88,11 @@ def main():
         html_dir=html_base / "partes",
         lang=args.idioma.replace("_", "-"),
         template_env=env,
-        template_nome="base_parte.html.j2"
+        template_nome="base_parte.html.j2",
+        escritor=escritor
     )
 
-    print("🏁 Conversão finalizada.")
+    print(f"🏁 Conversão finalizada ({escritor.resumo()}).")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,58 @@
+# scripts/otimizar_pdf.py
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.otimizacao_pdf import backend_disponivel, otimizar_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pós-processa os PDFs de output/ e output/<idioma>/ para distribuição web: linearização, "
+                    "object streams, recompressão e deduplicação de imagens/fontes (com pikepdf)."
+    )
+    parser.add_argument("--projeto", required=True, help="Nome do projeto")
+    parser.add_argument("--idioma", required=True, help="Idioma do conteúdo")
+    parser.add_argument("--forcar", action="store_true", help="Otimiza de novo mesmo com resultado em cache")
+    args = parser.parse_args()
+
+    base_dir = Path("projetos") / args.projeto
+    output_dir = base_dir / "output" / args.idioma
+    # PDFs do LaTeX ficam em output/<idioma>/; o do LibreOffice (consolidar_e_exportar_odt_pdf) em output/
+    pdfs = sorted(output_dir.glob("*.pdf")) + sorted((base_dir / "output").glob("*.pdf"))
+    if not pdfs:
+        print(f"ℹ️ Nenhum PDF em {output_dir} ou {output_dir.parent}; nada a otimizar.")
+        return
+
+    backend = backend_disponivel()
+    if backend is None:
+        # Etapa opcional: sem ferramenta local os PDFs seguem como gerados
+        print("⚠️ Nem pikepdf nem qpdf encontrados; PDFs mantidos sem otimização (pip install pikepdf ou instale o qpdf).")
+        return
+    print(f"🔧 Otimizando {len(pdfs)} PDF(s) com {backend[0]} {backend[1]}")
+
+    cache_dir = base_dir / "cache" / "pdf"
+    falhou = False
+    for pdf_path in pdfs:
+        tamanho_antes = pdf_path.stat().st_size
+        try:
+            status = otimizar_pdf(pdf_path, cache_dir, backend, args.forcar)
+        except Exception as e:
+            print(f"❌ Falha ao otimizar {pdf_path.name}: {e}")
+            falhou = True
+            continue
+        if status == "inalterado":
+            print(f"⏭️ {pdf_path.name} já otimizado.")
+            continue
+        tamanho_depois = pdf_path.stat().st_size
+        origem = " (cache)" if status == "cache" else ""
+        print(f"✅ {pdf_path.name}: {tamanho_antes / 1024:.0f} KB → {tamanho_depois / 1024:.0f} KB, linearizado{origem}.")
+
+    if falhou:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
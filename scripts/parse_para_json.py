@@ -11,6 +11,8 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 # Importa as funções de ordenação E as funções de limpeza do novo módulo cleaner
 from utils.ordenador import gerar_ordem
 from utils.cleaner import clean_title_for_output, clean_content_text
+from utils.identificadores import identificador_de_origem, verificar_ids_unicos
+from utils.escrita_artefatos import EscritorArtefatos
 
 
 # A função processar_arquivo_md agora aceitará 'tipos_simples_config' como argumento
@@ -57,15 +59,19 @@ def processar_arquivo_md(caminho_md: Path, tipos_simples_config: set = None, tip
 
 
 # A função processar_diretorio agora aceitará 'tipos_simples_config' como argumento
-def processar_diretorio(origem: Path, destino: Path, tipos_simples_config: set, tipo: str = None) -> list[dict]:
+def processar_diretorio(origem: Path, destino: Path, tipos_simples_config: set, tipo: str = None,
+                        ids_config: dict = None, escritor: EscritorArtefatos = None) -> list[dict]:
     if not origem.exists():
         print(f"⚠️ Diretório não encontrado: {origem}")
         return []
 
     destino.mkdir(parents=True, exist_ok=True)
+    escritor = escritor or EscritorArtefatos()
     resultados = []
 
     for caminho_md in sorted(origem.glob("*.md")):
+        # Fora do try: um id declarado inválido interrompe o parse (ValueError) em vez de descartar o capítulo
+        id_origem = identificador_de_origem(caminho_md.stem, ids_config)
         try:
             tipo_dinamico = tipo
             if tipo == "componente":
@@ -73,13 +79,15 @@ def processar_diretorio(origem: Path, destino: Path, tipos_simples_config: set,
 
             # Passa a lista de tipos simples para a função processar_arquivo_md
             estrutura = processar_arquivo_md(caminho_md, tipos_simples_config=tipos_simples_config, tipo_forcado=tipo_dinamico)
+            # Identidade estável (nome de origem ou id declarado): base dos nomes de todos os artefatos
+            estrutura["arquivo_origem"] = caminho_md.stem
+            estrutura["id"] = id_origem
             resultados.append(estrutura)
 
             nome_json = caminho_md.stem + ".json"
             caminho_json = destino / nome_json
 
-            with caminho_json.open("w", encoding="utf-8") as f:
-                json.dump(estrutura, f, ensure_ascii=False, indent=2)
+            escritor.escrever(caminho_json, json.dumps(estrutura, ensure_ascii=False, indent=2))
 
             print(
                 f"✅ {tipo_dinamico.capitalize()}: "
@@ -117,9 +125,18 @@ def main() -> None:
     tipos_simples_do_config = set(config.get("tipos_simples", [])) 
     
     # Passa a lista de tipos simples para as funções processar_diretorio
-    componentes = processar_diretorio(origem_md / "componentes", destino_json / "componentes", tipos_simples_do_config, tipo="componente")
-    partes = processar_diretorio(origem_md / "partes", destino_json / "partes", tipos_simples_do_config, tipo="parte")
-    capitulos = processar_diretorio(origem_md / "capitulos", destino_json / "capitulos", tipos_simples_do_config, tipo="capitulo")
+    ids_do_config = config.get("ids", {})
+    escritor = EscritorArtefatos()
+    try:
+        componentes = processar_diretorio(origem_md / "componentes", destino_json / "componentes", tipos_simples_do_config, tipo="componente", ids_config=ids_do_config, escritor=escritor)
+        partes = processar_diretorio(origem_md / "partes", destino_json / "partes", tipos_simples_do_config, tipo="parte", ids_config=ids_do_config, escritor=escritor)
+        capitulos = processar_diretorio(origem_md / "capitulos", destino_json / "capitulos", tipos_simples_do_config, tipo="capitulo", ids_config=ids_do_config, escritor=escritor)
+
+        for grupo in (componentes, partes, capitulos):
+            verificar_ids_unicos((bloco["id"], bloco["arquivo_origem"]) for bloco in grupo)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
 
     # Consolidar e ordenar
     todos_blocos_disponiveis = componentes + partes + capitulos
@@ -188,13 +205,10 @@ def main() -> None:
     }
 
     caminho_consolidado = raiz / "gerado_automaticamente" / args.idioma / "livro_estruturado.json"
-    caminho_consolidado.write_text(
-        json.dumps(json_consolidado, indent=2, ensure_ascii=False),
-        encoding="utf-8"
-    )
+    escritor.escrever(caminho_consolidado, json.dumps(json_consolidado, indent=2, ensure_ascii=False))
 
     print(f"\n📘 JSON consolidado salvo em: {caminho_consolidado.relative_to(Path.cwd())}")
-    print("\n✅ Parsing finalizado.\n")
+    print(f"\n✅ Parsing finalizado ({escritor.resumo()}).\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+# scripts/processar_assets.py
+import argparse
+import json
+import sys
+from pathlib import Path
+
+script_dir = Path(__file__).resolve().parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from utils.assets import PARAMETROS_PADRAO, armazenar_original, extrair_midias_odt, gerar_variante, media_type
+
+ALVOS = ("epub", "latex", "fodt")
+
+
+def processar_assets(raiz_projeto: Path, idioma: str):
+    manifesto_path = raiz_projeto / "gerado_automaticamente" / idioma / "manifesto.json"
+    if not manifesto_path.exists():
+        print(f"❌ Manifesto não encontrado: {manifesto_path}. Rode gerar_manifesto.py antes.")
+        sys.exit(1)
+
+    config_path = raiz_projeto / "config.json"
+    config = json.loads(config_path.read_text(encoding="utf-8")) if config_path.exists() else {}
+    parametros = {alvo: {**PARAMETROS_PADRAO.get(alvo, {}), **config.get("assets", {}).get(alvo, {})} for alvo in ALVOS}
+
+    manifesto = json.loads(manifesto_path.read_text(encoding="utf-8"))
+    cache_dir = raiz_projeto / "cache" / "assets"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    imagens = {}       # sha256 → {original, media_type, variantes}
+    referencias = {}   # "capitulos/<stem>" → {caminho no ODT: sha256}
+
+    def registrar(dados: bytes, extensao: str) -> str:
+        sha, original = armazenar_original(dados, extensao, cache_dir)
+        if sha not in imagens:
+            imagens[sha] = {
+                "original": original.relative_to(raiz_projeto).as_posix(),
+                "media_type": media_type(original),
+                "variantes": {
+                    alvo: gerar_variante(original, sha, alvo, parametros[alvo], cache_dir).relative_to(raiz_projeto).as_posix()
+                    for alvo in ALVOS
+                },
+            }
+        return sha
+
+    # 1. Imagens embutidas nos ODTs (deduplicadas por conteúdo entre capítulos)
+    base_input = raiz_projeto / "input" / idioma
+    for pasta in ("capitulos", "partes"):
+        for odt in sorted((base_input / pasta).glob("*.odt")):
+            midias = extrair_midias_odt(odt)
+            if midias:
+                referencias[f"{pasta}/{odt.stem}"] = {
+                    nome: registrar(dados, Path(nome).suffix) for nome, dados in sorted(midias.items())
+                }
+
+    # 2. Capa (capa.json tem prioridade sobre o caminho padrão do manifesto)
+    capa_sha = None
+    capa_json = base_input / "capa.json"
+    if capa_json.exists():
+        capa_path = base_input / json.loads(capa_json.read_text(encoding="utf-8")).get("capa_epub", "images/cover.jpg")
+    else:
+        capa_path = raiz_projeto / manifesto.get("capa_epub", str(Path("input") / idioma / "images" / "cover.jpg"))
+    if capa_path.exists():
+        capa_sha = registrar(capa_path.read_bytes(), capa_path.suffix)
+    else:
+        print(f"⚠️ Capa não encontrada: {capa_path}. O EPUB será gerado sem capa.")
+
+    manifesto["assets"] = {
+        "capa": capa_sha,
+        "imagens": imagens,
+        "referencias": referencias,
+    }
+    manifesto_path.write_text(json.dumps(manifesto, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    total_refs = sum(len(r) for r in referencias.values())
+    print(f"🖼️ {len(imagens)} imagem(ns) única(s) ({total_refs} referência(s) nos ODTs) em {cache_dir}")
+    print(f"✅ Assets registrados no manifesto: {manifesto_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrair, deduplicar e gerar variantes das imagens do livro")
+    parser.add_argument("--projeto", required=True, help="Nome do projeto")
+    parser.add_argument("--idioma", default="pt_br", help="Idioma do conteúdo")
+    args = parser.parse_args()
+
+    raiz_projeto = project_root / "projetos" / args.projeto
+    processar_assets(raiz_projeto, args.idioma)
+
+
+if __name__ == "__main__":
+    main()
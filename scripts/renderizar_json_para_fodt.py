@@ -1,112 +1,129 @@
 import argparse
+import base64
 import json
+import re
+import sys
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
-
-
-def carregar_estilos(projeto_dir: Path) -> dict:
-    """Carrega os estilos personalizados do projeto"""
-    arquivo_estilos = projeto_dir / "estilos.json"
-    if arquivo_estilos.exists():
-        with arquivo_estilos.open("r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
-
-
-def gerar_secao_estilos_xml(estilos: dict) -> str:
-    """Gera a seção completa de estilos XML para o documento FODT"""
-    xml_estilos = []
-    
-    for chave_estilo, config in estilos.items():
-        odt_config = config.get("odt", {})
-        nome_estilo = odt_config.get("nome_estilo", chave_estilo)
-        fonte = odt_config.get("fonte", "Liberation Serif")
-        tamanho = odt_config.get("tamanho", "12pt")
-        cor = odt_config.get("cor", "#000000")
-        
-        # Propriedades adicionais opcionais
-        negrito = 'fo:font-weight="bold"' if odt_config.get("negrito", False) else ''
-        italico = 'fo:font-style="italic"' if odt_config.get("italico", False) else ''
-        sublinhado = 'style:text-underline-style="solid"' if odt_config.get("sublinhado", False) else ''
-        
-        # Alinhamento
-        alinhamento = odt_config.get("alinhamento", "left")
-        align_attr = f'fo:text-align="{alinhamento}"' if alinhamento != "left" else ''
-        
-        # Espaçamento
-        margem_top = odt_config.get("margem_superior", "0pt")
-        margem_bottom = odt_config.get("margem_inferior", "0pt")
-        
-        estilo_xml = f'''
-    <style:style style:name="{nome_estilo}" style:family="paragraph">
-        <style:paragraph-properties 
-            fo:margin-top="{margem_top}"
-            fo:margin-bottom="{margem_bottom}"
-            {align_attr}/>
-        <style:text-properties 
-            style:font-name="{fonte}" 
-            fo:font-size="{tamanho}"
-            fo:color="{cor}"
-            {negrito}
-            {italico}
-            {sublinhado}/>
-    </style:style>'''
-        
-        xml_estilos.append(estilo_xml)
-    
-    return "\n".join(xml_estilos)
-
-
-def processar_conteudo_com_estilos(conteudo: str, estilos: dict) -> str:
-    """Processa o conteúdo aplicando estilos baseados em marcadores"""
-    if not conteudo:
-        return ""
-    
-    linhas = conteudo.split('\n')
-    resultado = []
-    
-    for linha in linhas:
-        linha_processada = linha.strip()
-        if not linha_processada:
-            continue
-            
-        # Identifica o tipo de conteúdo e aplica o estilo correspondente
-        if linha_processada.startswith('# '):
-            # Título nível 1
-            texto = linha_processada[2:].strip()
-            estilo = estilos.get('TITULO1', {}).get('odt', {}).get('nome_estilo', 'Título Principal')
-            resultado.append(f'<text:h text:style-name="{estilo}" text:outline-level="1">{texto}</text:h>')
-            
-        elif linha_processada.startswith('## '):
-            # Título nível 2
-            texto = linha_processada[3:].strip()
-            estilo = estilos.get('TITULO2', {}).get('odt', {}).get('nome_estilo', 'Subtítulo')
-            resultado.append(f'<text:h text:style-name="{estilo}" text:outline-level="2">{texto}</text:h>')
-            
-        elif linha_processada.startswith('### '):
-            # Título nível 3
-            texto = linha_processada[4:].strip()
-            estilo = estilos.get('TITULO3', {}).get('odt', {}).get('nome_estilo', 'Título Nível 3')
-            resultado.append(f'<text:h text:style-name="{estilo}" text:outline-level="3">{texto}</text:h>')
-            
-        elif linha_processada.startswith('**') and linha_processada.endswith('**'):
-            # Texto em negrito
-            texto = linha_processada[2:-2].strip()
-            estilo = estilos.get('DESTAQUE', {}).get('odt', {}).get('nome_estilo', 'Texto Destaque')
-            resultado.append(f'<text:p text:style-name="{estilo}">{texto}</text:p>')
-            
-        elif linha_processada.startswith('> '):
-            # Citação
-            texto = linha_processada[2:].strip()
-            estilo = estilos.get('CITACAO', {}).get('odt', {}).get('nome_estilo', 'Citação')
-            resultado.append(f'<text:p text:style-name="{estilo}">{texto}</text:p>')
-            
+from typing import Iterable
+from xml.sax.saxutils import escape, quoteattr
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.assets import carregar_assets, dimensoes_px, resolver_imagem
+from utils.escrita_artefatos import EscritorArtefatos
+from utils.jinja_env import criar_ambiente
+from utils.modelo_estilos import ModeloEstilos, carregar_modelo_estilos
+
+
+# Papel → (elemento, nível de título, estilo ODT usado quando o papel não está mapeado)
+_ELEMENTOS_POR_PAPEL = {
+    "TITULO1": ("text:h", 1, "Título Principal"),
+    "TITULO2": ("text:h", 2, "Subtítulo"),
+    "TITULO3": ("text:h", 3, "Título Nível 3"),
+    "DESTAQUE": ("text:p", None, "Texto Destaque"),
+    "CITACAO": ("text:p", None, "Citação"),
+    "CORPO_DO_TEXTO": ("text:p", None, "Texto Corpo"),
+}
+# Um único match separa o marcador do início da linha; o marcador indexa o papel
+_CLASSIFICADOR_LINHA = re.compile(r"(#{1,3} |> )?(.*)", re.DOTALL)
+_PAPEL_POR_MARCADOR = {"# ": "TITULO1", "## ": "TITULO2", "### ": "TITULO3", "> ": "CITACAO"}
+# Linha só com uma imagem, como o pandoc escreve a partir do ODT: ![alt](Pictures/x.png){width="5in" height="3in"}
+_LINHA_IMAGEM = re.compile(r'!\[(?P<alt>[^\]]*)\]\((?P<caminho>[^)\s]+)\)(?:\{(?P<atributos>[^}]*)\})?')
+_DIMENSAO_MARKDOWN = re.compile(r'(width|height)="?([\d.]+)(in|cm|mm|pt|px)"?')
+_LARGURA_MAXIMA_CM = 16.0
+
+
+class RenderizadorConteudoODT:
+    """
+    Converte linhas com marcadores Markdown simples (#, ##, ###, >, **...**) em parágrafos ODT.
+
+    A tabela papel → tags de abertura/fechamento é resolvida uma vez por build; cada linha
+    passa por um único match de regex e o texto é escapado para XML.
+    """
+
+    def __init__(self, papeis: dict, assets: dict = None, raiz_projeto: Path = None):
+        self.assets = assets or {}
+        self.raiz_projeto = raiz_projeto
+        self.imagens_renderizadas = 0
+        self.tags = {}
+        for papel, (elemento, nivel, estilo_padrao) in _ELEMENTOS_POR_PAPEL.items():
+            estilo = quoteattr(papeis.get(papel, estilo_padrao))
+            nivel_attr = f' text:outline-level="{nivel}"' if nivel else ""
+            self.tags[papel] = (f"<{elemento} text:style-name={estilo}{nivel_attr}>", f"</{elemento}>")
+
+    def _dimensoes_cm(self, atributos: str, variante: Path) -> tuple:
+        """Tamanho do quadro: atributos do Markdown, senão pixels da imagem a 96 dpi (largura limitada)."""
+        por_unidade = {"in": 2.54, "cm": 1.0, "mm": 0.1, "pt": 2.54 / 72, "px": 2.54 / 96}
+        dimensoes = {nome: float(valor) * por_unidade[unidade]
+                     for nome, valor, unidade in _DIMENSAO_MARKDOWN.findall(atributos or "")}
+        if "width" not in dimensoes:
+            pixels = dimensoes_px(self.raiz_projeto / variante)
+            if pixels:
+                dimensoes = {"width": pixels[0] * 2.54 / 96, "height": pixels[1] * 2.54 / 96}
+        if dimensoes.get("width", 0) > _LARGURA_MAXIMA_CM:
+            escala = _LARGURA_MAXIMA_CM / dimensoes["width"]
+            dimensoes = {nome: valor * escala for nome, valor in dimensoes.items()}
+        return dimensoes.get("width"), dimensoes.get("height")
+
+    def _renderizar_imagem(self, imagem: re.Match, chave_origem: str) -> str:
+        """Parágrafo com a variante 'fodt' da imagem embutida em base64 (o FODT não tem pacote)."""
+        resolvida = resolver_imagem(self.assets, chave_origem, imagem.group("caminho"), "fodt") if chave_origem else None
+        if resolvida is None or self.raiz_projeto is None:
+            return None
+        sha, variante = resolvida
+        largura, altura = self._dimensoes_cm(imagem.group("atributos"), variante)
+        if largura and altura:
+            tamanho = f' svg:width="{largura:.3f}cm" svg:height="{altura:.3f}cm"'
         else:
-            # Parágrafo normal
-            estilo = estilos.get('CORPO_DO_TEXTO', {}).get('odt', {}).get('nome_estilo', 'Texto Corpo')
-            resultado.append(f'<text:p text:style-name="{estilo}">{linha_processada}</text:p>')
-    
-    return '\n'.join(resultado)
+            tamanho = f' svg:width="{largura or 12:.3f}cm" style:rel-height="scale"'
+        self.imagens_renderizadas += 1
+        dados = base64.b64encode((self.raiz_projeto / variante).read_bytes()).decode("ascii")
+        abertura, fechamento = self.tags["CORPO_DO_TEXTO"]
+        return (
+            f'{abertura}<draw:frame draw:name="Imagem_{sha[:12]}_{self.imagens_renderizadas}" '
+            f'text:anchor-type="as-char"{tamanho}>'
+            f'<draw:image><office:binary-data>{dados}</office:binary-data></draw:image>'
+            f'<svg:desc>{escape(imagem.group("alt"))}</svg:desc></draw:frame>{fechamento}'
+        )
+
+    def renderizar_linhas(self, linhas: Iterable[str], chave_origem: str = None) -> str:
+        partes = []
+        for linha in linhas:
+            linha = linha.strip()
+            if not linha:
+                continue
+            imagem = _LINHA_IMAGEM.fullmatch(linha) if linha.startswith("![") else None
+            paragrafo_imagem = self._renderizar_imagem(imagem, chave_origem) if imagem else None
+            if paragrafo_imagem:
+                partes.append(paragrafo_imagem)
+                partes.append("\n")
+                continue
+            marcador, texto = _CLASSIFICADOR_LINHA.match(linha).groups()
+            if marcador:
+                papel = _PAPEL_POR_MARCADOR[marcador]
+            elif len(texto) >= 4 and texto.startswith("**") and texto.endswith("**"):
+                papel, texto = "DESTAQUE", texto[2:-2]
+            else:
+                papel = "CORPO_DO_TEXTO"
+            abertura, fechamento = self.tags[papel]
+            partes.append(abertura)
+            partes.append(escape(texto.strip()))
+            partes.append(fechamento)
+            partes.append("\n")
+        return "".join(partes[:-1])
+
+    def renderizar_bloco(self, bloco: dict, chave_origem: str = None) -> str:
+        """
+        Texto livre em 'conteudo' ou, nos JSONs do parse, os campos estruturados do capítulo.
+        `chave_origem` (ex: 'capitulos/1.2 Prologo') liga as imagens às registradas no manifesto.
+        """
+        if "conteudo" in bloco:
+            return self.renderizar_linhas(bloco["conteudo"].split("\n"), chave_origem)
+        linhas = [bloco[campo] for campo in ("titulo1", "titulo2") if bloco.get(campo)]
+        corpo = bloco.get("corpo_do_texto") or []
+        linhas.extend(corpo.split("\n") if isinstance(corpo, str) else corpo)
+        return self.renderizar_linhas(linhas, chave_origem)
 
 
 def carregar_jsons(origem: Path) -> list:
@@ -121,30 +138,38 @@ def carregar_jsons(origem: Path) -> list:
 
 
 def renderizar_para_fodt(blocos: list, template_dir: Path, template_nome: str, 
-                        destino: Path, estilos: dict):
-    env = Environment(loader=FileSystemLoader(template_dir))
+                        destino: Path, modelo: ModeloEstilos, escritor: EscritorArtefatos = None,
+                        assets: dict = None):
+    escritor = escritor or EscritorArtefatos()
+    # Mesmo ambiente para capítulos e partes; bytecode persistido no cache do projeto
+    # autoescape: títulos e parágrafos inseridos direto no template (ex: parte.fodt.j2) saem como XML válido
+    env = criar_ambiente(template_dir, cache_dir=template_dir.parent / "cache" / "jinja", precompilar=(".fodt.j2",),
+                         autoescape=True)
     template = env.get_template(template_nome)
 
     destino.mkdir(parents=True, exist_ok=True)
 
-    # Gera a seção de estilos XML uma única vez
-    xml_estilos = gerar_secao_estilos_xml(estilos)
+    # Seção de estilos XML já gerada pelo modelo compilado
+    xml_estilos = modelo.xml_odt
+    renderizador = RenderizadorConteudoODT(modelo.papeis_odt, assets, raiz_projeto=template_dir.parent)
 
     for bloco in blocos:
-        # Processa o conteúdo aplicando estilos dinamicamente
-        if "conteudo" in bloco:
-            bloco["conteudo_formatado"] = processar_conteudo_com_estilos(bloco["conteudo"], estilos)
+        # Conteúdo com os estilos ODT dos papéis (texto escapado para XML); imagens pela variante 'fodt'
+        chave_origem = f"{destino.name}/{bloco['_nome_arquivo']}"
+        bloco["conteudo_formatado"] = renderizador.renderizar_bloco(bloco, chave_origem)
         
         # Adiciona contexto para o template
         bloco["xml_estilos"] = xml_estilos
-        bloco["estilos_config"] = estilos
+        bloco["estilos_config"] = modelo.estilos_odt
         
         # Renderiza o template
         conteudo = template.render(**bloco)
         nome_arquivo = bloco["_nome_arquivo"] + ".fodt"
         caminho_saida = destino / nome_arquivo
-        caminho_saida.write_text(conteudo, encoding="utf-8")
-        print(f"📄 Gerado: {nome_arquivo}")
+        if escritor.escrever(caminho_saida, conteudo):
+            print(f"📄 Gerado: {nome_arquivo}")
+        else:
+            print(f"➖ Inalterado: {nome_arquivo}")
 
 
 def main():
@@ -156,28 +181,37 @@ def main():
     base = Path(__file__).resolve().parents[1]
     raiz = base / "projetos" / args.projeto
 
-    # Carrega os estilos personalizados
-    estilos = carregar_estilos(raiz)
+    # Mesmo modelo de estilos do EPUB e do LaTeX (estilos/estilo_livro.json, compilado e em cache)
+    try:
+        modelo = carregar_modelo_estilos(raiz)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
     
     json_dir = raiz / "gerado_automaticamente" / args.idioma / "json"
     output_dir = raiz / "gerado_automaticamente" / args.idioma / "fodt"
     templates_dir = raiz / "templates"
 
     print(f"\n🛠️  Gerando .fodt para projeto '{args.projeto}' ({args.idioma})")
-    print(f"📎 Estilos carregados: {len(estilos)} estilos personalizados")
+    print(f"📎 Estilos carregados: {len(modelo.estilos_odt)} estilos personalizados")
     
-    if estilos:
-        print("🎨 Estilos disponíveis:")
-        for chave, config in estilos.items():
-            nome = config.get("odt", {}).get("nome_estilo", chave)
-            print(f"   • {chave} → {nome}")
+    if modelo.papeis_odt:
+        print("🎨 Papéis mapeados:")
+        for papel, nome in modelo.papeis_odt.items():
+            print(f"   • {papel} → {nome}")
+
+    # Imagens registradas pelo processar_assets.py (variante 'fodt'), se ele rodou
+    assets = carregar_assets(raiz / "gerado_automaticamente" / args.idioma / "manifesto.json") or {}
 
+    escritor = EscritorArtefatos()
     renderizar_para_fodt(
         carregar_jsons(json_dir / "capitulos"),
         templates_dir,
         template_nome="capitulo.fodt.j2",
         destino=output_dir / "capitulos",
-        estilos=estilos
+        modelo=modelo,
+        escritor=escritor,
+        assets=assets
     )
 
     renderizar_para_fodt(
@@ -185,10 +219,12 @@ def main():
         templates_dir,
         template_nome="parte.fodt.j2",
         destino=output_dir / "partes",
-        estilos=estilos
+        modelo=modelo,
+        escritor=escritor,
+        assets=assets
     )
 
-    print("\n✅ Arquivos .fodt gerados com estilos dinâmicos aplicados.\n")
+    print(f"\n✅ Arquivos .fodt gerados com estilos dinâmicos aplicados ({escritor.resumo()}).\n")
 
 
 if __name__ == "__main__":
@@ -1,21 +1,60 @@
 # scripts/validar_epub.py
 import argparse
-import subprocess
+import sys
 from pathlib import Path
 import os # Import the os module
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.validador_epub import validar_estrutura_epub
+from utils.epubcheck import (
+    carregar_cache, chave_cache, executar_epubcheck, salvar_cache, versao_epubcheck
+)
+
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--projeto", required=True)
-    parser.add_argument("--idioma", required=True)
+    parser.add_argument("--projeto", help="Projeto a validar (obrigatório sem --lote)")
+    parser.add_argument("--idioma", help="Idioma a validar (obrigatório sem --lote)")
+    parser.add_argument("--completo", action="store_true",
+                        help="Executa também o epubcheck (JVM). Recomendado para builds de release.")
+    parser.add_argument("--lote", action="store_true",
+                        help="Valida todos os EPUBs de projetos/*/output/*/ em uma única JVM")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Ignora resultados do epubcheck já armazenados em cache")
     args = parser.parse_args()
 
-    epub_path = Path("projetos") / args.projeto / "output" / args.idioma / "livro_completo.epub"
+    if args.lote:
+        epubs = sorted(Path("projetos").glob("*/output/*/livro_completo.epub"))
+        if not epubs:
+            print("❌ Nenhum EPUB encontrado em projetos/*/output/*/")
+            exit(1)
+    else:
+        if not args.projeto or not args.idioma:
+            parser.error("--projeto e --idioma são obrigatórios sem --lote")
+        epub_path = Path("projetos") / args.projeto / "output" / args.idioma / "livro_completo.epub"
+        if not epub_path.exists():
+            print(f"❌ Arquivo EPUB não encontrado: {epub_path}")
+            exit(1)
+        epubs = [epub_path]
 
-    if not epub_path.exists():
-        print(f"❌ Arquivo EPUB não encontrado: {epub_path}")
-        exit(1)
+    # Pré-checagem estrutural em Python: falha rápido antes de pagar a inicialização da JVM
+    falhou = False
+    epubs_estruturados = []
+    for epub_path in epubs:
+        erros_estrutura = validar_estrutura_epub(epub_path)
+        if erros_estrutura:
+            falhou = True
+            print(f"❌ Erros estruturais em {epub_path} ({len(erros_estrutura)}):")
+            for erro in erros_estrutura:
+                print(f"   • {erro}")
+        else:
+            print(f"✅ Estrutura do EPUB válida: {epub_path}")
+            epubs_estruturados.append(epub_path)
+
+    if not args.completo:
+        print("ℹ️ epubcheck não executado (use --completo para a validação completa).")
+        exit(1 if falhou else 0)
 
     # --- Start of modifications ---
     # Get the absolute path to the pipeline's root directory
@@ -28,18 +67,47 @@ def main():
         print("Certifique-se de que o epubcheck está na pasta 'epubcheck-5.2.1' na raiz do projeto.")
         exit(1)
 
-    print(f"📘 Validando EPUB com epubcheck: {epub_path}")
-    # Call Java directly with the full path to the epubcheck.jar
-    command = ["java", "-jar", str(epubcheck_jar_path), str(epub_path)]
-    result = subprocess.run(command, capture_output=True, text=True)
+    # Resultados do epubcheck são reaproveitados quando o EPUB (hash) e a versão do epubcheck não mudaram
+    cache_path = pipeline_root / "cache" / "epubcheck.json"
+    cache = {} if args.sem_cache else carregar_cache(cache_path)
+    versao = versao_epubcheck(epubcheck_jar_path)
+
+    chaves = {epub_path: chave_cache(epub_path, versao) for epub_path in epubs_estruturados}
+    pendentes = [epub_path for epub_path, chave in chaves.items() if chave not in cache]
+    if len(pendentes) < len(chaves):
+        print(f"♻️ {len(chaves) - len(pendentes)} EPUB(s) já validados com epubcheck {versao} (cache).")
+
+    if pendentes:
+        print(f"📘 Validando {len(pendentes)} EPUB(s) com epubcheck {versao} (uma única JVM)...")
+        try:
+            novos = executar_epubcheck(pendentes, epubcheck_jar_path)
+        except FileNotFoundError:
+            print("❌ Comando 'java' não encontrado. Instale um JRE para executar o epubcheck.")
+            exit(1)
+        for epub_path, resultado in novos.items():
+            if not resultado.pop("falha_execucao", False):
+                cache[chaves[epub_path]] = resultado
+            else:
+                print(f"⚠️ epubcheck não concluiu a validação de {epub_path}.")
+                cache.pop(chaves[epub_path], None)
+                chaves[epub_path] = None
+                falhou = True
+                print(resultado["relatorio"])
+        salvar_cache(cache_path, cache)
     # --- End of modifications ---
 
-    if result.returncode == 0:
-        print("✅ EPUB válido!")
-    else:
-        print("❌ Erros encontrados pelo epubcheck:")
-        print(result.stdout)
-        print(result.stderr)
+    for epub_path, chave in chaves.items():
+        if chave is None:
+            continue
+        resultado = cache[chave]
+        if resultado["valido"]:
+            print(f"✅ EPUB válido! {epub_path}")
+        else:
+            falhou = True
+            print(f"❌ Erros encontrados pelo epubcheck em {epub_path}:")
+            print(resultado["relatorio"])
+
+    if falhou:
         exit(1)
 
 
@@ -2,9 +2,14 @@
 import argparse
 import json
 import re
+import sys
 from pathlib import Path
 from typing import Dict, List
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.modelo_estilos import carregar_modelo_estilos
+
 
 def carregar_tags_disponiveis(path: Path) -> List[str]:
     if not path.exists():
@@ -48,6 +53,14 @@ def main():
     tags_path = raiz / "gerado_automaticamente" / "tags_disponiveis.json"
     md_dir = raiz / "input" / args.idioma / "capitulos"
 
+    # Compila (e valida) o modelo de estilos uma vez; as etapas seguintes leem o resultado do cache
+    try:
+        modelo = carregar_modelo_estilos(raiz)
+        print(f"\n🎨 Modelo de estilos compilado: {modelo.sha256[:16]} ({len(modelo.estilos_odt)} estilos)")
+    except ValueError as e:
+        print(f"\n❌ {e}\n")
+        exit(1)
+
     try:
         tags_validas = carregar_tags_disponiveis(tags_path)
     except FileNotFoundError as e:
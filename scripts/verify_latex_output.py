@@ -2,8 +2,14 @@
 import json
 from pathlib import Path
 import argparse
-import datetime
 import re
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.build_reprodutivel import data_de_build
+from utils.modelo_estilos import carregar_modelo_estilos
+from utils.fontes_latex import carregar_fontes_resolvidas, comando_fontspec
 
 def verify_latex_output(project_name: str, lang: str):
     base_path = Path("projetos") / project_name
@@ -19,15 +25,20 @@ def verify_latex_output(project_name: str, lang: str):
     if not styles_file_path.exists():
         print(f"❌ Erro: Arquivo de estilos '{styles_file_path}' não encontrado. Caminho esperado: {styles_file_path}.")
         return False
-    styles_data = json.loads(styles_file_path.read_text(encoding="utf-8"))
+    # Valores esperados vêm do mesmo modelo compilado usado pelo gerar_latex
+    try:
+        modelo = carregar_modelo_estilos(base_path)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
 
     # Metadados são lidos diretamente do config.json, não de um arquivo separado
     expected_title = config.get("titulos", {}).get("TITULO_PRINCIPAL", "Livro Digital")
     expected_author = config.get("autor", "Autor Desconhecido")
     data_publicacao_from_config = config.get("data_publicacao", "")
 
-    # Simula a data atual no formato usado na geração, se data_publicacao não for especificada
-    today_formatted = datetime.date.today().strftime("%d de %B de %Y")
+    # Simula a data de build no formato usado na geração, se data_publicacao não for especificada
+    today_formatted = data_de_build().strftime("%d de %B de %Y")
     expected_date_for_comparison = data_publicacao_from_config if data_publicacao_from_config else today_formatted
 
     # --- Carrega o Conteúdo do Arquivo .tex Gerado ---
@@ -76,109 +87,25 @@ def verify_latex_output(project_name: str, lang: str):
         print("❌ Comando \\maketitle NÃO encontrado. A página de título pode não ser gerada.")
         overall_status = False
 
-    # --- VERIFICAÇÃO DE CORES ---
-    print("\n--- Verificando Cores Personalizadas ---")
-    custom_colors_found = False
-    if "colors" in styles_data and styles_data["colors"]:
-        for name, hex_code in styles_data["colors"].items():
-            expected_latex_color = f"\\definecolor{{{name}}}{{HTML}}{{{hex_code.replace('#', '')}}}"
-            if expected_latex_color in generated_tex_content:
-                print(f"✅ Cor '{name}' encontrada: {expected_latex_color}")
-                custom_colors_found = True
-            else:
-                print(f"❌ Cor '{name}' NÃO encontrada como esperado: {expected_latex_color}")
-                overall_status = False
-        if custom_colors_found:
-            print("✅ Pelo menos uma cor personalizada do styles.json foi encontrada.")
-        else:
-            print("❌ Nenhuma cor personalizada do styles.json foi encontrada. Verificando fallbacks...")
-    else:
-        print("ℹ️ Nenhuma seção 'colors' ou seção 'colors' vazia no styles.json. Verificando cores padrão.")
-
-    # Verifica cores padrão, se não houver personalizadas ou se as personalizadas falharam
-    default_colors = {
-        "text_gray": "333333",
-        "DarkBlueHeading": "000080"
-    }
-    all_defaults_found = True
-    for name, hex_code in default_colors.items():
-        expected_latex_default_color = f"\\definecolor{{{name}}}{{HTML}}{{{hex_code}}}"
-        if expected_latex_default_color in generated_tex_content:
-            print(f"✅ Cor padrão '{name}' encontrada: {expected_latex_default_color}")
+    # --- VERIFICAÇÃO DE ESTILOS (cores, fontes, parágrafos, títulos H1) ---
+    print("\n--- Verificando Estilos do Preâmbulo ---")
+    # Os estilos ficam em setup/*.tex, incluídos no arquivo principal via \input
+    preambulo = generated_tex_content + "".join(
+        arquivo.read_text(encoding="utf-8") for arquivo in sorted((generated_tex_path.parent / "setup").glob("*.tex"))
+    )
+    preambulo_compacto = re.sub(r"\s+", "", preambulo)
+    # Fontes resolvidas no preflight aparecem como arquivo + Path= em vez do nome da família
+    fontes_resolvidas = carregar_fontes_resolvidas(base_path / "cache" / "latex")
+    for descricao, fragmento in modelo.fragmentos_latex:
+        alternativas = [fragmento]
+        fonte = re.fullmatch(r"\\(setmainfont|setsansfont)\{(.+)\}", fragmento)
+        if fonte and fonte.group(2).strip() in fontes_resolvidas:
+            alternativas.append(comando_fontspec(fonte.group(1), fonte.group(2), fontes_resolvidas[fonte.group(2).strip()]))
+        if any(re.sub(r"\s+", "", alternativa) in preambulo_compacto for alternativa in alternativas):
+            print(f"✅ {descricao} encontrado: {fragmento}")
         else:
-            print(f"❌ Cor padrão '{name}' NÃO encontrada: {expected_latex_default_color}")
-            all_defaults_found = False
-            # overall_status = False # Não setar false aqui se o esperado era personalizar
-
-    # --- VERIFICAÇÃO DE FONTES ---
-    print("\n--- Verificando Fontes ---")
-    expected_main_font = styles_data.get("paragraph_default", {}).get("font-family", "Latin Modern Roman")
-    main_font_match = re.search(r"\\setmainfont(?:\[.*?\])?\{(.*?)\}", generated_tex_content)
-    if main_font_match and main_font_match.group(1).strip() == expected_main_font.strip():
-        print(f"✅ Fonte principal encontrada e corresponde: '{main_font_match.group(1)}'")
-    else:
-        print(f"❌ Fonte principal NÃO corresponde ou não encontrada. Esperado: '{expected_main_font}', Encontrado: '{main_font_match.group(1) if main_font_match else 'NÃO ENCONTRADO'}'")
-        overall_status = False
-
-    expected_sans_font = styles_data.get("heading_1", {}).get("font-family", "Latin Modern Sans")
-    sans_font_match = re.search(r"\\setsansfont(?:\[.*?\])?\{(.*?)\}", generated_tex_content)
-    if sans_font_match and sans_font_match.group(1).strip() == expected_sans_font.strip():
-        print(f"✅ Fonte sans-serif encontrada e corresponde: '{sans_font_match.group(1)}'")
-    else:
-        print(f"❌ Fonte sans-serif NÃO corresponde ou não encontrada. Esperado: '{expected_sans_font}', Encontrado: '{sans_font_match.group(1) if sans_font_match else 'NÃO ENCONTRADO'}'")
-        overall_status = False
-
-    # --- VERIFICAÇÃO DE CONFIGURAÇÕES DE PARÁGRAFO ---
-    print("\n--- Verificando Configurações de Parágrafo ---")
-    paragraph_default = styles_data.get("paragraph_default", {})
-
-    expected_parindent = paragraph_default.get("text-indent", paragraph_default.get("text_indent", "0.5cm"))
-    parindent_match = re.search(r"\\setlength\{\\parindent\}\{(" + re.escape(expected_parindent.replace(" ", r"\s*")) + r")\}", generated_tex_content)
-    if parindent_match:
-        print(f"✅ Parágrafo indentação encontrada: '{parindent_match.group(1)}'")
-    else:
-        print(f"❌ Parágrafo indentação NÃO encontrada como esperado: '{expected_parindent}'")
-        overall_status = False
-
-    expected_parskip = paragraph_default.get("margin-bottom", paragraph_default.get("margin_bottom", "0.2cm"))
-    parskip_match = re.search(r"\\setlength\{\\parskip\}\{(" + re.escape(expected_parskip.replace(" ", r"\s*")) + r")\}", generated_tex_content)
-    if parskip_match:
-        print(f"✅ Parágrafo skip encontrada: '{parskip_match.group(1)}'")
-    else:
-        print(f"❌ Parágrafo skip NÃO encontrada como esperado: '{expected_parskip}'")
-        overall_status = False
-
-    # Verifica o comando \paragraphbreak
-    paragraphbreak_match = re.search(r"\\DeclareRobustCommand\{\\paragraphbreak\}\{\\vspace\{(" + re.escape(expected_parskip.replace(" ", r"\s*")) + r")\}\\noindent\}", generated_tex_content)
-    if paragraphbreak_match:
-        print(f"✅ Comando \\paragraphbreak encontrado com valor: '{paragraphbreak_match.group(1)}'")
-    else:
-        print(f"❌ Comando \\paragraphbreak NÃO encontrado ou com valor incorreto. Esperado valor de '{expected_parskip}'")
-        overall_status = False
-
-    # --- VERIFICAÇÃO DE CONFIGURAÇÕES DE TÍTULOS H1 ---
-    print("\n--- Verificando Configurações de Títulos H1 (Section) ---")
-    heading_1 = styles_data.get("heading_1", {})
-
-    expected_h1_font_size = heading_1.get("font-size", "24pt")
-    expected_h1_line_spacing = heading_1.get("line-spacing", "28.8pt")
-
-    fontsize_match = re.search(r"\\fontsize\{(" + re.escape(expected_h1_font_size.replace(" ", r"\s*")) + r")\}\{(" + re.escape(expected_h1_line_spacing.replace(" ", r"\s*")) + r")\}\\selectfont", generated_tex_content)
-    if fontsize_match:
-        print(f"✅ Tamanho da fonte H1 encontrado: '{fontsize_match.group(1)}', Espaçamento da linha H1: '{fontsize_match.group(2)}'")
-    else:
-        print(f"❌ Tamanho da fonte H1 ou Espaçamento da linha H1 NÃO encontrados como esperado. Esperado: '{expected_h1_font_size}', '{expected_h1_line_spacing}'")
-        overall_status = False
-
-    expected_h1_margin_top = heading_1.get("margin-top", "1.0cm")
-    expected_h1_margin_bottom = heading_1.get("margin-bottom", "0.5cm")
-
-    titlespacing_match = re.search(r"\\titlespacing\*\{\\section\}\{0pt\}\{(" + re.escape(expected_h1_margin_top.replace(" ", r"\s*")) + r")\}\{(" + re.escape(expected_h1_margin_bottom.replace(" ", r"\s*")) + r")\}", generated_tex_content)
-    if titlespacing_match:
-        print(f"✅ Margens do título H1 encontradas: Top '{titlespacing_match.group(1)}', Bottom '{titlespacing_match.group(2)}'")
-    else:
-        print(f"❌ Margens do título H1 NÃO encontradas como esperado. Esperado: Top '{expected_h1_margin_top}', Bottom '{expected_h1_margin_bottom}'")
-        overall_status = False
+            print(f"❌ {descricao} NÃO encontrado como esperado: {fragmento}")
+            overall_status = False
 
     print("\n--- FIM DA VERIFICAÇÃO ---")
     if overall_status:
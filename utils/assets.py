@@ -0,0 +1,157 @@
+# utils/assets.py
+import hashlib
+import io
+import json
+import shutil
+import zipfile
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow é opcional: sem ele as variantes são cópias do original
+    Image = None
+
+MEDIA_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".svg": "image/svg+xml",
+    ".webp": "image/webp",
+}
+# Formatos que o xelatex inclui diretamente via \includegraphics
+_FORMATOS_LATEX = {".jpg", ".jpeg", ".png", ".pdf"}
+
+# Parâmetros padrão de cada variante (podem ser sobrescritos em config.json → "assets")
+PARAMETROS_PADRAO = {
+    "epub": {"max_px": 1600, "qualidade_jpeg": 85},
+    "latex": {"dpi": 300},
+}
+
+
+def hash_conteudo(dados: bytes) -> str:
+    return hashlib.sha256(dados).hexdigest()
+
+
+def media_type(caminho: Path) -> str:
+    return MEDIA_TYPES.get(caminho.suffix.lower(), "application/octet-stream")
+
+
+def extrair_midias_odt(caminho_odt: Path) -> Dict[str, bytes]:
+    """Retorna {caminho interno (ex: 'Pictures/100000.png'): bytes} das imagens embutidas no ODT."""
+    with zipfile.ZipFile(caminho_odt) as pacote:
+        return {
+            nome: pacote.read(nome)
+            for nome in pacote.namelist()
+            if nome.startswith(("Pictures/", "media/")) and not nome.endswith("/")
+        }
+
+
+def _chave_parametros(alvo: str, parametros: dict) -> str:
+    """Hash curto de (alvo, parâmetros, disponibilidade do Pillow) para nomear a variante no cache."""
+    descricao = json.dumps({"alvo": alvo, "parametros": parametros, "pillow": Image is not None}, sort_keys=True)
+    return hashlib.sha256(descricao.encode("utf-8")).hexdigest()[:12]
+
+
+def _redimensionar_epub(imagem, extensao: str, parametros: dict):
+    """Reduz para o lado maior <= max_px; JPEG continua JPEG, demais formatos viram PNG (com alfa)."""
+    imagem.thumbnail((parametros["max_px"], parametros["max_px"]))
+    saida = io.BytesIO()
+    if extensao in (".jpg", ".jpeg"):
+        imagem.convert("RGB").save(saida, "JPEG", quality=parametros["qualidade_jpeg"], optimize=True, progressive=True)
+        return saida.getvalue(), ".jpg"
+    imagem.save(saida, "PNG", optimize=True)
+    return saida.getvalue(), ".png"
+
+
+def _converter_latex(imagem, extensao: str, parametros: dict):
+    """Mantém a resolução original (impressão); converte para PNG só o que o xelatex não lê."""
+    saida = io.BytesIO()
+    dpi = (parametros["dpi"], parametros["dpi"])
+    if extensao in (".jpg", ".jpeg"):
+        imagem.convert("RGB").save(saida, "JPEG", quality=95, dpi=dpi)
+        return saida.getvalue(), ".jpg"
+    imagem.save(saida, "PNG", dpi=dpi)
+    return saida.getvalue(), ".png"
+
+
+def gerar_variante(original: Path, sha: str, alvo: str, parametros: dict, cache_dir: Path) -> Path:
+    """
+    Gera (ou reaproveita do cache) a variante `alvo` ('epub', 'latex' ou 'fodt') da imagem.
+
+    O nome no cache é derivado do hash do conteúdo original e dos parâmetros, de modo que
+    a mesma imagem só é processada de novo se ela ou os parâmetros mudarem.
+    """
+    extensao = original.suffix.lower()
+    if alvo == "fodt":
+        return original  # O FODT embute o original sem alterações
+
+    chave = _chave_parametros(alvo, parametros)
+    existentes = sorted(cache_dir.glob(f"{sha}_{alvo}_{chave}.*"))
+    if existentes:
+        return existentes[0]
+
+    dados, extensao_saida = None, extensao
+    if Image is not None and extensao not in (".svg", ".pdf"):
+        if alvo == "latex" and extensao in _FORMATOS_LATEX:
+            pass  # Já está em formato e resolução adequados para impressão
+        else:
+            try:
+                with Image.open(original) as imagem:
+                    imagem.load()
+                    if alvo == "epub":
+                        dados, extensao_saida = _redimensionar_epub(imagem, extensao, parametros)
+                    else:
+                        dados, extensao_saida = _converter_latex(imagem, extensao, parametros)
+            except OSError as e:
+                print(f"⚠️ Não foi possível processar {original.name} para '{alvo}': {e}. Usando o original.")
+
+    destino = cache_dir / f"{sha}_{alvo}_{chave}{extensao_saida}"
+    if dados is None:
+        if alvo == "latex" and extensao not in _FORMATOS_LATEX:
+            print(f"⚠️ {original.name}: formato {extensao} não suportado pelo xelatex e Pillow indisponível.")
+        shutil.copyfile(original, destino)
+    else:
+        destino.write_bytes(dados)
+    return destino
+
+
+def armazenar_original(dados: bytes, extensao: str, cache_dir: Path) -> tuple:
+    """Grava o original no cache endereçado por conteúdo. Retorna (sha256, caminho)."""
+    sha = hash_conteudo(dados)
+    destino = cache_dir / f"{sha}{extensao.lower()}"
+    if not destino.exists():
+        destino.write_bytes(dados)
+    return sha, destino
+
+
+def carregar_assets(manifesto_path: Path) -> Optional[dict]:
+    """Lê a seção 'assets' do manifesto (None se o estágio de assets não rodou)."""
+    if not manifesto_path.exists():
+        return None
+    return json.loads(manifesto_path.read_text(encoding="utf-8")).get("assets")
+
+
+def resolver_imagem(assets: dict, chave_origem: str, caminho_odt: str, alvo: str) -> Optional[tuple]:
+    """
+    (sha256, variante `alvo` relativa à raiz do projeto) da imagem que o capítulo/parte
+    `chave_origem` (ex: 'capitulos/1.2 Prologo') referencia como `caminho_odt` (ex: 'Pictures/x.png').
+    None se a imagem não foi registrada pelo processar_assets.py.
+    """
+    sha = assets.get("referencias", {}).get(chave_origem, {}).get(caminho_odt)
+    imagem = assets.get("imagens", {}).get(sha)
+    if imagem is None:
+        return None
+    return sha, Path(imagem["variantes"][alvo])
+
+
+def dimensoes_px(caminho: Path) -> Optional[tuple]:
+    """(largura, altura) em pixels, ou None sem Pillow / para formatos vetoriais."""
+    if Image is None or caminho.suffix.lower() in (".svg", ".pdf"):
+        return None
+    try:
+        with Image.open(caminho) as imagem:
+            return imagem.size
+    except OSError:
+        return None
@@ -0,0 +1,84 @@
+# utils/build_reprodutivel.py
+import os
+import time
+import zipfile
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+# Menor data representável no formato ZIP (1980-01-01 00:00:00 UTC)
+_EPOCH_MINIMO_ZIP = 315532800
+
+
+def obter_source_date_epoch() -> Optional[int]:
+    """
+    Retorna o valor de SOURCE_DATE_EPOCH (segundos desde 1970, UTC) ou None se não definido.
+    Quando definido, a pipeline opera em modo reprodutível.
+    """
+    valor = os.environ.get("SOURCE_DATE_EPOCH", "").strip()
+    if not valor:
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        print(f"⚠️ SOURCE_DATE_EPOCH inválido ('{valor}'). Ignorando modo reprodutível.")
+        return None
+
+
+def modo_reprodutivel() -> bool:
+    return obter_source_date_epoch() is not None
+
+
+def data_de_build() -> date:
+    """Data 'de hoje' para a build: fixada por SOURCE_DATE_EPOCH ou a data atual."""
+    epoch = obter_source_date_epoch()
+    if epoch is None:
+        return date.today()
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).date()
+
+
+def _data_hora_zip() -> tuple:
+    epoch = obter_source_date_epoch()
+    if epoch is None:
+        return time.localtime()[:6]
+    epoch = max(epoch, _EPOCH_MINIMO_ZIP)
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).timetuple()[:6]
+
+
+def escrever_zip_reprodutivel(destino: Path, arquivos: Dict[str, Union[str, bytes]],
+                              primeiro: Optional[str] = None) -> None:
+    """
+    Escreve um pacote ZIP com data, permissões e ordem dos membros fixas.
+
+    `primeiro` (ex: 'mimetype' em EPUB/ODT) é gravado no início e sem compressão;
+    os demais membros são gravados em ordem alfabética com DEFLATE.
+    """
+    data_hora = _data_hora_zip()
+    nomes = sorted(nome for nome in arquivos if nome != primeiro)
+    if primeiro is not None and primeiro in arquivos:
+        nomes.insert(0, primeiro)
+
+    with zipfile.ZipFile(destino, "w") as pacote:
+        for nome in nomes:
+            dados = arquivos[nome]
+            if isinstance(dados, str):
+                dados = dados.encode("utf-8")
+            info = zipfile.ZipInfo(nome, date_time=data_hora)
+            info.external_attr = 0o644 << 16
+            info.create_system = 3  # Unix, independente da máquina de build
+            if nome == primeiro:
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+            pacote.writestr(info, dados)
+
+
+def ambiente_reprodutivel() -> dict:
+    """
+    Variáveis de ambiente para subprocessos (ex: xelatex) respeitarem SOURCE_DATE_EPOCH
+    nas datas e no /ID do PDF.
+    """
+    ambiente = dict(os.environ)
+    if modo_reprodutivel():
+        ambiente["FORCE_SOURCE_DATE"] = "1"
+    return ambiente
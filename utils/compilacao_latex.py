@@ -0,0 +1,190 @@
+# utils/compilacao_latex.py
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Arquivos auxiliares cujo conteúdo define se outro passo do compilador é necessário
+EXTENSOES_AUXILIARES = (".aux", ".toc", ".out")
+# Mensagens do LaTeX e de pacotes (rerunfilecheck, hyperref, longtable...) pedindo outro passo
+_PADRAO_RERUN = re.compile(
+    r"Rerun to get|Label\(s\) may have changed|Please rerun LaTeX|Rerun LaTeX|"
+    r"Table widths have changed|\(rerunfilecheck\)\s+Rerun"
+)
+_PADRAO_DEPENDENCIA = re.compile(
+    r"\\(input|include|includegraphics|InputIfFileExists)\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}"
+)
+_EXTENSOES_IMAGEM = (".pdf", ".png", ".jpg", ".jpeg", ".eps")
+NOME_IMPRESSAO = ".impressao_pdf.json"
+
+
+def hashes_auxiliares(diretorio: Path) -> Dict[str, str]:
+    """sha256 de cada .aux/.toc/.out do diretório (inclui os .aux de subpastas, gerados por \\include)."""
+    hashes = {}
+    for extensao in EXTENSOES_AUXILIARES:
+        for arquivo in sorted(diretorio.rglob(f"*{extensao}")):
+            hashes[str(arquivo.relative_to(diretorio))] = hashlib.sha256(arquivo.read_bytes()).hexdigest()
+    return hashes
+
+
+def log_pede_rerun(log_path: Path) -> bool:
+    if not log_path.exists():
+        return True
+    return bool(_PADRAO_RERUN.search(log_path.read_text(encoding="utf-8", errors="replace")))
+
+
+def _resolver_dependencia(diretorio: Path, comando: str, nome: str) -> Optional[Path]:
+    candidato = diretorio / nome
+    if comando == "includegraphics":
+        opcoes = [candidato] if candidato.suffix else [candidato.with_suffix(ext) for ext in _EXTENSOES_IMAGEM]
+    else:
+        opcoes = [candidato] if candidato.suffix else [candidato.with_suffix(".tex")]
+    return next((opcao for opcao in opcoes if opcao.is_file()), None)
+
+
+def dependencias_tex(tex_principal: Path) -> List[Path]:
+    """O .tex principal e tudo o que ele carrega via \\input, \\include, \\InputIfFileExists e \\includegraphics."""
+    diretorio = tex_principal.parent
+    vistos: List[Path] = []
+    pendentes = [tex_principal]
+    while pendentes:
+        atual = pendentes.pop()
+        if atual in vistos:
+            continue
+        vistos.append(atual)
+        if atual.suffix != ".tex":
+            continue
+        texto = re.sub(r"(?<!\\)%.*", "", atual.read_text(encoding="utf-8", errors="replace"))
+        for comando, nome in _PADRAO_DEPENDENCIA.findall(texto):
+            dependencia = _resolver_dependencia(diretorio, comando, nome.strip())
+            if dependencia is not None:
+                pendentes.append(dependencia)
+    return sorted(vistos)
+
+
+def impressao_digital(tex_principal: Path, extras: Dict[str, str] = None) -> str:
+    """Hash do conteúdo de todas as dependências do documento (e de `extras`, ex: compilador)."""
+    sha = hashlib.sha256()
+    for arquivo in dependencias_tex(tex_principal):
+        sha.update(str(arquivo.relative_to(tex_principal.parent)).encode("utf-8") + b"\0")
+        sha.update(hashlib.sha256(arquivo.read_bytes()).digest())
+    sha.update(json.dumps(extras or {}, sort_keys=True).encode("utf-8"))
+    return sha.hexdigest()
+
+
+def impressao_registrada(diretorio: Path, chave: str) -> Optional[str]:
+    arquivo = diretorio / NOME_IMPRESSAO
+    if not arquivo.exists():
+        return None
+    return json.loads(arquivo.read_text(encoding="utf-8")).get(chave)
+
+
+def registrar_impressao(diretorio: Path, chave: str, impressao: str) -> None:
+    """Guarda a impressão digital do último PDF compilado com sucesso (por chave: PDF completo, rascunho...)."""
+    arquivo = diretorio / NOME_IMPRESSAO
+    registros = json.loads(arquivo.read_text(encoding="utf-8")) if arquivo.exists() else {}
+    registros[chave] = impressao
+    arquivo.write_text(json.dumps(registros, indent=2, sort_keys=True), encoding="utf-8")
+
+
+# Fim da parte do preâmbulo gravada no formato (mylatexformat); no-op (\relax) em compilações normais.
+# Fontes do fontspec não podem ser gravadas em formatos do XeTeX: styles.tex fica depois do marcador.
+MARCADOR_FIM_DO_DUMP = r"\csname endofdump\endcsname"
+NOME_FORMATO = "preambulo"
+_COMPILADORES_COM_FORMATO = {"pdflatex", "xelatex"}
+
+
+def versao_compilador(compilador: str) -> str:
+    resultado = subprocess.run([compilador, "--version"], capture_output=True, text=True, check=True)
+    return resultado.stdout.splitlines()[0].strip()
+
+
+def preparar_formato_preambulo(compilador: str, tex_principal: Path, cache_dir: Path,
+                               ambiente: Optional[dict] = None) -> Optional[str]:
+    """
+    Grava (mylatexformat) o preâmbulo do documento até o MARCADOR_FIM_DO_DUMP em um formato
+    reaproveitado por todos os passos. O formato fica em cache por hash do preâmbulo, dos
+    arquivos de setup/ e da versão do compilador. Retorna o nome para '-fmt=' ou None se
+    não for possível usar um formato (o chamador compila normalmente).
+    """
+    if compilador not in _COMPILADORES_COM_FORMATO:
+        print(f"⚠️ Formato de preâmbulo não suportado para '{compilador}'; compilando sem formato.")
+        return None
+    texto = tex_principal.read_text(encoding="utf-8")
+    if MARCADOR_FIM_DO_DUMP not in texto:
+        print(f"⚠️ {tex_principal.name} não contém '{MARCADOR_FIM_DO_DUMP}'; compilando sem formato.")
+        return None
+
+    diretorio = tex_principal.parent
+    sha = hashlib.sha256(versao_compilador(compilador).encode("utf-8"))
+    sha.update(texto[:texto.index(MARCADOR_FIM_DO_DUMP)].encode("utf-8"))
+    for arquivo in sorted((diretorio / "setup").glob("*.tex")):
+        sha.update(arquivo.name.encode("utf-8") + b"\0" + arquivo.read_bytes())
+    chave = sha.hexdigest()[:16]
+    formato_cache = cache_dir / f"{NOME_FORMATO}_{chave}.fmt"
+
+    if not formato_cache.exists():
+        print(f"  Gerando formato do preâmbulo ({compilador}, {chave})...")
+        jobname = f"{NOME_FORMATO}_{chave}"
+        resultado = subprocess.run(
+            [compilador, "-ini", "-interaction=nonstopmode", f"-jobname={jobname}",
+             f"&{compilador}", "mylatexformat.ltx", tex_principal.name],
+            cwd=diretorio, env=ambiente, capture_output=True, text=True
+        )
+        gerado = diretorio / f"{jobname}.fmt"
+        if resultado.returncode != 0 or not gerado.exists():
+            print(f"⚠️ Falha ao gerar o formato do preâmbulo (veja {jobname}.log); compilando sem formato.")
+            return None
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        os.replace(gerado, formato_cache)
+
+    # O compilador procura o formato no diretório de trabalho
+    destino = diretorio / f"{NOME_FORMATO}.fmt"
+    origem = formato_cache.stat()
+    if not destino.exists() or (destino.stat().st_size, destino.stat().st_mtime_ns) != (origem.st_size, origem.st_mtime_ns):
+        shutil.copy2(formato_cache, destino)
+    return NOME_FORMATO
+
+
+NOME_INCLUDEONLY = "includeonly.tex"
+
+
+_PADRAO_SECAO_DA_UNIDADE = re.compile(r"\\input\{content/([^}]+)\}")
+
+
+def secoes_do_rascunho(tex_dir: Path, ids: List[str]) -> List[str]:
+    """
+    Ids de capítulos/partes (os mesmos dos nomes content/capitulo-<id>.tex e content/parte-<id>.tex)
+    → unidades para \\includeonly (content/unidade-*.tex, cada uma com uma parte e seus capítulos).
+    Levanta ValueError para ids sem arquivo de seção.
+    """
+    unidade_da_secao = {}
+    for unidade in sorted((tex_dir / "content").glob("unidade-*.tex")):
+        for secao in _PADRAO_SECAO_DA_UNIDADE.findall(unidade.read_text(encoding="utf-8")):
+            unidade_da_secao[secao] = f"content/{unidade.stem}"
+    secoes, desconhecidos = [], []
+    for id_ in ids:
+        candidatos = [nome for nome in (f"capitulo-{id_}", f"parte-{id_}", id_) if nome in unidade_da_secao]
+        if not candidatos:
+            desconhecidos.append(id_)
+        elif unidade_da_secao[candidatos[0]] not in secoes:
+            secoes.append(unidade_da_secao[candidatos[0]])
+    if desconhecidos:
+        ids_validos = sorted(nome.split("-", 1)[1] if "-" in nome else nome for nome in unidade_da_secao)
+        raise ValueError(f"Seções não encontradas: {', '.join(desconhecidos)}. Ids disponíveis: {', '.join(ids_validos)}")
+    return secoes
+
+
+def configurar_includeonly(tex_dir: Path, secoes: Optional[List[str]]) -> None:
+    """Escreve includeonly.tex (carregado pelo main.tex via \\InputIfFileExists) ou o remove no build completo."""
+    caminho = tex_dir / NOME_INCLUDEONLY
+    if not secoes:
+        caminho.unlink(missing_ok=True)
+        return
+    conteudo = "\\includeonly{" + ",".join(secoes) + "}\n"
+    if not caminho.exists() or caminho.read_text(encoding="utf-8") != conteudo:
+        caminho.write_text(conteudo, encoding="utf-8")
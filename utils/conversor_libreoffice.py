@@ -0,0 +1,151 @@
+# utils/conversor_libreoffice.py
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:
+    uno = None
+
+from utils.rede import porta_livre
+
+# Conexão UNO do soffice iniciado pelo build_pipeline (ausente: cada etapa inicia o seu ou usa o CLI)
+VARIAVEL_SERVIDOR_LIBREOFFICE = "LIBREOFFICE_UNO_CONEXAO"
+# Extensão de saída → filtro de exportação do Writer
+FILTROS_WRITER = {
+    "odt": "writer8",
+    "pdf": "writer_pdf_Export",
+}
+
+
+def executavel_libreoffice() -> Optional[str]:
+    return shutil.which("soffice") or shutil.which("libreoffice")
+
+
+def _propriedades(**valores) -> tuple:
+    propriedades = []
+    for nome, valor in valores.items():
+        propriedade = PropertyValue()
+        propriedade.Name, propriedade.Value = nome, valor
+        propriedades.append(propriedade)
+    return tuple(propriedades)
+
+
+def _conectar(conexao: str):
+    """Desktop do soffice que escuta em `conexao` (ex: 'socket,host=127.0.0.1,port=2002')."""
+    contexto_local = uno.getComponentContext()
+    resolvedor = contexto_local.ServiceManager.createInstanceWithContext(
+        "com.sun.star.bridge.UnoUrlResolver", contexto_local
+    )
+    contexto = resolvedor.resolve(f"uno:{conexao};urp;StarOffice.ComponentContext")
+    return contexto.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", contexto)
+
+
+def iniciar_servidor_libreoffice(espera_max: float = 60.0) -> Optional[Tuple[subprocess.Popen, str, Path]]:
+    """
+    Inicia um soffice headless escutando em uma porta local livre, com perfil próprio (não
+    conflita com um LibreOffice aberto pelo usuário), e espera ele aceitar conexões UNO.
+    Retorna (processo, conexão, diretório do perfil) ou None se o UNO (módulo 'uno') ou o soffice
+    não estiverem disponíveis.
+    """
+    executavel = executavel_libreoffice()
+    if uno is None or executavel is None:
+        return None
+    porta = porta_livre()
+    conexao = f"socket,host=127.0.0.1,port={porta}"
+    perfil = Path(tempfile.mkdtemp(prefix="pipeline_soffice_"))
+    processo = subprocess.Popen(
+        [executavel, "--headless", "--invisible", "--nologo", "--nodefault", "--norestore", "--nolockcheck",
+         f"--accept={conexao};urp;StarOffice.ComponentContext", f"-env:UserInstallation={perfil.as_uri()}"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    limite = time.monotonic() + espera_max
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            shutil.rmtree(perfil, ignore_errors=True)
+            return None
+        try:
+            _conectar(conexao)
+            return processo, conexao, perfil
+        except Exception:
+            time.sleep(0.2)
+    encerrar_servidor_libreoffice((processo, conexao, perfil))
+    return None
+
+
+def encerrar_servidor_libreoffice(servidor: Tuple[subprocess.Popen, str, Path]) -> None:
+    processo, conexao, perfil = servidor
+    try:
+        _conectar(conexao).terminate()
+    except Exception:
+        processo.terminate()
+    try:
+        processo.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        processo.kill()
+    shutil.rmtree(perfil, ignore_errors=True)
+
+
+def _exportar_via_uno(conexao: str, entrada: Path, saidas: Dict[str, Path]) -> None:
+    """Carrega o documento uma única vez e grava cada formato pedido."""
+    desktop = _conectar(conexao)
+    documento = desktop.loadComponentFromURL(entrada.resolve().as_uri(), "_blank", 0, _propriedades(Hidden=True))
+    if documento is None:
+        raise RuntimeError(f"LibreOffice não conseguiu abrir {entrada}")
+    try:
+        for extensao, destino in saidas.items():
+            documento.storeToURL(destino.resolve().as_uri(),
+                                 _propriedades(FilterName=FILTROS_WRITER[extensao], Overwrite=True))
+    finally:
+        documento.close(True)
+
+
+def _exportar_via_cli(entrada: Path, saidas: Dict[str, Path]) -> Dict[str, Optional[str]]:
+    """Uma execução de 'libreoffice --convert-to' por formato (cada uma paga a inicialização)."""
+    executavel = executavel_libreoffice() or "libreoffice"
+    resultados = {}
+    for extensao, destino in saidas.items():
+        try:
+            subprocess.run([executavel, "--headless", "--convert-to", extensao, "--outdir", str(destino.parent),
+                            str(entrada)], check=True, capture_output=True)
+            gerado = destino.parent / f"{entrada.stem}.{extensao}"
+            if gerado != destino:
+                os.replace(gerado, destino)
+            resultados[extensao] = None
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            resultados[extensao] = str(e)
+    return resultados
+
+
+def exportar_documento(entrada: Path, saidas: Dict[str, Path]) -> Dict[str, Optional[str]]:
+    """
+    Converte `entrada` (FODT/ODT) para cada {extensão: destino} de `saidas` ('odt', 'pdf').
+
+    Usa o soffice do build (VARIAVEL_SERVIDOR_LIBREOFFICE) ou inicia um só para esta chamada;
+    o documento é carregado uma vez para todos os formatos. Sem UNO, cai para o CLI.
+    Retorna {extensão: None em caso de sucesso, ou a mensagem de erro}.
+    """
+    conexao = os.environ.get(VARIAVEL_SERVIDOR_LIBREOFFICE)
+    servidor_proprio = None
+    if not conexao:
+        servidor_proprio = iniciar_servidor_libreoffice()
+        conexao = servidor_proprio[1] if servidor_proprio else None
+    if not conexao:
+        print("ℹ️ UNO indisponível (módulo 'uno' ou soffice ausente); usando o CLI do LibreOffice.")
+        return _exportar_via_cli(entrada, saidas)
+
+    try:
+        _exportar_via_uno(conexao, entrada, saidas)
+        return {extensao: None for extensao in saidas}
+    except Exception as e:
+        print(f"⚠️ Falha na exportação via UNO ({e}); usando o CLI do LibreOffice.")
+        return _exportar_via_cli(entrada, saidas)
+    finally:
+        if servidor_proprio:
+            encerrar_servidor_libreoffice(servidor_proprio)
@@ -0,0 +1,227 @@
+# utils/conversor_pandoc.py
+import base64
+import hashlib
+import http.client
+import json
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from utils.rede import porta_livre
+
+_versoes_em_memoria = {}
+_trava_versao = threading.Lock()
+
+# URL do 'pandoc server' iniciado pelo build_pipeline (ausente: cada conversão inicia um processo)
+VARIAVEL_SERVIDOR = "PANDOC_SERVER_URL"
+# Formatos de entrada binários: o servidor espera o conteúdo em base64
+_FORMATOS_BINARIOS = {"odt", "docx", "epub", "pptx", "xlsx"}
+# Argumentos de linha de comando que sabemos traduzir para opções do servidor
+_OPCOES_SERVIDOR = {
+    "--wrap=none": ("wrap", "none"),
+    "--wrap=auto": ("wrap", "auto"),
+    "--wrap=preserve": ("wrap", "preserve"),
+    "--no-highlight": ("highlight-style", None),
+    "--standalone": ("standalone", True),
+}
+
+
+def versao_pandoc(cache_dir: Optional[Path] = None) -> str:
+    """
+    Versão do pandoc instalado (primeira linha de 'pandoc --version').
+
+    Fica em cache em memória e em disco, indexada pelo caminho, mtime e tamanho do executável:
+    só um pandoc atualizado faz o processo 'pandoc --version' rodar de novo.
+    """
+    executavel = shutil.which("pandoc")
+    if executavel is None:
+        raise FileNotFoundError("pandoc")
+    info = os.stat(executavel)
+    chave = f"{executavel}:{info.st_mtime_ns}:{info.st_size}"
+
+    with _trava_versao:
+        if chave in _versoes_em_memoria:
+            return _versoes_em_memoria[chave]
+
+        arquivo_versoes = cache_dir / "versao.json" if cache_dir else None
+        versoes = {}
+        if arquivo_versoes and arquivo_versoes.exists():
+            versoes = json.loads(arquivo_versoes.read_text(encoding="utf-8"))
+        if chave not in versoes:
+            result = subprocess.run([executavel, "--version"], capture_output=True, text=True, check=True)
+            versoes[chave] = result.stdout.splitlines()[0].strip()
+            if arquivo_versoes:
+                arquivo_versoes.parent.mkdir(parents=True, exist_ok=True)
+                arquivo_versoes.write_text(json.dumps(versoes, indent=2), encoding="utf-8")
+        _versoes_em_memoria[chave] = versoes[chave]
+        return versoes[chave]
+
+
+def chave_conversao(dados: bytes, de: str, para: str, args: List[str], versao: str) -> str:
+    """Endereço do resultado no cache: hash da entrada + formatos + argumentos + versão do pandoc."""
+    descricao = json.dumps({
+        "entrada": hashlib.sha256(dados).hexdigest(),
+        "de": de,
+        "para": para,
+        "args": list(args),
+        "pandoc": versao,
+    }, sort_keys=True)
+    return hashlib.sha256(descricao.encode("utf-8")).hexdigest()
+
+
+def _gravar_atomico(destino: Path, conteudo: str) -> None:
+    """Grava via arquivo temporário + os.replace: conversões paralelas nunca leem um resultado pela metade."""
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=destino.parent, delete=False, suffix=".tmp") as tmp:
+        tmp.write(conteudo)
+    os.replace(tmp.name, destino)
+
+
+class ClienteServidorPandoc:
+    """Cliente HTTP do 'pandoc server' com um pool de conexões persistentes (keep-alive)."""
+
+    def __init__(self, url: str, tamanho_pool: int = 8, timeout: float = 120.0):
+        partes = urlsplit(url)
+        self.host, self.porta = partes.hostname, partes.port or 80
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=tamanho_pool)
+        self.disponivel = True
+
+    def _obter_conexao(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return http.client.HTTPConnection(self.host, self.porta, timeout=self.timeout)
+
+    def _devolver_conexao(self, conexao: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(conexao)
+        except queue.Full:
+            conexao.close()
+
+    def converter(self, texto: str, de: str, para: str, opcoes: dict) -> str:
+        corpo = json.dumps({"text": texto, "from": de, "to": para, **opcoes}).encode("utf-8")
+        conexao = self._obter_conexao()
+        try:
+            conexao.request("POST", "/", body=corpo,
+                            headers={"Content-Type": "application/json", "Accept": "application/json"})
+            resposta = conexao.getresponse()
+            dados = resposta.read()
+        except (OSError, http.client.HTTPException):
+            conexao.close()
+            raise
+        self._devolver_conexao(conexao)
+
+        if resposta.status != 200:
+            raise subprocess.CalledProcessError(resposta.status, ["pandoc server"], stderr=dados)
+        resultado = json.loads(dados)
+        if "error" in resultado:
+            raise subprocess.CalledProcessError(1, ["pandoc server"], stderr=resultado["error"].encode("utf-8"))
+        saida = resultado.get("output", "")
+        return base64.b64decode(saida).decode("utf-8") if resultado.get("base64") else saida
+
+
+_clientes = {}
+_trava_clientes = threading.Lock()
+
+
+def _cliente_servidor() -> Optional[ClienteServidorPandoc]:
+    url = os.environ.get(VARIAVEL_SERVIDOR)
+    if not url:
+        return None
+    with _trava_clientes:
+        if url not in _clientes:
+            _clientes[url] = ClienteServidorPandoc(url)
+        cliente = _clientes[url]
+    return cliente if cliente.disponivel else None
+
+
+def _opcoes_para_servidor(args: List[str]) -> Optional[dict]:
+    """Traduz os argumentos da CLI; None se algum não tiver equivalente (a conversão usa o processo)."""
+    opcoes = {}
+    for arg in args:
+        if arg not in _OPCOES_SERVIDOR:
+            return None
+        chave, valor = _OPCOES_SERVIDOR[arg]
+        opcoes[chave] = valor
+    return opcoes
+
+
+def _executar_pandoc(entrada: Union[str, Path], de: str, para: str, args: List[str]) -> str:
+    cliente = _cliente_servidor()
+    opcoes = _opcoes_para_servidor(args) if cliente else None
+    if cliente and opcoes is not None:
+        if isinstance(entrada, Path):
+            dados = entrada.read_bytes()
+            texto = base64.b64encode(dados).decode("ascii") if de in _FORMATOS_BINARIOS else dados.decode("utf-8")
+        else:
+            texto = entrada
+        try:
+            return cliente.converter(texto, de, para, opcoes)
+        except (OSError, http.client.HTTPException) as e:
+            # Servidor fora do ar: as próximas conversões deste processo voltam a iniciar o pandoc
+            cliente.disponivel = False
+            print(f"⚠️ pandoc server indisponível ({e}); usando processos pandoc.")
+
+    comando = ["pandoc", "-f", de, "-t", para, *args]
+    if isinstance(entrada, Path):
+        result = subprocess.run(comando + [str(entrada)], capture_output=True, check=True)
+    else:
+        result = subprocess.run(comando, input=entrada.encode("utf-8"), capture_output=True, check=True)
+    return result.stdout.decode("utf-8")
+
+
+def converter(entrada: Union[str, Path], de: str, para: str, args: List[str] = (),
+              cache_dir: Optional[Path] = None) -> str:
+    """
+    Converte texto (str) ou arquivo (Path) com o pandoc, com cache endereçado por conteúdo.
+
+    Em um acerto do cache o resultado é lido do disco sem iniciar nenhum processo.
+    Erros do pandoc propagam como subprocess.CalledProcessError; pandoc ausente, como FileNotFoundError.
+    """
+    args = list(args)
+    if cache_dir is None:
+        return _executar_pandoc(entrada, de, para, args)
+
+    dados = entrada.read_bytes() if isinstance(entrada, Path) else entrada.encode("utf-8")
+    chave = chave_conversao(dados, de, para, args, versao_pandoc(cache_dir))
+    caminho_cache = cache_dir / chave[:2] / chave
+    if caminho_cache.exists():
+        return caminho_cache.read_text(encoding="utf-8")
+
+    saida = _executar_pandoc(entrada, de, para, args)
+    _gravar_atomico(caminho_cache, saida)
+    return saida
+
+
+def iniciar_servidor_pandoc(timeout_conversao: int = 120, espera_max: float = 10.0) -> Optional[Tuple[subprocess.Popen, str]]:
+    """
+    Inicia 'pandoc server' em uma porta local livre e espera ele aceitar conexões.
+    Retorna (processo, url) ou None se o pandoc não suportar o modo servidor.
+    """
+    if shutil.which("pandoc") is None:
+        return None
+    porta = porta_livre()
+    processo = subprocess.Popen(
+        ["pandoc", "server", "--port", str(porta), "--timeout", str(timeout_conversao)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    limite = time.monotonic() + espera_max
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            return None  # pandoc antigo (sem 'server') ou erro ao iniciar
+        try:
+            with socket.create_connection(("127.0.0.1", porta), timeout=0.2):
+                return processo, f"http://127.0.0.1:{porta}"
+        except OSError:
+            time.sleep(0.05)
+    processo.terminate()
+    return None
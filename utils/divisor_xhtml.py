@@ -0,0 +1,144 @@
+# utils/divisor_xhtml.py
+import re
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+# Elementos sem tag de fechamento em HTML (não alteram a profundidade)
+_ELEMENTOS_VAZIOS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_ELEMENTOS_INVOLUCRO = {"section", "div", "article", "main"}
+_TITULOS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+_NIVEIS_DIVISAO = {"h2": {"h2"}, "h3": {"h2", "h3"}}
+
+
+class _BlocosDeNivelSuperior(HTMLParser):
+    """Registra a posição e a tag de cada elemento de nível superior de um trecho HTML."""
+
+    def __init__(self, texto: str):
+        super().__init__(convert_charrefs=False)
+        self._inicio_linhas = [0]
+        for match in re.finditer("\n", texto):
+            self._inicio_linhas.append(match.end())
+        self.profundidade = 0
+        self.blocos: List[Tuple[int, str]] = []
+
+    def _offset(self) -> int:
+        linha, coluna = self.getpos()
+        return self._inicio_linhas[linha - 1] + coluna
+
+    def handle_starttag(self, tag, attrs):
+        if self.profundidade == 0:
+            self.blocos.append((self._offset(), tag))
+        if tag not in _ELEMENTOS_VAZIOS:
+            self.profundidade += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if self.profundidade == 0:
+            self.blocos.append((self._offset(), tag))
+
+    def handle_endtag(self, tag):
+        if tag not in _ELEMENTOS_VAZIOS:
+            self.profundidade = max(0, self.profundidade - 1)
+
+
+def _blocos(trecho: str) -> List[Tuple[int, str]]:
+    parser = _BlocosDeNivelSuperior(trecho)
+    parser.feed(trecho)
+    parser.close()
+    return parser.blocos
+
+
+def dividir_xhtml(documento: str, dividir_em: Optional[str] = None,
+                  limite_bytes: Optional[int] = None) -> List[str]:
+    """
+    Divide um documento XHTML de capítulo em vários documentos menores.
+
+    A divisão acontece antes de cada h2 (dividir_em='h2') ou h2/h3 (dividir_em='h3') de
+    nível superior e/ou sempre que um pedaço ultrapassaria `limite_bytes`. Cada pedaço
+    recebe o mesmo <head> (título, CSS) e <html xml:lang> do original; se o corpo estiver
+    envolto em um único <section>/<div>, o invólucro (ex: epub:type="chapter") também é
+    repetido. Um pedaço nunca é encerrado contendo apenas títulos.
+    """
+    niveis = _NIVEIS_DIVISAO.get(dividir_em, set())
+    if not niveis and not limite_bytes:
+        return [documento]
+
+    abertura_body = re.search(r"<body\b[^>]*>", documento, re.IGNORECASE)
+    fechamento_body = None
+    for fechamento_body in re.finditer(r"</body\s*>", documento, re.IGNORECASE):
+        pass
+    if not abertura_body or not fechamento_body:
+        return [documento]
+
+    prefixo = documento[:abertura_body.end()]
+    sufixo = documento[fechamento_body.start():]
+    corpo = documento[abertura_body.end():fechamento_body.start()]
+
+    # Desce em um invólucro único (<section epub:type="chapter">...</section>), repetido em cada pedaço
+    blocos = _blocos(corpo)
+    if len(blocos) == 1 and blocos[0][1] in _ELEMENTOS_INVOLUCRO:
+        inicio, tag = blocos[0]
+        fim_abertura = corpo.index(">", inicio) + 1
+        fim_involucro = corpo.rfind(f"</{tag}")
+        if fim_involucro > fim_abertura:
+            prefixo += corpo[:fim_abertura]
+            sufixo = corpo[fim_involucro:] + sufixo
+            corpo = corpo[fim_abertura:fim_involucro]
+            blocos = _blocos(corpo)
+
+    if len(blocos) < 2:
+        return [documento]
+
+    # Fatias do corpo: cada bloco vai do seu início até o início do próximo
+    limites = [inicio for inicio, _ in blocos] + [len(corpo)]
+    fatias = [(corpo[limites[i]:limites[i + 1]], blocos[i][1]) for i in range(len(blocos))]
+    cabecalho_corpo = corpo[:limites[0]]
+
+    tamanho_fixo = len((prefixo + sufixo).encode("utf-8"))
+    pedacos: List[List[str]] = [[]]
+    tamanho_atual = tamanho_fixo
+    so_titulos = True
+
+    for html_bloco, tag in fatias:
+        tamanho_bloco = len(html_bloco.encode("utf-8"))
+        quebra_por_titulo = tag in niveis
+        quebra_por_tamanho = bool(limite_bytes) and tamanho_atual + tamanho_bloco > limite_bytes
+        if pedacos[-1] and not so_titulos and (quebra_por_titulo or quebra_por_tamanho):
+            pedacos.append([])
+            tamanho_atual = tamanho_fixo
+            so_titulos = True
+        pedacos[-1].append(html_bloco)
+        tamanho_atual += tamanho_bloco
+        if tag not in _TITULOS:
+            so_titulos = False
+
+    if len(pedacos) == 1:
+        return [documento]
+
+    documentos = []
+    for i, pedaco in enumerate(pedacos):
+        conteudo = "".join(pedaco)
+        if i == 0:
+            conteudo = cabecalho_corpo + conteudo
+        documentos.append(prefixo + conteudo + sufixo)
+    return documentos
+
+
+def reescrever_ancoras_locais(documentos: List[str], nomes_arquivos: List[str]) -> List[str]:
+    """
+    Após a divisão, links '#id' que apontavam para o mesmo capítulo podem ter ido parar em
+    outro pedaço: reescreve-os como 'arquivo.xhtml#id' apontando para o pedaço correto.
+    """
+    arquivo_por_id = {}
+    for documento, nome in zip(documentos, nomes_arquivos):
+        for match in re.finditer(r'\sid="([^"]+)"', documento):
+            arquivo_por_id.setdefault(match.group(1), nome)
+
+    resultado = []
+    for documento, nome in zip(documentos, nomes_arquivos):
+        def _substituir(match):
+            destino = arquivo_por_id.get(match.group(2))
+            if destino is None or destino == nome:
+                return match.group(0)
+            return f'{match.group(1)}"{destino}#{match.group(2)}"'
+        resultado.append(re.sub(r'(\shref=)"#([^"]+)"', _substituir, documento))
+    return resultado
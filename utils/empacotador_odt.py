@@ -0,0 +1,106 @@
+# utils/empacotador_odt.py
+import io
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from utils.build_reprodutivel import escrever_zip_reprodutivel
+from utils.xml_odf import (
+    MANIFEST_NS, OFFICE_NS, abrir_tag, declaracoes_namespace, mapa_prefixos, nome_qualificado, serializar_elemento
+)
+
+MIMETYPE_PADRAO = "application/vnd.oasis.opendocument.text"
+# Filho de office:document → partes do pacote que o recebem (automatic-styles e font-face-decls
+# valem por parte: os de content.xml servem ao corpo, os de styles.xml às páginas-mestre)
+_DESTINOS = {
+    "meta": ("meta.xml",),
+    "settings": ("settings.xml",),
+    "scripts": ("content.xml",),
+    "font-face-decls": ("content.xml", "styles.xml"),
+    "styles": ("styles.xml",),
+    "automatic-styles": ("content.xml", "styles.xml"),
+    "master-styles": ("styles.xml",),
+}
+# Parte → elemento raiz no pacote
+_RAIZES = {
+    "content.xml": "document-content",
+    "styles.xml": "document-styles",
+    "meta.xml": "document-meta",
+    "settings.xml": "document-settings",
+}
+
+
+def _manifesto(mimetype: str, versao: str, partes: list) -> str:
+    entradas = [f' <manifest:file-entry manifest:full-path="/" manifest:version="{versao}" manifest:media-type="{mimetype}"/>']
+    entradas += [f' <manifest:file-entry manifest:full-path="{parte}" manifest:media-type="text/xml"/>' for parte in partes]
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<manifest:manifest xmlns:manifest="{MANIFEST_NS}" manifest:version="{versao}">\n'
+        + "\n".join(entradas) + "\n</manifest:manifest>\n"
+    )
+
+
+def fodt_para_odt(fodt_path: Path, odt_path: Path) -> None:
+    """
+    Empacota um FODT (office:document) como ODT sem LibreOffice: separa os filhos do
+    documento em content.xml, styles.xml, meta.xml e settings.xml e grava o zip com
+    mimetype e META-INF/manifest.xml.
+
+    O corpo é lido em streaming (iterparse): cada filho de office:body/office:text é
+    serializado e descartado, sem montar a árvore do livro inteiro.
+    """
+    prefixos = mapa_prefixos(fodt_path)
+    if OFFICE_NS not in prefixos:
+        raise ValueError(f"{fodt_path.name} não é um documento OpenDocument (namespace office ausente)")
+    tag_corpo = f"{{{OFFICE_NS}}}body"
+    partes = {nome: io.StringIO() for nome in _RAIZES}
+    conteudo = partes["content.xml"]
+
+    raiz = None
+    pilha = []
+    for evento, elemento in ET.iterparse(fodt_path, events=("start", "end")):
+        if evento == "start":
+            if raiz is None:
+                raiz = elemento
+            elif (len(pilha) == 1 and elemento.tag == tag_corpo) or (len(pilha) == 2 and pilha[1].tag == tag_corpo):
+                # office:body e o elemento do tipo de documento (office:text)
+                conteudo.write(abrir_tag(elemento, prefixos))
+            pilha.append(elemento)
+            continue
+
+        pilha.pop()
+        nivel = len(pilha)
+        if nivel >= 2 and pilha[1].tag == tag_corpo:
+            if nivel == 3:
+                serializar_elemento(elemento, prefixos, conteudo)
+                pilha[-1].remove(elemento)
+            elif nivel == 2:
+                conteudo.write(f"</{nome_qualificado(elemento.tag, prefixos)}>")
+        elif nivel == 1:
+            if elemento.tag == tag_corpo:
+                conteudo.write(f"</{nome_qualificado(elemento.tag, prefixos)}>")
+            else:
+                local = elemento.tag.split("}", 1)[-1]
+                for parte in _DESTINOS.get(local, ()) if elemento.tag.startswith(f"{{{OFFICE_NS}}}") else ():
+                    serializar_elemento(elemento, prefixos, partes[parte])
+            raiz.remove(elemento)
+
+    office = prefixos[OFFICE_NS]
+    versao = raiz.get(f"{{{OFFICE_NS}}}version", "1.2")
+    mimetype = raiz.get(f"{{{OFFICE_NS}}}mimetype", MIMETYPE_PADRAO)
+    arquivos = {"mimetype": mimetype}
+    for nome, elemento_raiz in _RAIZES.items():
+        corpo = partes[nome].getvalue()
+        if not corpo and nome not in ("content.xml", "styles.xml"):
+            continue
+        arquivos[nome] = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<{office}:{elemento_raiz}{declaracoes_namespace(prefixos)} {office}:version="{versao}">'
+            f"{corpo}</{office}:{elemento_raiz}>\n"
+        )
+    arquivos["META-INF/manifest.xml"] = _manifesto(mimetype, versao, [nome for nome in _RAIZES if nome in arquivos])
+
+    # Zip com ordem e datas fixas (reprodutível com SOURCE_DATE_EPOCH); mimetype primeiro e sem compressão
+    temporario = odt_path.with_name(f".{odt_path.name}.tmp")
+    escrever_zip_reprodutivel(temporario, arquivos, primeiro="mimetype")
+    os.replace(temporario, odt_path)
@@ -0,0 +1,120 @@
+# utils/epubcheck.py
+import hashlib
+import json
+import re
+import subprocess
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Dict, List
+
+FONTE_LOTE = Path(__file__).resolve().parents[1] / "scripts" / "java" / "EpubcheckLote.java"
+_MARCADOR_FIM = "@@EPUBCHECK_FIM"
+
+
+def versao_epubcheck(jar_path: Path) -> str:
+    """Lê a versão do EPUBCheck do MANIFEST.MF do jar, sem iniciar a JVM."""
+    with zipfile.ZipFile(jar_path) as jar:
+        manifest = jar.read("META-INF/MANIFEST.MF").decode("utf-8", errors="replace")
+    match = re.search(r"^Implementation-Version:\s*(\S+)", manifest, re.MULTILINE)
+    return match.group(1) if match else jar_path.parent.name
+
+
+def chave_cache(epub_path: Path, versao: str) -> str:
+    """Chave do resultado: hash do conteúdo do EPUB + versão do EPUBCheck."""
+    digest = hashlib.sha256(epub_path.read_bytes()).hexdigest()
+    return f"{digest}:{versao}"
+
+
+def carregar_cache(path: Path) -> dict:
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return {}
+
+
+def salvar_cache(path: Path, dados: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(dados, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def _resumir_relatorio_json(relatorio_path: Path) -> str:
+    """Converte o relatório JSON do EPUBCheck em linhas legíveis (uma por ocorrência)."""
+    if not relatorio_path.exists():
+        return ""
+    dados = json.loads(relatorio_path.read_text(encoding="utf-8"))
+    linhas = []
+    for mensagem in dados.get("messages", []):
+        locais = mensagem.get("locations") or [{}]
+        for local in locais:
+            posicao = local.get("path", "")
+            if local.get("line", -1) >= 0:
+                posicao += f"({local['line']},{local.get('column', -1)})"
+            linhas.append(f"{mensagem.get('severity')}({mensagem.get('ID')}): {posicao}: {mensagem.get('message')}")
+    return "\n".join(linhas)
+
+
+def _resultado(codigo: int, relatorio_path: Path, saida: str) -> dict:
+    """
+    Resultado de um livro. Só são resultados reais (cacheáveis) o código 0 e o código 1 com
+    relatório JSON legível; outros códigos (JVM que morreu, falta de memória, jar ausente,
+    exceção no lote) ou relatório ausente/truncado são marcados com "falha_execucao".
+    """
+    if codigo == 0:
+        return {"valido": True, "relatorio": _resumir_relatorio_json(relatorio_path) or saida.strip()}
+    if codigo == 1 and relatorio_path.exists():
+        try:
+            return {"valido": False, "relatorio": _resumir_relatorio_json(relatorio_path) or saida.strip()}
+        except json.JSONDecodeError:
+            pass
+    return {"valido": False, "relatorio": saida.strip(), "falha_execucao": True}
+
+
+def executar_epubcheck(epubs: List[Path], jar_path: Path) -> Dict[Path, dict]:
+    """
+    Valida os EPUBs com o EPUBCheck pagando uma única inicialização da JVM.
+
+    Um único arquivo usa o CLI normal; vários arquivos passam pelo EpubcheckLote.java,
+    que chama o EPUBCheck como biblioteca e gera um relatório JSON por livro.
+    Retorna {epub: {"valido": bool, "relatorio": str}}; resultados com "falha_execucao"
+    indicam que o livro não chegou a ser validado (ver _resultado) e não devem ir para o cache.
+    """
+    if not epubs:
+        return {}
+
+    if len(epubs) == 1:
+        with tempfile.TemporaryDirectory() as tmp:
+            relatorio = Path(tmp) / "relatorio.json"
+            result = subprocess.run(
+                ["java", "-jar", str(jar_path), str(epubs[0]), "--json", str(relatorio)],
+                capture_output=True, text=True
+            )
+            return {epubs[0]: _resultado(result.returncode, relatorio, result.stdout + result.stderr)}
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        relatorios = {epub: Path(tmp) / f"relatorio_{i}.json" for i, epub in enumerate(epubs)}
+        command = ["java", "-cp", str(jar_path), str(FONTE_LOTE)]
+        for epub, relatorio in relatorios.items():
+            command += [str(epub), str(relatorio)]
+        result = subprocess.run(command, capture_output=True, text=True)
+
+        # Separa o stdout por livro usando as linhas marcadoras emitidas após cada EPUB
+        saida_atual = []
+        codigos = {}
+        for linha in result.stdout.splitlines():
+            if linha.startswith(_MARCADOR_FIM):
+                _, codigo, caminho = linha.split("\t", 2)
+                codigos[caminho] = (int(codigo), "\n".join(saida_atual))
+                saida_atual = []
+            else:
+                saida_atual.append(linha)
+
+        for epub, relatorio in relatorios.items():
+            if str(epub) not in codigos:
+                # A JVM falhou antes de chegar a este livro (ex: Java ausente ou erro de compilação)
+                resultados[epub] = {"valido": False, "relatorio": (result.stdout + result.stderr).strip(),
+                                    "falha_execucao": True}
+                continue
+            codigo, saida = codigos[str(epub)]
+            resultados[epub] = _resultado(codigo, relatorio, saida)
+    return resultados
@@ -0,0 +1,52 @@
+# utils/escrita_artefatos.py
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Union
+
+
+def _ler_umask() -> int:
+    """umask do processo (os.umask só permite lê-la trocando-a; lida uma vez, na importação)."""
+    atual = os.umask(0)
+    os.umask(atual)
+    return atual
+
+
+_UMASK = _ler_umask()
+
+
+class EscritorArtefatos:
+    """
+    Grava artefatos gerados somente quando o conteúdo muda.
+
+    Arquivos idênticos ao que já está no disco não são tocados (mtime preservado), o que
+    permite a caches e às decisões de rerun do LaTeX confiar em "este arquivo não mudou".
+    A substituição é atômica (arquivo temporário no mesmo diretório + os.replace).
+    """
+
+    def __init__(self):
+        self.alterados: List[Path] = []
+        self.inalterados: List[Path] = []
+
+    def escrever(self, caminho: Path, conteudo: Union[str, bytes], encoding: str = "utf-8") -> bool:
+        """Grava `conteudo` em `caminho` se diferente do atual. Retorna True se o arquivo mudou."""
+        caminho = Path(caminho)
+        dados = conteudo.encode(encoding) if isinstance(conteudo, str) else conteudo
+
+        # Tamanho primeiro (stat barato); só compara o conteúdo se os tamanhos baterem
+        if caminho.exists() and caminho.stat().st_size == len(dados) and caminho.read_bytes() == dados:
+            self.inalterados.append(caminho)
+            return False
+
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", dir=caminho.parent, prefix=f".{caminho.name}.",
+                                         suffix=".tmp", delete=False) as tmp:
+            tmp.write(dados)
+        # O temporário nasce com 0600: mantém o modo do arquivo substituído ou o padrão da umask
+        os.chmod(tmp.name, caminho.stat().st_mode & 0o7777 if caminho.exists() else 0o666 & ~_UMASK)
+        os.replace(tmp.name, caminho)
+        self.alterados.append(caminho)
+        return True
+
+    def resumo(self) -> str:
+        return f"{len(self.alterados)} arquivo(s) alterado(s), {len(self.inalterados)} inalterado(s)"
@@ -1,4 +1,6 @@
 # utils/filters.py
+import re
+
 from jinja2 import Environment
 
 
@@ -40,30 +42,36 @@ def hex_to_latex_color_name(hex_color_code):
 
 
 # --- NOVO FILTRO: escape_latex ---
+# Substituições feitas em uma única passagem: o resultado de uma troca nunca é reprocessado
+# (ex: '\\' vira '\\textbackslash{}' sem que as chaves inseridas sejam escapadas de novo).
+_SUBSTITUICOES_LATEX = {
+    '\\': '\\textbackslash{}',
+    '{': '\\{',
+    '}': '\\}',
+    '#': '\\#',
+    '$': '\\$',
+    '%': '\\%',
+    '&': '\\&',
+    '~': '\\textasciitilde{}',
+    '_': '\\_',
+    '^': '\\textasciicircum{}',
+    '📌': '',  # Emoji removido (sem glifo nas fontes do livro)
+    '---': '\\textemdash{}',
+}
+_PADRAO_LATEX = re.compile('|'.join(re.escape(chave) for chave in sorted(_SUBSTITUICOES_LATEX, key=len, reverse=True)))
+
+
+def escapar_texto_latex(text: str) -> str:
+    """Escapa os caracteres especiais do LaTeX em texto puro (uma única passagem)."""
+    return _PADRAO_LATEX.sub(lambda match: _SUBSTITUICOES_LATEX[match.group(0)], text)
+
+
 def escape_latex_filter(text: str) -> str:
     """Escapa caracteres especiais do LaTeX e remove emojis.
     Esta função será usada como um filtro Jinja2."""
     if not isinstance(text, str):
         return text
-    # Ordem importa! Caracteres como #, $ precisam ser escapados antes de \.
-    # % precisa ser escapado para não comentar o resto da linha.
-    # { } e ^ _ ~ são especiais.
-    # \ precisa ser tratado como \\
-    text = text.replace('\\', '\\textbackslash{}') # Escape backslash first
-    text = text.replace('{', '\\{')
-    text = text.replace('}', '\\}')
-    text = text.replace('#', '\\#')
-    text = text.replace('$', '\\$')
-    text = text.replace('%', '\\%')
-    text = text.replace('&', '\\&')
-    text = text.replace('~', '\\textasciitilde{}')
-    text = text.replace('_', '\\_')
-    text = text.replace('^', '\\textasciicircum{}')
-    # Para o emoji 📌, vamos removê-lo aqui, garantindo.
-    text = text.replace('📌', '')
-    # Tratar em-dash
-    text = text.replace('---', '\\textemdash{}')
-    return text
+    return escapar_texto_latex(text)
 
 
 def get_latex_color_definitions(styles_json):
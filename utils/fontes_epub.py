@@ -0,0 +1,218 @@
+# utils/fontes_epub.py
+import hashlib
+import html
+import io
+import re
+import shutil
+import subprocess
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from fontTools.subset import Options, Subsetter
+    from fontTools.ttLib import TTFont
+except ImportError:  # fontTools é opcional: sem ele as fontes não são embutidas
+    TTFont = None
+
+FAMILIAS_GENERICAS = {
+    "serif", "sans-serif", "monospace", "cursive", "fantasy", "system-ui",
+    "ui-serif", "ui-sans-serif", "ui-monospace", "ui-rounded", "math", "emoji", "fangsong",
+    "inherit", "initial", "unset",
+}
+# (peso CSS, estilo CSS) → (peso fontconfig, inclinação fontconfig)
+VARIACOES = {
+    (400, "normal"): (80, 0),
+    (700, "normal"): (200, 0),
+    (400, "italic"): (80, 100),
+    (700, "italic"): (200, 100),
+}
+ALGORITMO_OFUSCACAO_IDPF = "http://www.idpf.org/2008/embedding"
+_TAMANHO_OFUSCADO = 1040
+_MEDIA_TYPES = {".otf": "font/otf", ".ttf": "font/ttf", ".ttc": "font/ttf"}
+
+
+def familias_do_css(css: str, metadata: Optional[dict] = None) -> List[str]:
+    """
+    Famílias nomeadas em 'font-family' no CSS (na ordem em que aparecem), mais as fontes
+    principais declaradas no metadata do estilo. Famílias genéricas são ignoradas.
+    """
+    familias = []
+    valores = re.findall(r"font-family\s*:\s*([^;}]+)", css, re.IGNORECASE)
+    if metadata:
+        for chave in ("fontes_principais_serif", "fontes_principais_sans_serif"):
+            valores.append(", ".join(metadata.get(chave, [])[:1]))
+    for valor in valores:
+        for nome in valor.split(","):
+            nome = nome.strip().strip("\"'").strip()
+            if nome and nome.lower() not in FAMILIAS_GENERICAS and nome not in familias:
+                familias.append(nome)
+    return familias
+
+
+def resolver_fonte(familia: str, peso_fc: int, inclinacao_fc: int) -> Optional[Tuple[Path, int]]:
+    """Usa o fc-match para achar o arquivo (e índice, em coleções .ttc) da família/variação."""
+    if not shutil.which("fc-match"):
+        return None
+    result = subprocess.run(
+        ["fc-match", "-f", "%{file}\t%{index}\t%{family}", f"{familia}:weight={peso_fc}:slant={inclinacao_fc}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0 or "\t" not in result.stdout:
+        return None
+    arquivo, indice, familias_encontradas = result.stdout.split("\t", 2)
+    # O fc-match sempre devolve *alguma* fonte; só aceitamos se for a família pedida
+    if familia.lower() not in [f.strip().lower() for f in familias_encontradas.split(",")]:
+        return None
+    return Path(arquivo), int(indice or 0)
+
+
+class _ColetorDeTexto(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.caracteres = set()
+
+    def handle_data(self, data):
+        self.caracteres.update(data)
+
+    def handle_starttag(self, tag, attrs):
+        # Textos alternativos e títulos também podem ser exibidos com a fonte do livro
+        for nome, valor in attrs:
+            if nome in ("alt", "title") and valor:
+                self.caracteres.update(valor)
+
+
+# Gerados pelo leitor, não pelo texto: numeração de listas (decimal, romana, alfabética) e marcadores
+_GLIFOS_DE_LISTA = "0123456789ivxlcdmIVXLCDMabcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ.)(-–—•◦▪·"
+_PADRAO_CONTENT_CSS = re.compile(r"""(?<![\w-])(?:content|quotes)\s*:([^;}]*)""", re.IGNORECASE)
+_PADRAO_STRING_CSS = re.compile(r"""(["'])((?:\\.|(?!\1).)*)\1""", re.DOTALL)
+_PADRAO_ESCAPE_CSS = re.compile(r"\\([0-9a-fA-F]{1,6})\s?|\\(.)", re.DOTALL)
+
+
+def _strings_content_css(css: str) -> str:
+    """Texto das strings em 'content:' (::before/::after) e 'quotes:', com os escapes CSS (\\2022) resolvidos."""
+    def _resolver(match):
+        return chr(int(match.group(1), 16)) if match.group(1) else match.group(2)
+
+    return "".join(
+        _PADRAO_ESCAPE_CSS.sub(_resolver, texto)
+        for valor in _PADRAO_CONTENT_CSS.findall(css)
+        for _, texto in _PADRAO_STRING_CSS.findall(valor)
+    )
+
+
+def glifos_usados(documentos: Iterable[str], css: str = "") -> str:
+    """
+    Conjunto de caracteres (ordenado) que o leitor pode desenhar com a fonte: o texto dos
+    documentos XHTML com as variantes de caixa (text-transform), as strings de 'content:'
+    e 'quotes:' do CSS e os dígitos e a pontuação da numeração de listas.
+    """
+    coletor = _ColetorDeTexto()
+    for documento in documentos:
+        coletor.feed(documento)
+        coletor.close()
+        coletor.reset()
+    caracteres = coletor.caracteres | set(_strings_content_css(css)) | set(_GLIFOS_DE_LISTA)
+    # upper()/lower() podem gerar mais de um caractere (ex: 'ß' → 'SS')
+    caracteres |= {variante for c in caracteres for variante in c.upper() + c.lower()}
+    caracteres = {c for c in caracteres if not c.isspace()} | {" ", " "}
+    return "".join(sorted(caracteres))
+
+
+def subconjunto_fonte(arquivo: Path, indice: int, texto: str, cache_dir: Path) -> Optional[Path]:
+    """
+    Gera o subconjunto da fonte com os glifos de `texto` (mantendo kerning e ligaduras).
+    O resultado fica em cache por (hash do arquivo da fonte, hash do conjunto de glifos).
+    """
+    if TTFont is None:
+        return None
+    hash_fonte = hashlib.sha256(arquivo.read_bytes() + str(indice).encode()).hexdigest()[:16]
+    hash_glifos = hashlib.sha256(texto.encode("utf-8")).hexdigest()[:16]
+    extensao = ".otf" if arquivo.suffix.lower() == ".otf" else ".ttf"
+    destino = cache_dir / f"{hash_fonte}_{hash_glifos}{extensao}"
+    if destino.exists():
+        return destino
+
+    opcoes = Options()
+    opcoes.layout_features = ["*"]
+    opcoes.name_IDs = ["*"]
+    opcoes.notdef_outline = True
+    fonte = TTFont(str(arquivo), fontNumber=indice, lazy=False)
+    subsetter = Subsetter(opcoes)
+    subsetter.populate(text=texto)
+    subsetter.subset(fonte)
+    fonte.flavor = None
+
+    saida = io.BytesIO()
+    fonte.save(saida)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    destino.write_bytes(saida.getvalue())
+    return destino
+
+
+def ofuscar_fonte(dados: bytes, identificador: str) -> bytes:
+    """
+    Ofuscação de fontes do IDPF (EPUB 3, Open Container Format): XOR dos primeiros 1040 bytes
+    com o SHA-1 do identificador único da publicação (sem espaços em branco).
+    A operação é simétrica: aplicá-la de novo devolve a fonte original.
+    """
+    chave = hashlib.sha1(re.sub(r"[ \u0009\u000d\u000a]", "", identificador).encode("utf-8")).digest()
+    inicio = bytes(b ^ chave[i % len(chave)] for i, b in enumerate(dados[:_TAMANHO_OFUSCADO]))
+    return inicio + dados[_TAMANHO_OFUSCADO:]
+
+
+def media_type_fonte(caminho: Path) -> str:
+    return _MEDIA_TYPES.get(caminho.suffix.lower(), "application/octet-stream")
+
+
+def gerar_encryption_xml(caminhos_no_pacote: List[str]) -> str:
+    """META-INF/encryption.xml declarando as fontes ofuscadas com o algoritmo do IDPF."""
+    entradas = "".join(
+        f"""
+  <enc:EncryptedData>
+    <enc:EncryptionMethod Algorithm="{ALGORITMO_OFUSCACAO_IDPF}"/>
+    <enc:CipherData><enc:CipherReference URI="{html.escape(caminho)}"/></enc:CipherData>
+  </enc:EncryptedData>"""
+        for caminho in caminhos_no_pacote
+    )
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<encryption xmlns="urn:oasis:names:tc:opendocument:xmlns:container" xmlns:enc="http://www.w3.org/2001/04/xmlenc#">{entradas}
+</encryption>
+"""
+
+
+def preparar_fontes_embutidas(css: str, documentos: List[str], metadata: Optional[dict],
+                              identificador: str, cache_dir: Path) -> Tuple[str, Dict[str, bytes]]:
+    """
+    Resolve as famílias declaradas, gera os subconjuntos e os ofusca.
+
+    Retorna (regras @font-face, {caminho relativo ao CSS (ex: 'fonts/x.otf'): bytes ofuscados}).
+    Famílias não instaladas (ou sem fontTools) são ignoradas com aviso.
+    """
+    if TTFont is None:
+        print("⚠️ fontTools não instalado: fontes não serão embutidas (pip install fonttools).")
+        return "", {}
+
+    texto = glifos_usados(documentos, css)
+    regras, arquivos = [], {}
+    for familia in familias_do_css(css, metadata):
+        arquivos_familia = set()
+        for (peso, estilo), (peso_fc, inclinacao_fc) in VARIACOES.items():
+            resolvido = resolver_fonte(familia, peso_fc, inclinacao_fc)
+            if resolvido is None:
+                if peso == 400 and estilo == "normal":
+                    print(f"⚠️ Fonte '{familia}' não encontrada no sistema (fc-match). Não será embutida.")
+                    break
+                continue
+            if resolvido in arquivos_familia:
+                continue  # Sem face própria para esta variação: o leitor sintetiza
+            arquivos_familia.add(resolvido)
+
+            subconjunto = subconjunto_fonte(resolvido[0], resolvido[1], texto, cache_dir)
+            nome = f"fonts/{subconjunto.name}"
+            arquivos[nome] = ofuscar_fonte(subconjunto.read_bytes(), identificador)
+            regras.append(
+                f'@font-face {{\n  font-family: "{familia}";\n  font-weight: {peso};\n'
+                f'  font-style: {estilo};\n  src: url("{nome}");\n}}'
+            )
+    return "\n\n".join(regras), arquivos
@@ -0,0 +1,111 @@
+# utils/fontes_latex.py
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.fontes_epub import resolver_fonte
+
+NOME_CACHE = "fontes_latex.json"
+# Opção do fontspec → (peso fontconfig, inclinação fontconfig)
+_VARIANTES_FONTSPEC = {
+    "UprightFont": (80, 0),
+    "BoldFont": (200, 0),
+    "ItalicFont": (80, 100),
+    "BoldItalicFont": (200, 100),
+}
+
+
+def estado_fontconfig() -> str:
+    """
+    Hash do estado do fontconfig: versão, configuração ativa e os arquivos de cache (que o
+    fc-cache reescreve quando fontes são instaladas ou removidas).
+    """
+    sha = hashlib.sha256()
+    if shutil.which("fc-match"):
+        versao = subprocess.run(["fc-match", "--version"], capture_output=True, text=True)
+        sha.update((versao.stdout + versao.stderr).encode("utf-8"))
+    for variavel in ("FONTCONFIG_FILE", "FONTCONFIG_PATH"):
+        sha.update(f"{variavel}={os.environ.get(variavel, '')}\n".encode("utf-8"))
+
+    cache_usuario = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "fontconfig"
+    for diretorio in (Path("/var/cache/fontconfig"), cache_usuario, Path.home() / ".fontconfig"):
+        if not diretorio.is_dir():
+            continue
+        for arquivo in sorted(diretorio.glob("*cache-*")):
+            info = arquivo.stat()
+            sha.update(f"{arquivo}:{info.st_mtime_ns}:{info.st_size}\n".encode("utf-8"))
+    return sha.hexdigest()
+
+
+def _resolver_familia(familia: str) -> Optional[dict]:
+    """Arquivos concretos das variantes da família; None se nem a variante regular existir."""
+    regular = resolver_fonte(familia, *_VARIANTES_FONTSPEC["UprightFont"])
+    if regular is None:
+        return None
+    arquivo_regular, indice = regular
+    resolucao = {"Path": str(arquivo_regular.parent) + "/", "arquivo": arquivo_regular.name, "indice": indice}
+    for opcao, (peso_fc, inclinacao_fc) in _VARIANTES_FONTSPEC.items():
+        if opcao == "UprightFont":
+            continue
+        variante = resolver_fonte(familia, peso_fc, inclinacao_fc)
+        # Path= vale para todas as variantes: só usamos as que estão no mesmo diretório
+        if variante and variante[0] != arquivo_regular and variante[0].parent == arquivo_regular.parent:
+            resolucao[opcao] = variante[0].name
+    return resolucao
+
+
+def resolver_fontes_latex(familias: List[str], cache_dir: Path) -> Optional[Dict[str, dict]]:
+    """
+    Resolve cada família para arquivos de fonte, uma vez por estado do fontconfig (cache em
+    `cache_dir`/fontes_latex.json). Retorna None se o fc-match não estiver disponível.
+    Levanta ValueError listando as famílias que não existem no sistema.
+    """
+    if not shutil.which("fc-match"):
+        return None
+    estado = estado_fontconfig()
+    caminho_cache = cache_dir / NOME_CACHE
+    cache = json.loads(caminho_cache.read_text(encoding="utf-8")) if caminho_cache.exists() else {}
+    resolvidas = cache.get("familias", {}) if cache.get("estado") == estado else {}
+
+    ausentes = []
+    for familia in familias:
+        if familia in resolvidas and Path(resolvidas[familia]["Path"], resolvidas[familia]["arquivo"]).exists():
+            continue
+        resolucao = _resolver_familia(familia)
+        if resolucao is None:
+            ausentes.append(familia)
+        else:
+            resolvidas[familia] = resolucao
+    if ausentes:
+        raise ValueError(f"Fonte(s) não instalada(s) (fc-match): {', '.join(ausentes)}")
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    caminho_cache.write_text(json.dumps({"estado": estado, "familias": resolvidas}, indent=2, ensure_ascii=False),
+                             encoding="utf-8")
+    return resolvidas
+
+
+def carregar_fontes_resolvidas(cache_dir: Path) -> Dict[str, dict]:
+    """Mapeamento família → arquivos da última resolução (sem consultar o fontconfig)."""
+    caminho_cache = cache_dir / NOME_CACHE
+    if not caminho_cache.exists():
+        return {}
+    return json.loads(caminho_cache.read_text(encoding="utf-8")).get("familias", {})
+
+
+def comando_fontspec(comando: str, familia: str, resolucao: Optional[dict]) -> str:
+    """
+    '\\setmainfont{Família}' ou, com a família resolvida, o arquivo explícito com Path= e as
+    variantes (o fontspec não precisa consultar o fontconfig a cada passo).
+    """
+    if not resolucao:
+        return f"\\{comando}{{{familia}}}"
+    opcoes = [f"Path={resolucao['Path']}"]
+    opcoes += [f"{opcao}={resolucao[opcao]}" for opcao in ("BoldFont", "ItalicFont", "BoldItalicFont") if opcao in resolucao]
+    if resolucao.get("indice"):
+        opcoes.append(f"FontIndex={resolucao['indice']}")
+    return f"\\{comando}{{{resolucao['arquivo']}}}[{', '.join(opcoes)}]"
@@ -3,6 +3,8 @@ import json
 from pathlib import Path
 from typing import Dict, Any
 
+from utils.modelo_estilos import gerar_css
+
 
 class GerenciadorEstilos:
     """Classe para gerenciar estilos unificados ODT/EPUB"""
@@ -28,32 +30,8 @@ class GerenciadorEstilos:
         return self.estilos[nome_estilo]["epub"]
 
     def gerar_css_completo(self) -> str:
-        """Gera CSS completo para EPUB"""
-        css_lines = []
-
-        # CSS global
-        css_global = self.config["configuracoes_globais"]["epub"]["css_global"]
-        for seletor, propriedades in css_global.items():
-            css_lines.append(f"{seletor} {{")
-            for prop, valor in propriedades.items():
-                css_lines.append(f"  {prop}: {valor};")
-            css_lines.append("}")
-            css_lines.append("")
-
-        # CSS dos estilos específicos
-        for nome_estilo, config in self.estilos.items():
-            epub_config = config["epub"]
-            seletor = epub_config["seletor"]
-            propriedades = epub_config["propriedades"]
-
-            css_lines.append(f"/* {nome_estilo} */")
-            css_lines.append(f"{seletor} {{")
-            for prop, valor in propriedades.items():
-                css_lines.append(f"  {prop}: {valor};")
-            css_lines.append("}")
-            css_lines.append("")
-
-        return "\n".join(css_lines)
+        """Gera CSS completo para EPUB (mesma geração do modelo compilado em utils/modelo_estilos.py)"""
+        return gerar_css(self.config)
 
     def obter_tag_semantica(self, nome_estilo: str) -> str:
         """Retorna tag HTML semântica para um estilo"""
@@ -0,0 +1,42 @@
+# utils/identificadores.py
+import re
+import unicodedata
+from typing import Dict, Iterable
+
+_ID_VALIDO = re.compile(r"^[a-z0-9][a-z0-9-]*$")
+
+
+def slug_identificador(texto: str) -> str:
+    """
+    Converte um nome de arquivo de origem em identificador estável para nomes de artefatos.
+    Ex: '1.2 Prólogo' → '1-2-prologo'.
+    """
+    texto = unicodedata.normalize("NFKD", texto)
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9]+", "-", texto.lower()).strip("-") or "sem-nome"
+
+
+def identificador_de_origem(stem_origem: str, ids_config: Dict[str, str] = None) -> str:
+    """
+    Identificador de um capítulo/parte: o declarado em config.json ("ids": {"<arquivo de origem>": "<id>"})
+    ou, na falta dele, o slug do nome do arquivo de origem. Não depende da posição no livro.
+    """
+    declarado = (ids_config or {}).get(stem_origem)
+    if declarado is None:
+        return slug_identificador(stem_origem)
+    if not _ID_VALIDO.match(declarado):
+        raise ValueError(
+            f"Id declarado para '{stem_origem}' inválido: '{declarado}' (use letras minúsculas, números e hífens)."
+        )
+    return declarado
+
+
+def verificar_ids_unicos(pares: Iterable[tuple]) -> None:
+    """Recebe (id, origem) e levanta ValueError se duas origens resultarem no mesmo id."""
+    vistos = {}
+    for id_, origem in pares:
+        if id_ in vistos and vistos[id_] != origem:
+            raise ValueError(
+                f"Id '{id_}' usado por '{vistos[id_]}' e '{origem}'. Declare ids distintos em config.json → \"ids\"."
+            )
+        vistos[id_] = origem
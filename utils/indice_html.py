@@ -0,0 +1,89 @@
+# utils/indice_html.py
+import hashlib
+import json
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, List
+
+from utils.cleaner import clean_title_for_output
+from utils.escrita_artefatos import EscritorArtefatos
+
+NOME_INDICE = "indice_html.json"
+
+
+def chave_titulo(titulo: str) -> str:
+    """
+    Forma normalizada de um título para comparação: limpo, sem acentos, pontuação,
+    marcação Markdown/HTML e diferenças de caixa ou espaçamento.
+    """
+    titulo = clean_title_for_output(re.sub(r"<[^>]+>", "", titulo))
+    titulo = unicodedata.normalize("NFKD", titulo)
+    titulo = "".join(c for c in titulo if not unicodedata.combining(c))
+    return " ".join(re.findall(r"\w+", titulo.casefold()))
+
+
+def entrada_indice(html_path: Path, titulo: str, conteudo: bytes) -> dict:
+    """Entrada do índice para um HTML recém-gerado (id estável = nome do arquivo de origem)."""
+    return {
+        "id": html_path.stem,
+        "titulo": clean_title_for_output(titulo),
+        "arquivo": html_path.name,
+        "bytes": len(conteudo),
+        "sha256": hashlib.sha256(conteudo).hexdigest(),
+    }
+
+
+def salvar_indice(html_dir: Path, entradas: List[dict], escritor: EscritorArtefatos = None) -> Path:
+    caminho = html_dir / NOME_INDICE
+    entradas = sorted(entradas, key=lambda e: e["id"])
+    (escritor or EscritorArtefatos()).escrever(caminho, json.dumps({"arquivos": entradas}, indent=2, ensure_ascii=False))
+    return caminho
+
+
+def _indexar_por_varredura(html_dir: Path) -> List[dict]:
+    """Fallback para diretórios gerados antes do índice: extrai o <h1> de cada HTML."""
+    entradas = []
+    for html_path in sorted(html_dir.glob("*.html")):
+        conteudo = html_path.read_bytes()
+        match = re.search(r"<h1[^>]*>(.*?)</h1>", conteudo.decode("utf-8"), re.IGNORECASE | re.DOTALL)
+        titulo = match.group(1).strip() if match else html_path.stem
+        entradas.append(entrada_indice(html_path, titulo, conteudo))
+    return entradas
+
+
+def carregar_indice(html_dir: Path) -> Dict[str, dict]:
+    """
+    Lê o índice do diretório e retorna {id: entrada}, com 'caminho' absoluto em cada
+    entrada. Sem índice (saídas antigas), varre os HTMLs como antes.
+    """
+    caminho = html_dir / NOME_INDICE
+    if caminho.exists():
+        entradas = json.loads(caminho.read_text(encoding="utf-8"))["arquivos"]
+    elif html_dir.exists():
+        print(f"⚠️ {NOME_INDICE} ausente em {html_dir}; varrendo os HTMLs (rode md_para_html.py para gerá-lo).")
+        entradas = _indexar_por_varredura(html_dir)
+    else:
+        return {}
+
+    indice = {}
+    for entrada in entradas:
+        entrada["caminho"] = html_dir / entrada["arquivo"]
+        indice[entrada["id"]] = entrada
+    return indice
+
+
+def indice_por_titulo(indice: Dict[str, dict]) -> Dict[str, dict]:
+    """
+    {chave_titulo: entrada} para JSONs sem arquivo de origem. Títulos que colidem ficam com
+    a primeira entrada (por id) e geram um aviso: só o id distingue esses capítulos.
+    """
+    por_titulo = {}
+    for id_, entrada in sorted(indice.items()):
+        chave = chave_titulo(entrada["titulo"])
+        if chave in por_titulo:
+            print(f"⚠️ Título '{entrada['titulo']}' repetido em '{por_titulo[chave]['id']}' e '{id_}'; "
+                  f"a busca por título usa '{por_titulo[chave]['id']}' (regenere o JSON para buscar pelo id).")
+            continue
+        por_titulo[chave] = entrada
+    return por_titulo
@@ -0,0 +1,88 @@
+# utils/jinja_env.py
+import hashlib
+import json
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, TemplateSyntaxError
+
+# Um ambiente por (raiz de templates, opções) em cada processo: templates compilados são reaproveitados
+_ambientes: Dict[Tuple[str, str], Environment] = {}
+
+
+def _descrever_valor(valor) -> str:
+    """
+    Representação estável entre processos. Funções (ex: o retorno de select_autoescape) são
+    descritas por módulo/nome e pelos valores capturados, nunca pelo repr com endereço de memória.
+    """
+    if callable(valor) and hasattr(valor, "__code__"):
+        capturados = {
+            nome: _descrever_valor(celula.cell_contents)
+            for nome, celula in zip(valor.__code__.co_freevars, valor.__closure__ or ())
+        }
+        return f"{valor.__module__}.{valor.__qualname__}{json.dumps(capturados, sort_keys=True)}"
+    return repr(valor)
+
+
+def _descrever_opcoes(opcoes: dict, configurar: Optional[Callable]) -> str:
+    """Texto estável das opções do ambiente (afetam o código compilado, logo a chave do cache)."""
+    descricao = {chave: _descrever_valor(valor) for chave, valor in sorted(opcoes.items())}
+    if configurar is not None:
+        descricao["configurar"] = _descrever_valor(configurar)
+    return json.dumps(descricao, sort_keys=True)
+
+
+def precompilar_templates(env: Environment, extensoes: Iterable[str] = None) -> int:
+    """
+    Compila todos os templates da raiz (ou só os terminados em `extensoes`).
+    Erros de sintaxe aparecem aqui, no início do build, e não no meio da renderização.
+    """
+    extensoes = tuple(extensoes) if extensoes else None
+    nomes = env.list_templates(filter_func=lambda nome: extensoes is None or nome.endswith(extensoes))
+    for nome in nomes:
+        try:
+            env.get_template(nome)
+        except TemplateSyntaxError as e:
+            print(f"❌ Erro de sintaxe no template '{e.filename or nome}', linha {e.lineno}: {e.message}")
+            raise
+    return len(nomes)
+
+
+def criar_ambiente(templates_dir: Path, cache_dir: Optional[Path] = None,
+                   configurar: Optional[Callable[[Environment], Environment]] = None,
+                   precompilar: Iterable[str] = (), **opcoes) -> Environment:
+    """
+    Ambiente Jinja compartilhado para `templates_dir`.
+
+    - Chamadas repetidas com a mesma raiz e as mesmas opções devolvem o mesmo ambiente.
+    - Com `cache_dir`, o bytecode compilado persiste em disco (FileSystemBytecodeCache)
+      entre processos; o Jinja invalida entradas cujo template mudou.
+    - `configurar` registra filtros/globais antes de qualquer compilação.
+    - `precompilar` lista as extensões dos templates compilados já na criação.
+    """
+    templates_dir = Path(templates_dir).resolve()
+    descricao = _descrever_opcoes(opcoes, configurar)
+    chave = (str(templates_dir), descricao)
+    if chave in _ambientes:
+        return _ambientes[chave]
+
+    bytecode_cache = None
+    if cache_dir is not None:
+        # Opções diferentes (autoescape, trim_blocks...) geram código diferente para o mesmo arquivo
+        subdir = Path(cache_dir) / hashlib.sha256(descricao.encode("utf-8")).hexdigest()[:16]
+        subdir.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(str(subdir))
+
+    env = Environment(
+        loader=FileSystemLoader(str(templates_dir)),
+        bytecode_cache=bytecode_cache,
+        auto_reload=False,
+        **opcoes
+    )
+    if configurar is not None:
+        env = configurar(env)
+    if precompilar:
+        precompilar_templates(env, precompilar)
+
+    _ambientes[chave] = env
+    return env
@@ -0,0 +1,216 @@
+# utils/markdown_latex.py
+import re
+from typing import List, Optional
+
+from utils.filters import escapar_texto_latex
+
+# Construções que o renderizador nativo não cobre: o bloco inteiro vai para o pandoc
+_NAO_SUPORTADO = [
+    re.compile(r"^\s*(```|~~~)"),              # blocos de código
+    re.compile(r"^\s*\|"),                      # tabelas
+    re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$"),  # linha horizontal
+    re.compile(r"!\["),                         # imagens
+    re.compile(r"\[\^"),                        # notas de rodapé
+    re.compile(r"\]\s*\["),                     # links por referência
+    re.compile(r"\]\(#"),                        # links internos (o pandoc gera \hyperlink)
+    re.compile(r"<[a-zA-Z/!]"),                 # HTML e autolinks
+    re.compile(r"\\[a-zA-Z]"),                  # LaTeX cru (o pandoc repassa comandos)
+    re.compile(r"\$[^\s$][^$]*\$"),             # matemática
+    re.compile(r"\{[#.][^}]*\}\s*$"),           # atributos {#id .classe}
+]
+_TITULOS = ["section", "subsection", "subsubsection", "paragraph", "subparagraph", "subparagraph"]
+_CARACTERES_TIPOGRAFICOS = {"—": "---", "–": "--", "…": "\\ldots{}", "“": "``", "”": "''", "‘": "`", "’": "'"}
+_PONTUACAO_ESCAPAVEL = set("\\`*_{}[]()#+-.!>\"'|~$%&^")
+
+
+class ConstrucaoNaoSuportada(Exception):
+    """Sinaliza que o bloco deve ser convertido pelo pandoc."""
+
+
+def _literal(texto: str) -> str:
+    """Texto puro → LaTeX: escapes + tipografia equivalente à extensão 'smart' do pandoc."""
+    partes = []
+    anterior = " "
+    for caractere in texto:
+        if caractere == '"':
+            partes.append("``" if anterior.isspace() or anterior in "([{" else "''")
+        elif caractere == "'" and (anterior.isspace() or anterior in "([{"):
+            partes.append("`")
+        elif caractere in _CARACTERES_TIPOGRAFICOS:
+            partes.append(_CARACTERES_TIPOGRAFICOS[caractere])
+        else:
+            partes.append(escapar_texto_latex(caractere))
+        anterior = caractere
+    return "".join(partes).replace("...", "\\ldots{}")
+
+
+def _fechamento(texto: str, inicio: int, delimitador: str) -> int:
+    """Posição do delimitador de fechamento da ênfase iniciada em `inicio`, ou -1."""
+    if inicio >= len(texto) or texto[inicio].isspace():
+        return -1
+    posicao = inicio
+    while True:
+        posicao = texto.find(delimitador, posicao)
+        if posicao == -1:
+            return -1
+        fim = posicao + len(delimitador)
+        seguinte = texto[fim] if fim < len(texto) else " "
+        if not texto[posicao - 1].isspace() and posicao > inicio and texto[posicao - 1] != "\\":
+            # '_' só fecha fora de palavras (intraword_underscores); '*' não pode fazer parte de '**'
+            if delimitador[0] == "_" and seguinte.isalnum():
+                posicao = fim
+                continue
+            if seguinte == delimitador[0] and len(delimitador) < 3:
+                posicao = fim + 1
+                continue
+            return posicao
+        posicao = fim
+
+
+def renderizar_inline(texto: str) -> str:
+    """Ênfase (*, **, ***, _, __), código, links [texto](url) e escapes com '\\'."""
+    saida = []
+    literal = []
+    i = 0
+
+    def descarregar():
+        if literal:
+            saida.append(_literal("".join(literal)))
+            literal.clear()
+
+    while i < len(texto):
+        c = texto[i]
+        if c == "\\" and i + 1 < len(texto) and texto[i + 1] in _PONTUACAO_ESCAPAVEL:
+            literal.append(texto[i + 1])
+            i += 2
+            continue
+        if c == "`":
+            fim = texto.find("`", i + 1)
+            if fim != -1:
+                descarregar()
+                saida.append(f"\\texttt{{{escapar_texto_latex(texto[i + 1:fim])}}}")
+                i = fim + 1
+                continue
+        if c == "[":
+            match = re.match(r"\[([^\]]+)\]\(([^)\s]+)\)", texto[i:])
+            if match:
+                descarregar()
+                url = re.sub(r"([%#\\{}])", r"\\\1", match.group(2))
+                saida.append(f"\\href{{{url}}}{{{renderizar_inline(match.group(1))}}}")
+                i += match.end()
+                continue
+        if c in "*_":
+            anterior = texto[i - 1] if i > 0 else " "
+            tamanho = len(texto[i:]) - len(texto[i:].lstrip(c))
+            tamanho = min(tamanho, 3)
+            if c == "_" and anterior.isalnum():
+                literal.append(c * tamanho)
+                i += tamanho
+                continue
+            delimitador = c * tamanho
+            fim = _fechamento(texto, i + tamanho, delimitador)
+            if fim != -1:
+                descarregar()
+                interno = renderizar_inline(texto[i + tamanho:fim])
+                if tamanho == 1:
+                    saida.append(f"\\emph{{{interno}}}")
+                elif tamanho == 2:
+                    saida.append(f"\\textbf{{{interno}}}")
+                else:
+                    saida.append(f"\\textbf{{\\emph{{{interno}}}}}")
+                i = fim + tamanho
+                continue
+            literal.append(delimitador)
+            i += tamanho
+            continue
+        literal.append(c)
+        i += 1
+
+    descarregar()
+    return "".join(saida)
+
+
+def _tipo_do_bloco(linha: str) -> str:
+    if re.match(r"^#{1,6}\s", linha):
+        return "titulo"
+    if re.match(r"^[-*+]\s+", linha):
+        return "lista"
+    if re.match(r"^1[.)]\s+", linha):
+        return "lista_numerada"
+    if linha.startswith(">"):
+        return "citacao"
+    return "paragrafo"
+
+
+def _verificar_suporte(linha: str) -> None:
+    for padrao in _NAO_SUPORTADO:
+        if padrao.search(linha):
+            raise ConstrucaoNaoSuportada(linha)
+
+
+def markdown_para_latex(markdown_text: str) -> Optional[str]:
+    """
+    Converte o Markdown de 'corpo_do_texto' para LaTeX sem processos externos.
+
+    Cobre parágrafos, ênfase, código inline, links, listas (com marcadores e numeradas),
+    citações e títulos. Retorna None se encontrar uma construção não suportada, para que
+    o chamador use o pandoc. A saída é determinística (mesma entrada, mesmo texto).
+    """
+    blocos = [b.strip("\n") for b in re.split(r"\n\s*\n", markdown_text) if b.strip()]
+    # (tipo, linhas) com blocos consecutivos de lista/citação agrupados em um único ambiente
+    grupos: List[tuple] = []
+    try:
+        for bloco in blocos:
+            linhas = [linha.strip() for linha in bloco.splitlines()]
+            tipo = _tipo_do_bloco(linhas[0])
+            if tipo == "paragrafo" and re.match(r"^\d+[.)]\s", linhas[0]):
+                if not (grupos and grupos[-1][0] == "lista_numerada"):
+                    return None  # Lista numerada que não começa em 1
+                tipo = "lista_numerada"
+            for linha in linhas:
+                _verificar_suporte(linha)
+            if grupos and grupos[-1][0] == tipo and tipo in ("lista", "lista_numerada", "citacao"):
+                grupos[-1][1].append(linhas)
+            else:
+                grupos.append((tipo, [linhas]))
+    except ConstrucaoNaoSuportada:
+        return None
+
+    saida = []
+    for tipo, conjunto in grupos:
+        if tipo == "titulo":
+            for linhas in conjunto:
+                match = re.match(r"^(#{1,6})\s+(.*?)\s*#*$", linhas[0])
+                nivel = len(match.group(1))
+                saida.append(f"\\{_TITULOS[nivel - 1]}{{{renderizar_inline(match.group(2))}}}")
+        elif tipo in ("lista", "lista_numerada"):
+            ambiente = "itemize" if tipo == "lista" else "enumerate"
+            itens = [f"\\begin{{{ambiente}}}"]
+            if tipo == "lista_numerada":
+                # Rótulo com o delimitador dos marcadores ('1.' ou '1)'), como o pandoc
+                delimitadores = {match.group(1) for linhas in conjunto for linha in linhas
+                                 for match in [re.match(r"^\d+([.)])\s", linha)] if match}
+                if len(delimitadores) != 1:
+                    return None  # Delimitadores misturados: o pandoc divide em várias listas
+                itens.append(f"\\def\\labelenumi{{\\arabic{{enumi}}{delimitadores.pop()}}}")
+            for linhas in conjunto:
+                item = []
+                for linha in linhas:
+                    marcador = re.match(r"^([-*+]|\d+[.)])\s+", linha)
+                    if marcador and item:
+                        itens.append(f"\\item\n  {renderizar_inline(' '.join(item))}")
+                        item = []
+                    item.append(linha[marcador.end():] if marcador else linha)
+                itens.append(f"\\item\n  {renderizar_inline(' '.join(item))}")
+            itens.append(f"\\end{{{ambiente}}}")
+            saida.append("\n".join(itens))
+        elif tipo == "citacao":
+            paragrafos = [
+                renderizar_inline(" ".join(re.sub(r"^>\s?", "", linha) for linha in linhas))
+                for linhas in conjunto
+            ]
+            saida.append("\\begin{quote}\n" + "\n\n".join(paragrafos) + "\n\\end{quote}")
+        else:
+            for linhas in conjunto:
+                saida.append(renderizar_inline(" ".join(linhas)))
+    return "\n\n".join(saida)
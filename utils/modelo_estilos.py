@@ -0,0 +1,366 @@
+# utils/modelo_estilos.py
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+from xml.sax.saxutils import quoteattr
+
+from utils.escrita_artefatos import EscritorArtefatos
+
+# Muda quando a compilação muda: modelos em cache de versões anteriores são ignorados
+VERSAO_COMPILADOR = 1
+
+_FATORES_PARA_PT = {"pt": 1.0, "cm": 72 / 2.54, "mm": 72 / 25.4, "in": 72.0, "pc": 12.0, "px": 0.75}
+_PADRAO_DIMENSAO = re.compile(r"^\s*(-?[0-9]*\.?[0-9]+)\s*(pt|cm|mm|in|pc|px|em|%)?\s*$")
+_PADRAO_COR = re.compile(r"^#?([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$")
+
+# Alinhamentos do estilo_livro.json (em português) → valores de fo:text-align
+_ALINHAMENTOS_ODT = {
+    "justificado": "justify", "centro": "center", "esquerda": "start", "direita": "end",
+    "justify": "justify", "center": "center", "left": "start", "right": "end", "start": "start", "end": "end",
+}
+
+# Papéis usados pelo renderizador FODT → estilo do estilo_livro.json.
+# Sobrescrevíveis em configuracoes_globais.odt.papeis; um estilo com o próprio nome do papel tem prioridade.
+PAPEIS_ODT_PADRAO = {
+    "TITULO1": "CHAPTER_TITLE",
+    "TITULO2": "HEADING_2",
+    "TITULO3": "HEADING_3",
+    "DESTAQUE": "STRONG",
+    "CITACAO": "QUOTE_BLOCK",
+    "CORPO_DO_TEXTO": "BODY_TEXT",
+}
+
+# Cores sempre definidas no preâmbulo LaTeX (usadas pelos templates)
+_CORES_LATEX_PADRAO = {"text_gray": "333333", "DarkBlueHeading": "000080"}
+
+
+class Dimensao(NamedTuple):
+    valor: float
+    unidade: str
+
+    def em(self, unidade: str) -> float:
+        """Converte para `unidade` (pt, cm, mm, in, pc, px); em e % não são absolutas."""
+        if self.unidade == unidade:
+            return self.valor
+        if self.unidade not in _FATORES_PARA_PT or unidade not in _FATORES_PARA_PT:
+            raise ValueError(f"Não é possível converter {self} para {unidade}")
+        return round(self.valor * _FATORES_PARA_PT[self.unidade] / _FATORES_PARA_PT[unidade], 4)
+
+    def __str__(self) -> str:
+        return f"{self.valor:g}{self.unidade}"
+
+
+def ler_dimensao(valor, unidade_padrao: str = "pt") -> Dimensao:
+    """'2.5cm' → Dimensao(2.5, 'cm'); números sem unidade usam `unidade_padrao`."""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return Dimensao(float(valor), unidade_padrao)
+    match = _PADRAO_DIMENSAO.match(str(valor))
+    if not match:
+        raise ValueError(f"Dimensão inválida: '{valor}'")
+    return Dimensao(float(match.group(1)), match.group(2) or unidade_padrao)
+
+
+def ler_cor(valor: str) -> str:
+    """'#1A202C', '1a202c' ou '#abc' → '1a202c' (hex minúsculo, 6 dígitos, sem '#')."""
+    match = _PADRAO_COR.match(str(valor).strip())
+    if not match:
+        raise ValueError(f"Cor inválida: '{valor}' (use #RRGGBB)")
+    hexa = match.group(1).lower()
+    return "".join(c * 2 for c in hexa) if len(hexa) == 3 else hexa
+
+
+def gerar_css(config: dict) -> str:
+    """CSS do EPUB: css_global e, em seguida, o bloco 'epub' de cada estilo."""
+    css_lines = []
+
+    css_global = config.get("configuracoes_globais", {}).get("epub", {}).get("css_global", {})
+    for seletor, propriedades in css_global.items():
+        css_lines.append(f"{seletor} {{")
+        for prop, valor in propriedades.items():
+            css_lines.append(f"  {prop}: {valor};")
+        css_lines.append("}")
+        css_lines.append("")
+
+    for nome_estilo, estilo in config.get("estilos", {}).items():
+        epub_config = estilo.get("epub")
+        if not epub_config:
+            continue
+        css_lines.append(f"/* {nome_estilo} */")
+        css_lines.append(f"{epub_config['seletor']} {{")
+        for prop, valor in epub_config.get("propriedades", {}).items():
+            css_lines.append(f"  {prop}: {valor};")
+        css_lines.append("}")
+        css_lines.append("")
+
+    return "\n".join(css_lines)
+
+
+def _compilar_estilo_odt(chave: str, odt: dict, nomes_existentes: set, erros: List[str]) -> dict:
+    """Bloco 'odt' de um estilo → atributos ODF prontos (fo:*, style:*), com unidades e cores validadas."""
+    paragrafo, texto = {}, {}
+    pai = odt.get("base_estilo")
+    if pai and pai not in nomes_existentes:
+        erros.append(f"{chave}: base_estilo '{pai}' não corresponde a nenhum nome_estilo")
+
+    # Estilos sem base mantêm os valores padrão de antes (fonte, tamanho, cor e margens explícitos)
+    padroes = {} if pai else {"fonte": "Liberation Serif", "tamanho": "12pt", "cor": "#000000",
+                              "margem_superior": "0pt", "margem_inferior": "0pt"}
+    odt = {**padroes, **odt}
+
+    dimensoes_paragrafo = {
+        "margem_superior": "fo:margin-top", "margem_inferior": "fo:margin-bottom",
+        "margem_esquerda": "fo:margin-left", "margem_direita": "fo:margin-right",
+        "indentacao_esquerda": "fo:margin-left", "indentacao_primeira_linha": "fo:text-indent",
+        "altura_linha": "fo:line-height", "altura_minima_linha": "style:line-height-at-least",
+    }
+    for campo, atributo in dimensoes_paragrafo.items():
+        if campo in odt:
+            try:
+                paragrafo[atributo] = str(ler_dimensao(odt[campo]))
+            except ValueError as e:
+                erros.append(f"{chave}.{campo}: {e}")
+
+    if "alinhamento" in odt:
+        alinhamento = _ALINHAMENTOS_ODT.get(str(odt["alinhamento"]).lower())
+        if alinhamento is None:
+            erros.append(f"{chave}.alinhamento: valor desconhecido '{odt['alinhamento']}'")
+        elif alinhamento != "start":
+            paragrafo["fo:text-align"] = alinhamento
+    if odt.get("manter_com_proximo"):
+        paragrafo["fo:keep-with-next"] = "always"
+    if odt.get("manter_junto"):
+        paragrafo["fo:keep-together"] = "always"
+    if odt.get("quebra_antes"):
+        paragrafo["fo:break-before"] = odt["quebra_antes"]
+
+    if "fonte" in odt:
+        texto["style:font-name"] = odt["fonte"]
+    if "tamanho" in odt:
+        try:
+            texto["fo:font-size"] = f"{ler_dimensao(odt['tamanho']).em('pt'):g}pt"
+        except ValueError as e:
+            erros.append(f"{chave}.tamanho: {e}")
+    for campo, atributo in (("cor", "fo:color"), ("cor_fundo", "fo:background-color")):
+        if campo in odt:
+            try:
+                texto[atributo] = "#" + ler_cor(odt[campo])
+            except ValueError as e:
+                erros.append(f"{chave}.{campo}: {e}")
+    negrito = odt.get("negrito", False)
+    if negrito:
+        texto["fo:font-weight"] = "bold" if negrito is True else str(negrito)
+    if odt.get("italico"):
+        texto["fo:font-style"] = "italic"
+    if odt.get("sublinhado"):
+        texto["style:text-underline-style"] = "solid"
+    if odt.get("letras_maiusculas"):
+        texto["fo:text-transform"] = "uppercase"
+    if "espacamento_letras" in odt:
+        try:
+            texto["fo:letter-spacing"] = str(ler_dimensao(odt["espacamento_letras"]))
+        except ValueError as e:
+            erros.append(f"{chave}.espacamento_letras: {e}")
+    if odt.get("posicao_texto") in ("sub", "super"):
+        texto["style:text-position"] = f"{odt['posicao_texto']} 58%"
+
+    return {"nome_estilo": odt.get("nome_estilo", chave), "pai": pai, "paragrafo": paragrafo, "texto": texto}
+
+
+def _xml_estilo_odt(estilo: dict) -> str:
+    def atributos(props: dict) -> str:
+        return "".join(f"\n            {nome}={quoteattr(valor)}" for nome, valor in props.items())
+
+    pai = f" style:parent-style-name={quoteattr(estilo['pai'])}" if estilo["pai"] else ""
+    return (
+        f'\n    <style:style style:name={quoteattr(estilo["nome_estilo"])} style:family="paragraph"{pai}>'
+        f"\n        <style:paragraph-properties{atributos(estilo['paragrafo'])}/>"
+        f"\n        <style:text-properties{atributos(estilo['texto'])}/>"
+        f"\n    </style:style>"
+    )
+
+
+def _compilar_latex(config: dict, erros: List[str]) -> dict:
+    """
+    Valores do preâmbulo LaTeX (mesma estrutura que os templates tex esperam em 'styles'),
+    com dimensões convertidas para a unidade usada em cada comando.
+    """
+    def dimensao(origem: dict, campo: str, padrao: str, unidade: str) -> float:
+        try:
+            return ler_dimensao(origem.get(campo, padrao), unidade).em(unidade)
+        except ValueError as e:
+            erros.append(f"{campo}: {e}")
+            return ler_dimensao(padrao, unidade).em(unidade)
+
+    p_def = config.get("paragraph_default", {})
+    h1_def = config.get("heading_1", {})
+    latex = {
+        "paragraph_default": {
+            "font-size": dimensao(p_def, "font-size", "10pt", "pt"),
+            "text-indent": dimensao(p_def, "text-indent", "0.5cm", "cm"),
+            "line-height": float(p_def.get("line-height", "1.2")),
+            "margin-bottom": dimensao(p_def, "margin-bottom", "0.2cm", "cm"),
+            "font-family": p_def.get("font-family", "Latin Modern Roman"),
+            "color": p_def.get("color", "text_gray"),
+        },
+        "heading_1": {
+            "font-size": dimensao(h1_def, "font-size", "24pt", "pt"),
+            "line-spacing": round(dimensao(h1_def, "line-spacing", "28.8pt", "pt"), 2),
+            "font-family": h1_def.get("font-family", "Latin Modern Sans"),
+            "color": h1_def.get("color", "DarkBlueHeading"),
+            "margin-top": dimensao(h1_def, "margin-top", "1cm", "cm"),
+            "margin-bottom": dimensao(h1_def, "margin-bottom", "0.5cm", "cm"),
+        },
+        "document_margins_cm": dimensao(config, "document_margins", "2.5cm", "cm"),
+        "document_settings": config.get("document_settings", {}),
+    }
+
+    cores = {}
+    metadata = config.get("metadata", {})
+    for grupo in ("cores_texto", "cores_fundo_destaque", "cores_borda_destaque"):
+        for nome, valor in metadata.get(grupo, {}).items():
+            try:
+                cores[nome] = ler_cor(valor)
+            except ValueError as e:
+                erros.append(f"metadata.{grupo}.{nome}: {e}")
+    for nome, valor in _CORES_LATEX_PADRAO.items():
+        cores.setdefault(nome, valor)
+    latex["colors"] = cores
+    latex["custom_color_definitions"] = "\n".join(
+        f"\\definecolor{{{nome}}}{{HTML}}{{{valor}}}" for nome, valor in cores.items()
+    )
+
+    # Trechos que o styles.tex gerado deve conter: base do debug_latex_styles e do verify_latex_output
+    p, h1 = latex["paragraph_default"], latex["heading_1"]
+    latex["fragmentos"] = (
+        [[f"Cor '{nome}'", f"\\definecolor{{{nome}}}{{HTML}}{{{valor}}}"] for nome, valor in cores.items()]
+        + [
+            ["Fonte principal", f"\\setmainfont{{{p['font-family']}}}"],
+            ["Fonte sans-serif", f"\\setsansfont{{{h1['font-family']}}}"],
+            ["Tamanho do título H1", f"\\fontsize{{{h1['font-size']}pt}}{{{h1['line-spacing']}pt}}\\selectfont"],
+            ["Margens do título H1", f"\\titlespacing*{{\\section}}{{0pt}}{{{h1['margin-top']}cm}}{{{h1['margin-bottom']}cm}}"],
+            ["Indentação de parágrafo", f"\\setlength{{\\parindent}}{{{p['text-indent']}cm}}"],
+            ["Espaço entre parágrafos", f"\\setlength{{\\parskip}}{{{p['margin-bottom']}cm}}"],
+            ["Comando \\paragraphbreak", f"\\DeclareRobustCommand{{\\paragraphbreak}}{{\\vspace{{{p['margin-bottom']}cm}}\\noindent}}"],
+        ]
+    )
+    return latex
+
+
+def compilar_estilos(config: dict, origem: str = "") -> dict:
+    """
+    Valida e compila a configuração de estilos (estrutura do estilo_livro.json) em um modelo
+    serializável com CSS, valores do preâmbulo LaTeX e XML de estilos ODT.
+    Levanta ValueError listando todos os problemas encontrados.
+    """
+    erros: List[str] = []
+    estilos = config.get("estilos", {})
+    if not isinstance(estilos, dict):
+        raise ValueError(f"Estilos inválidos em {origem}: 'estilos' deve ser um objeto")
+
+    for chave, estilo in estilos.items():
+        epub = estilo.get("epub")
+        if epub is not None and "seletor" not in epub:
+            erros.append(f"{chave}.epub: 'seletor' ausente")
+
+    nomes = {estilo.get("odt", {}).get("nome_estilo", chave) for chave, estilo in estilos.items()}
+    estilos_odt = {
+        chave: _compilar_estilo_odt(chave, estilo["odt"], nomes, erros)
+        for chave, estilo in estilos.items() if "odt" in estilo
+    }
+    latex = _compilar_latex(config, erros)
+
+    if erros:
+        raise ValueError(f"Estilos inválidos em {origem}:\n" + "\n".join(f"  - {erro}" for erro in erros))
+
+    papeis_config = {**PAPEIS_ODT_PADRAO, **config.get("configuracoes_globais", {}).get("odt", {}).get("papeis", {})}
+    papeis = {}
+    for papel, chave in papeis_config.items():
+        chave = papel if papel in estilos_odt else chave
+        if chave in estilos_odt:
+            papeis[papel] = estilos_odt[chave]["nome_estilo"]
+
+    return {
+        "versao": VERSAO_COMPILADOR,
+        "origem": origem,
+        "metadata": config.get("metadata", {}),
+        "css": gerar_css(config),
+        "latex": latex,
+        "odt": {
+            "estilos": estilos_odt,
+            "papeis": papeis,
+            "xml": "\n".join(_xml_estilo_odt(estilo) for estilo in estilos_odt.values()),
+        },
+    }
+
+
+class ModeloEstilos:
+    """Modelo de estilos compilado: uma resolução por build, consumida por EPUB, LaTeX e FODT."""
+
+    def __init__(self, dados: dict, sha256: str = ""):
+        self.dados = dados
+        self.sha256 = sha256
+
+    @property
+    def metadata(self) -> dict:
+        return self.dados["metadata"]
+
+    @property
+    def css(self) -> str:
+        return self.dados["css"]
+
+    @property
+    def latex(self) -> dict:
+        return self.dados["latex"]
+
+    @property
+    def fragmentos_latex(self) -> List[List[str]]:
+        return self.dados["latex"]["fragmentos"]
+
+    @property
+    def estilos_odt(self) -> Dict[str, dict]:
+        return self.dados["odt"]["estilos"]
+
+    @property
+    def papeis_odt(self) -> Dict[str, str]:
+        return self.dados["odt"]["papeis"]
+
+    @property
+    def xml_odt(self) -> str:
+        return self.dados["odt"]["xml"]
+
+
+def localizar_estilos(projeto_dir: Path) -> Optional[Path]:
+    """estilos/estilo_livro.json do projeto; o antigo estilos.json (só FODT) como alternativa."""
+    for candidato in (projeto_dir / "estilos" / "estilo_livro.json", projeto_dir / "estilos.json"):
+        if candidato.exists():
+            return candidato
+    return None
+
+
+def carregar_modelo_estilos(projeto_dir: Path, usar_cache: bool = True) -> ModeloEstilos:
+    """
+    Modelo compilado dos estilos do projeto, lido de cache/estilos/<hash>.json quando o arquivo
+    de estilos (e a versão do compilador) não mudou. Sem arquivo de estilos, usa apenas os padrões.
+    Levanta ValueError se o arquivo for JSON inválido ou não passar na validação.
+    """
+    caminho = localizar_estilos(projeto_dir)
+    dados_brutos = caminho.read_bytes() if caminho else b"{}"
+    sha256 = hashlib.sha256(dados_brutos + f":{VERSAO_COMPILADOR}".encode("ascii")).hexdigest()
+    caminho_cache = projeto_dir / "cache" / "estilos" / f"{sha256[:16]}.json"
+
+    if usar_cache and caminho_cache.exists():
+        return ModeloEstilos(json.loads(caminho_cache.read_text(encoding="utf-8")), sha256)
+
+    try:
+        config = json.loads(dados_brutos.decode("utf-8"))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON inválido em {caminho}: {e}") from e
+    if caminho is not None and caminho.name == "estilos.json":
+        config = {"estilos": config}  # formato antigo: os estilos na raiz do arquivo
+
+    dados = compilar_estilos(config, str(caminho) if caminho else "")
+    if usar_cache:
+        EscritorArtefatos().escrever(caminho_cache, json.dumps(dados, indent=2, ensure_ascii=False))
+    return ModeloEstilos(dados, sha256)
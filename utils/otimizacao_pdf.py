@@ -0,0 +1,149 @@
+# utils/otimizacao_pdf.py
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+from utils.build_reprodutivel import modo_reprodutivel
+
+try:
+    import pikepdf
+except ImportError:
+    pikepdf = None
+
+NOME_INDICE = "indice.json"
+_CHAVES_FONTFILE = ("/FontFile", "/FontFile2", "/FontFile3")
+
+
+def hash_pdf(caminho: Path) -> str:
+    return hashlib.sha256(caminho.read_bytes()).hexdigest()
+
+
+def backend_disponivel() -> Optional[Tuple[str, str]]:
+    """
+    (nome, versão) da ferramenta local usada na otimização: pikepdf (também deduplica
+    imagens e fontes) ou o CLI do qpdf. None se nenhuma estiver instalada.
+    """
+    if pikepdf is not None:
+        return "pikepdf", pikepdf.__version__
+    if shutil.which("qpdf"):
+        versao = subprocess.run(["qpdf", "--version"], capture_output=True, text=True)
+        return "qpdf", (versao.stdout.splitlines() or ["?"])[0].strip()
+    return None
+
+
+def _deduplicar_streams(pdf) -> int:
+    """
+    Faz todas as páginas apontarem para uma única cópia de cada imagem e de cada arquivo de
+    fonte embutido (mesmos bytes e mesmo dicionário); as cópias sem referência somem ao salvar.
+    """
+    canonicos = {}
+    trocas = 0
+
+    def canonico(stream):
+        dicionario = {chave: valor for chave, valor in stream.stream_dict.items() if chave != "/Length"}
+        chave = hashlib.sha256(stream.read_raw_bytes() + pikepdf.Dictionary(dicionario).unparse()).hexdigest()
+        return canonicos.setdefault(chave, stream)
+
+    def descritores(fonte):
+        if "/FontDescriptor" in fonte:
+            yield fonte.FontDescriptor
+        for descendente in fonte.get("/DescendantFonts", []):
+            if "/FontDescriptor" in descendente:
+                yield descendente.FontDescriptor
+
+    for pagina in pdf.pages:
+        recursos = pagina.obj.get("/Resources")
+        if recursos is None:
+            continue
+        xobjects = recursos.get("/XObject", {})
+        for nome in list(xobjects.keys()):
+            xobject = xobjects[nome]
+            if xobject.get("/Subtype") != "/Image":
+                continue
+            original = canonico(xobject)
+            if original.objgen != xobject.objgen:
+                xobjects[nome] = original
+                trocas += 1
+        for fonte in recursos.get("/Font", {}).values():
+            for descritor in descritores(fonte):
+                for chave in _CHAVES_FONTFILE:
+                    if chave not in descritor:
+                        continue
+                    original = canonico(descritor[chave])
+                    if original.objgen != descritor[chave].objgen:
+                        descritor[chave] = original
+                        trocas += 1
+    return trocas
+
+
+def _otimizar_com_pikepdf(entrada: Path, saida: Path) -> int:
+    with pikepdf.open(entrada) as pdf:
+        trocas = _deduplicar_streams(pdf)
+        pdf.remove_unreferenced_resources()
+        pdf.save(
+            saida,
+            linearize=True,
+            object_stream_mode=pikepdf.ObjectStreamMode.generate,
+            compress_streams=True,
+            recompress_flate=True,
+            deterministic_id=modo_reprodutivel(),
+        )
+    return trocas
+
+
+def _otimizar_com_qpdf(entrada: Path, saida: Path) -> int:
+    comando = ["qpdf", "--linearize", "--object-streams=generate", "--compress-streams=y",
+               "--recompress-flate", "--compression-level=9"]
+    if modo_reprodutivel():
+        comando.append("--deterministic-id")
+    resultado = subprocess.run(comando + [str(entrada), str(saida)], capture_output=True, text=True)
+    # Código 3: concluído com avisos (PDF de saída válido)
+    if resultado.returncode not in (0, 3):
+        raise RuntimeError(f"qpdf falhou ({resultado.returncode}): {resultado.stderr.strip()}")
+    return 0
+
+
+def otimizar_pdf(pdf_path: Path, cache_dir: Path, backend: Tuple[str, str], forcar: bool = False) -> str:
+    """
+    Linearização (fast web view), object streams e recompressão do PDF, no próprio arquivo.
+
+    Resultados ficam em `cache_dir` por hash do PDF de entrada + ferramenta/versão; um PDF que
+    já é a saída de uma otimização não é processado de novo. Retorna "otimizado", "cache" ou
+    "inalterado".
+    """
+    indice_path = cache_dir / NOME_INDICE
+    indice = json.loads(indice_path.read_text(encoding="utf-8")) if indice_path.exists() else {}
+    ferramenta = f"{backend[0]} {backend[1]}"
+    hash_entrada = hash_pdf(pdf_path)
+
+    if not forcar and any(registro["saida"] == hash_entrada for registro in indice.values()):
+        return "inalterado"
+
+    chave = hashlib.sha256(f"{hash_entrada}:{ferramenta}:{modo_reprodutivel()}".encode("utf-8")).hexdigest()
+    registro = indice.get(chave)
+    em_cache = cache_dir / f"{registro['saida']}.pdf" if registro else None
+    if forcar or em_cache is None or not em_cache.exists():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+            saida_tmp = Path(tmp) / pdf_path.name
+            otimizar = _otimizar_com_pikepdf if backend[0] == "pikepdf" else _otimizar_com_qpdf
+            trocas = otimizar(pdf_path, saida_tmp)
+            hash_saida = hash_pdf(saida_tmp)
+            em_cache = cache_dir / f"{hash_saida}.pdf"
+            os.replace(saida_tmp, em_cache)
+        indice[chave] = {"saida": hash_saida, "ferramenta": ferramenta, "duplicatas_removidas": trocas}
+        indice_path.write_text(json.dumps(indice, indent=2, sort_keys=True), encoding="utf-8")
+        status = "otimizado"
+    else:
+        status = "cache"
+
+    # Substituição atômica: quem baixa nunca vê um PDF pela metade
+    destino_tmp = pdf_path.with_name(f".{pdf_path.name}.tmp")
+    shutil.copyfile(em_cache, destino_tmp)
+    os.replace(destino_tmp, pdf_path)
+    return status
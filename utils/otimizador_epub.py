@@ -0,0 +1,275 @@
+# utils/otimizador_epub.py
+import re
+from html.parser import HTMLParser
+from typing import Iterable, List, Set, Tuple, Union
+
+# Blocos cujo espaço em branco é significativo e não pode ser tocado
+_PROTEGIDOS = re.compile(r"<(pre|textarea|script|style)\b[^>]*>.*?</\1\s*>", re.DOTALL | re.IGNORECASE)
+# Elementos de bloco: o espaço em branco ao redor deles não aparece na renderização
+_TAGS_BLOCO = {
+    "html", "head", "body", "title", "meta", "link", "section", "article", "nav", "header", "footer",
+    "main", "aside", "div", "p", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "dl", "dt", "dd",
+    "blockquote", "figure", "figcaption", "table", "thead", "tbody", "tfoot", "tr", "td", "th", "hr", "br",
+}
+# Seletores que sempre casam com algo em um XHTML de capítulo
+_TAGS_SEMPRE_PRESENTES = {"html", "head", "body", "*"}
+# At-rules mantidas integralmente (não dependem do conteúdo dos documentos)
+_AT_RULES_AGRUPADORAS = ("@media", "@supports", "@document")
+
+
+class _ColetorDeSeletores(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.tags: Set[str] = set()
+        self.classes: Set[str] = set()
+        self.ids: Set[str] = set()
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.add(tag.lower())
+        for nome, valor in attrs:
+            if nome == "class" and valor:
+                self.classes.update(valor.split())
+            elif nome == "id" and valor:
+                self.ids.add(valor)
+
+    handle_startendtag = handle_starttag
+
+
+def seletores_usados(documentos: Iterable[str]) -> Tuple[Set[str], Set[str], Set[str]]:
+    """Retorna (tags, classes, ids) efetivamente usados no conjunto de documentos XHTML."""
+    coletor = _ColetorDeSeletores()
+    for documento in documentos:
+        coletor.feed(documento)
+        coletor.close()
+        coletor.reset()
+    return coletor.tags | _TAGS_SEMPRE_PRESENTES, coletor.classes, coletor.ids
+
+
+# --- CSS ---
+
+def _remover_comentarios_css(css: str) -> str:
+    """Remove comentários /* */ respeitando strings."""
+    resultado, i = [], 0
+    while i < len(css):
+        c = css[i]
+        if c in "\"'":
+            fim = i + 1
+            while fim < len(css) and css[fim] != c:
+                fim += 2 if css[fim] == "\\" else 1
+            resultado.append(css[i:fim + 1])
+            i = fim + 1
+        elif css.startswith("/*", i):
+            fim = css.find("*/", i + 2)
+            i = len(css) if fim == -1 else fim + 2
+        else:
+            resultado.append(c)
+            i += 1
+    return "".join(resultado)
+
+
+Regra = Tuple[str, Union[str, list]]
+
+
+def _analisar_regras(css: str) -> List[Regra]:
+    """
+    Quebra o CSS em [(prelúdio, corpo)]. O corpo é a string de declarações ou, para
+    @media/@supports, a lista de regras internas. At-rules sem bloco (ex: @import) têm corpo ''.
+    """
+    regras: List[Regra] = []
+    i = 0
+    while i < len(css):
+        inicio = i
+        # Avança até '{' ou ';' (at-rule sem bloco) fora de strings
+        while i < len(css) and css[i] not in "{;":
+            if css[i] in "\"'":
+                aspas = css[i]
+                i += 1
+                while i < len(css) and css[i] != aspas:
+                    i += 2 if css[i] == "\\" else 1
+            i += 1
+        preludio = css[inicio:i].strip()
+        if i >= len(css):
+            break
+        if css[i] == ";":
+            if preludio:
+                regras.append((preludio + ";", ""))
+            i += 1
+            continue
+        # Encontra a chave de fechamento correspondente
+        profundidade, j = 1, i + 1
+        while j < len(css) and profundidade:
+            if css[j] in "\"'":
+                aspas = css[j]
+                j += 1
+                while j < len(css) and css[j] != aspas:
+                    j += 2 if css[j] == "\\" else 1
+            elif css[j] == "{":
+                profundidade += 1
+            elif css[j] == "}":
+                profundidade -= 1
+            j += 1
+        corpo = css[i + 1:j - 1]
+        if preludio.lower().startswith(_AT_RULES_AGRUPADORAS):
+            regras.append((preludio, _analisar_regras(corpo)))
+        else:
+            regras.append((preludio, corpo))
+        i = j
+    return regras
+
+
+def _dividir_lista_seletores(preludio: str) -> List[str]:
+    """Divide 'a, b:not(.x, .y)' nas vírgulas de nível superior."""
+    partes, profundidade, atual = [], 0, []
+    for c in preludio:
+        if c in "([":
+            profundidade += 1
+        elif c in ")]":
+            profundidade -= 1
+        if c == "," and profundidade == 0:
+            partes.append("".join(atual).strip())
+            atual = []
+        else:
+            atual.append(c)
+    partes.append("".join(atual).strip())
+    return [p for p in partes if p]
+
+
+def _seletor_pode_casar(seletor: str, tags: Set[str], classes: Set[str], ids: Set[str]) -> bool:
+    """
+    Avaliação conservadora: o seletor é descartado apenas se exigir uma tag, classe ou id
+    que não aparece em nenhum documento. Argumentos de pseudo-classes (:not(...)) e
+    seletores de atributo são ignorados.
+    """
+    simplificado = re.sub(r"\[[^\]]*\]", "", seletor)
+    while re.search(r"\([^()]*\)", simplificado):
+        simplificado = re.sub(r"\([^()]*\)", "", simplificado)
+    simplificado = re.sub(r"::?[\w-]+", "", simplificado)
+
+    for classe in re.findall(r"\.(-?[_a-zA-Z][\w-]*)", simplificado):
+        if classe not in classes:
+            return False
+    for id_ in re.findall(r"#(-?[_a-zA-Z][\w-]*)", simplificado):
+        if id_ not in ids:
+            return False
+    for tag in re.findall(r"(?:^|[\s>+~])([a-zA-Z][\w-]*)", simplificado):
+        if tag.lower() not in tags:
+            return False
+    return True
+
+
+def _podar_regras(regras: List[Regra], tags, classes, ids) -> List[Regra]:
+    resultado = []
+    for preludio, corpo in regras:
+        if isinstance(corpo, list):
+            internas = _podar_regras(corpo, tags, classes, ids)
+            if internas:
+                resultado.append((preludio, internas))
+        elif preludio.startswith("@"):
+            # @font-face, @page, @import...: não dependem de seletores
+            resultado.append((preludio, corpo))
+        else:
+            seletores = [s for s in _dividir_lista_seletores(preludio)
+                         if _seletor_pode_casar(s, tags, classes, ids)]
+            if seletores:
+                resultado.append((", ".join(seletores), corpo))
+    return resultado
+
+
+def _minificar_declaracoes(corpo: str) -> str:
+    # Protege strings ("...") antes de colapsar espaços
+    strings = []
+
+    def _guardar(match):
+        strings.append(match.group(0))
+        return f"\0{len(strings) - 1}\0"
+
+    corpo = re.sub(r"\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'", _guardar, corpo)
+    corpo = re.sub(r"\s+", " ", corpo).strip()
+    corpo = re.sub(r"\s*([:;,])\s*", r"\1", corpo)
+    corpo = re.sub(r"\s*!\s*important", "!important", corpo)
+    corpo = corpo.rstrip(";")
+    return re.sub(r"\0(\d+)\0", lambda m: strings[int(m.group(1))], corpo)
+
+
+def _minificar_preludio(preludio: str) -> str:
+    preludio = re.sub(r"\s+", " ", preludio).strip()
+    if preludio.startswith("@"):
+        return re.sub(r"\s*([,{])\s*", r"\1", preludio)
+    # Em seletores, o espaço é combinador de descendência: só removemos em volta de , > + ~
+    return re.sub(r"\s*([,>+~])\s*", r"\1", preludio)
+
+
+def _serializar(regras: List[Regra], minificar: bool) -> str:
+    partes = []
+    for preludio, corpo in regras:
+        if isinstance(corpo, list):
+            interno = _serializar(corpo, minificar)
+            if minificar:
+                partes.append(f"{_minificar_preludio(preludio)}{{{interno}}}")
+            else:
+                partes.append(f"{preludio} {{\n{interno}\n}}")
+        elif preludio.endswith(";") and not corpo:
+            partes.append(_minificar_preludio(preludio) if minificar else preludio)
+        elif minificar:
+            partes.append(f"{_minificar_preludio(preludio)}{{{_minificar_declaracoes(corpo)}}}")
+        else:
+            partes.append(f"{preludio} {{{corpo.rstrip()}\n}}")
+    return "".join(partes) if minificar else "\n\n".join(partes)
+
+
+def otimizar_css(css: str, documentos: Iterable[str], minificar: bool = True) -> str:
+    """
+    Remove regras cujos seletores não casam com nenhum documento (tags, classes e ids
+    coletados dos XHTML da spine) e, opcionalmente, minifica o resultado.
+    """
+    tags, classes, ids = seletores_usados(documentos)
+    regras = _analisar_regras(_remover_comentarios_css(css))
+    return _serializar(_podar_regras(regras, tags, classes, ids), minificar)
+
+
+# --- XHTML ---
+
+def _nome_tag(token: str) -> str:
+    match = re.match(r"</?\s*([a-zA-Z][\w:-]*)", token)
+    return match.group(1).lower() if match else ""
+
+
+def _eh_limite_de_bloco(token: str) -> bool:
+    if not token.startswith("<"):
+        return False
+    if token.startswith(("<?", "<!")):
+        return True
+    return _nome_tag(token) in _TAGS_BLOCO
+
+
+def _minificar_trecho(trecho: str) -> str:
+    tokens = [t for t in re.split(r"(<!--.*?-->|<[^>]+>)", trecho, flags=re.DOTALL) if t]
+    tokens = [t for t in tokens if not (t.startswith("<!--") and t.endswith("-->"))]
+    resultado = []
+    for i, token in enumerate(tokens):
+        if token.startswith("<"):
+            resultado.append(token)
+            continue
+        texto = re.sub(r"\s+", " ", token)
+        if i == 0 or _eh_limite_de_bloco(tokens[i - 1]):
+            texto = texto.lstrip()
+        if i == len(tokens) - 1 or _eh_limite_de_bloco(tokens[i + 1]):
+            texto = texto.rstrip()
+        resultado.append(texto)
+    return "".join(resultado)
+
+
+def minificar_xhtml(documento: str) -> str:
+    """
+    Colapsa espaços em branco e remove comentários de um documento XHTML.
+
+    Espaços entre elementos inline (ex: '</em> <strong>') são preservados como um único
+    espaço; blocos <pre>, <textarea>, <script> e <style> são copiados sem alteração.
+    """
+    partes, posicao = [], 0
+    for match in _PROTEGIDOS.finditer(documento):
+        partes.append(_minificar_trecho(documento[posicao:match.start()]))
+        partes.append(match.group(0))
+        posicao = match.end()
+    partes.append(_minificar_trecho(documento[posicao:]))
+    return "".join(partes)
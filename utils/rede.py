@@ -0,0 +1,9 @@
+# utils/rede.py
+import socket
+
+
+def porta_livre() -> int:
+    """Porta TCP livre em 127.0.0.1 (para servidores locais: pandoc, soffice)."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
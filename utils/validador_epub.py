@@ -0,0 +1,136 @@
+# utils/validador_epub.py
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Set
+from urllib.parse import unquote, urlsplit
+
+NS = {
+    "container": "urn:oasis:names:tc:opendocument:xmlns:container",
+    "opf": "http://www.idpf.org/2007/opf",
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "xhtml": "http://www.w3.org/1999/xhtml",
+}
+_XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+_MIMETYPE_EPUB = b"application/epub+zip"
+
+
+def _resolver_href(base: str, href: str) -> str:
+    """Resolve um href relativo a partir do documento `base` (caminhos internos do ZIP)."""
+    caminho = unquote(urlsplit(href).path)
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base), caminho))
+
+
+def _ids_do_documento(raiz: ET.Element) -> Set[str]:
+    return {el.get("id") for el in raiz.iter() if el.get("id")}
+
+
+def validar_estrutura_epub(caminho_epub: Path) -> List[str]:
+    """
+    Pré-validação estrutural do EPUB em Python puro (sem JVM).
+
+    Cobre o que a pipeline costuma quebrar: mimetype, container.xml → OPF, manifest e
+    spine, links internos (nav/índice), XHTML bem formado e consistência de xml:lang.
+    Retorna a lista de erros encontrados (vazia se o EPUB passou).
+    """
+    erros = []
+
+    try:
+        pacote = zipfile.ZipFile(caminho_epub)
+    except (zipfile.BadZipFile, FileNotFoundError) as e:
+        return [f"Não foi possível abrir o EPUB: {e}"]
+
+    with pacote:
+        membros = pacote.infolist()
+        nomes = {m.filename for m in membros}
+
+        # 1. mimetype: primeiro membro, sem compressão e com o conteúdo exato
+        if not membros or membros[0].filename != "mimetype":
+            erros.append("'mimetype' não é o primeiro arquivo do pacote.")
+        else:
+            if membros[0].compress_type != zipfile.ZIP_STORED:
+                erros.append("'mimetype' está comprimido (deve ser gravado sem compressão).")
+            if membros[0].extra:
+                erros.append("'mimetype' possui campo extra no cabeçalho ZIP.")
+            if pacote.read("mimetype") != _MIMETYPE_EPUB:
+                erros.append("Conteúdo de 'mimetype' diferente de 'application/epub+zip'.")
+
+        # 2. container.xml → caminho do OPF
+        if "META-INF/container.xml" not in nomes:
+            erros.append("META-INF/container.xml ausente.")
+            return erros
+        try:
+            container = ET.fromstring(pacote.read("META-INF/container.xml"))
+        except ET.ParseError as e:
+            erros.append(f"META-INF/container.xml mal formado: {e}")
+            return erros
+        rootfile = container.find(".//container:rootfile", NS)
+        opf_path = rootfile.get("full-path") if rootfile is not None else None
+        if not opf_path or opf_path not in nomes:
+            erros.append(f"OPF indicado no container.xml não existe no pacote: {opf_path}")
+            return erros
+
+        try:
+            opf = ET.fromstring(pacote.read(opf_path))
+        except ET.ParseError as e:
+            erros.append(f"{opf_path} mal formado: {e}")
+            return erros
+
+        # 3. Manifest: itens existem; spine: idrefs resolvem
+        documentos: Dict[str, str] = {}  # caminho no ZIP → media-type
+        ids_manifest = set()
+        for item in opf.findall("opf:manifest/opf:item", NS):
+            item_id, href = item.get("id"), item.get("href", "")
+            if item_id in ids_manifest:
+                erros.append(f"ID duplicado no manifest: '{item_id}'")
+            ids_manifest.add(item_id)
+            caminho = _resolver_href(opf_path, href)
+            if caminho not in nomes:
+                erros.append(f"Item do manifest '{item_id}' aponta para arquivo inexistente: {href}")
+            else:
+                documentos[caminho] = item.get("media-type", "")
+
+        for itemref in opf.findall("opf:spine/opf:itemref", NS):
+            if itemref.get("idref") not in ids_manifest:
+                erros.append(f"Spine referencia idref inexistente no manifest: '{itemref.get('idref')}'")
+
+        idioma_opf_el = opf.find("opf:metadata/dc:language", NS)
+        idioma_opf = idioma_opf_el.text.strip() if idioma_opf_el is not None and idioma_opf_el.text else None
+
+        # 4. XHTML bem formado e xml:lang consistente
+        xhtml_parseados: Dict[str, ET.Element] = {}
+        for caminho, media_type in documentos.items():
+            if media_type != "application/xhtml+xml":
+                continue
+            try:
+                raiz = ET.fromstring(pacote.read(caminho))
+            except ET.ParseError as e:
+                erros.append(f"XHTML mal formado em {caminho}: {e}")
+                continue
+            xhtml_parseados[caminho] = raiz
+
+            xml_lang, lang = raiz.get(_XML_LANG), raiz.get("lang")
+            if xml_lang and lang and xml_lang != lang:
+                erros.append(f"{caminho}: xml:lang='{xml_lang}' difere de lang='{lang}'.")
+            if idioma_opf and xml_lang and xml_lang != idioma_opf:
+                erros.append(f"{caminho}: xml:lang='{xml_lang}' difere do dc:language do OPF ('{idioma_opf}').")
+
+        # 5. Links internos (nav, índice e capítulos) resolvem para arquivo e âncora existentes
+        ids_por_documento = {caminho: _ids_do_documento(raiz) for caminho, raiz in xhtml_parseados.items()}
+        for caminho, raiz in xhtml_parseados.items():
+            for link in raiz.iter(f"{{{NS['xhtml']}}}a"):
+                href = link.get("href")
+                if not href:
+                    continue
+                partes = urlsplit(href)
+                if partes.scheme or partes.netloc:
+                    continue
+                destino = _resolver_href(caminho, href) if partes.path else caminho
+                if destino not in nomes:
+                    erros.append(f"{caminho}: link para arquivo inexistente '{href}'.")
+                elif partes.fragment and destino in ids_por_documento \
+                        and unquote(partes.fragment) not in ids_por_documento[destino]:
+                    erros.append(f"{caminho}: âncora '#{partes.fragment}' não existe em {destino}.")
+
+    return erros
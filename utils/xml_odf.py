@@ -0,0 +1,69 @@
+# utils/xml_odf.py
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+OFFICE_NS = "urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+TEXT_NS = "urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+MANIFEST_NS = "urn:oasis:names:tc:opendocument:xmlns:manifest:1.0"
+_ESCAPES_ATRIBUTO = {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"}
+
+
+def mapa_prefixos(arquivo: Path) -> dict:
+    """{uri: prefixo} das declarações de namespace do documento (lidas em streaming)."""
+    prefixos = {}
+    for _, (prefixo, uri) in ET.iterparse(arquivo, events=("start-ns",)):
+        prefixos.setdefault(uri, prefixo)
+    return prefixos
+
+
+def declaracoes_namespace(prefixos: dict) -> str:
+    """Atributos xmlns para um elemento raiz que declara todos os `prefixos`."""
+    return "".join(
+        f' xmlns:{prefixo}="{escape(uri, _ESCAPES_ATRIBUTO)}"' if prefixo else f' xmlns="{escape(uri, _ESCAPES_ATRIBUTO)}"'
+        for uri, prefixo in prefixos.items()
+    )
+
+
+def nome_qualificado(tag: str, prefixos: dict) -> str:
+    if not tag.startswith("{"):
+        return tag
+    uri, local = tag[1:].split("}", 1)
+    prefixo = prefixos[uri]
+    return f"{prefixo}:{local}" if prefixo else local
+
+
+def abrir_tag(elemento: ET.Element, prefixos: dict, declaracoes: str = "") -> str:
+    atributos = "".join(
+        f' {nome_qualificado(chave, prefixos)}="{escape(valor, _ESCAPES_ATRIBUTO)}"'
+        for chave, valor in elemento.attrib.items()
+    )
+    return f"<{nome_qualificado(elemento.tag, prefixos)}{declaracoes}{atributos}>"
+
+
+def _serializar(elemento: ET.Element, prefixos: dict, saida, declaracoes: str = "") -> None:
+    inicio = abrir_tag(elemento, prefixos, declaracoes)
+    if elemento.text is None and len(elemento) == 0:
+        saida.write(inicio[:-1] + "/>")
+        return
+    saida.write(inicio)
+    if elemento.text:
+        saida.write(escape(elemento.text))
+    for filho in elemento:
+        _serializar(filho, prefixos, saida)
+        if filho.tail:
+            saida.write(escape(filho.tail))
+    saida.write(f"</{nome_qualificado(elemento.tag, prefixos)}>")
+
+
+def serializar_elemento(elemento: ET.Element, prefixos: dict, saida) -> None:
+    """
+    Escreve o elemento (sem o tail) com os prefixos do documento de destino, sem redeclarar
+    namespaces; os que o destino não declara são declarados no próprio elemento.
+    """
+    novos = {tag[1:].split("}", 1)[0] for no in elemento.iter()
+             for tag in (no.tag, *no.attrib) if tag.startswith("{")} - prefixos.keys()
+    locais = dict(prefixos)
+    for uri in sorted(novos):
+        locais[uri] = f"ns{len(locais)}"
+    _serializar(elemento, locais, saida, declaracoes_namespace({uri: locais[uri] for uri in sorted(novos)}))